@@ -2,20 +2,12 @@ import pandas as pd
 from moduloIA.multiagent_evaluador import *
 from datetime import datetime
 from tqdm import tqdm
-import os 
-base_dir = os.path.abspath(os.path.dirname(__file__))
-filename = os.path.join(base_dir, "chat_complete.csv")
-# Cargar el CSV
-df = pd.read_csv(filename, sep=';')
+from datos import cargar_chat
 
-# Ordenar los mensajes por tiempo
-df["time"] = pd.to_datetime(df["time"])
-df_ordenado = df.sort_values(by=["team_id", "time"])
+# Datos limpios y ordenados por equipo y tiempo (desde la caché si el CSV no cambió)
+df_ordenado = cargar_chat(columnas=["team_id", "user_id", "message", "time"])
 
-#df_ordenado.to_csv("data_ordenada.csv", index=False, sep=";")
- 
-
-tres_grupos = list(df_ordenado.groupby("team_id"))[3:6]
+tres_grupos = list(df_ordenado.groupby("team_id", observed=True))[3:6]
 
 resultados = []
 # Recorrer cada grupo de conversación
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import pandas as pd
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+FUENTE = os.path.join(base_dir, "chat_complete.csv")
+CACHE_DIR = os.path.join(base_dir, ".cache")
+
+# Columnas que no se usan en los análisis (constantes por experimento o datos personales)
+COLUMNAS_ELIMINADAS = ["df", "title", "opt_left", "opt_right", "rut"]
+
+# Tipos explícitos: sin ellos pandas lee los ids como float (por las filas vacías)
+# y todo lo demás como object
+DTYPES = {
+    "id": "Int64",
+    "user_id": "Int64",
+    "team_id": "Int64",
+    "gender": "category",
+    "message": "string",
+    "phase": "Int8",
+    "reply_to": "Int64",
+}
+
+# Identificadores que se agrupan/filtran: como categoría ocupan un índice pequeño por fila
+CATEGORICAS = ["team_id", "user_id"]
+
+
+def hash_archivo(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def limpiar_chat(ruta: str = FUENTE) -> pd.DataFrame:
+    """
+    Lee el CSV crudo, descarta filas vacías y columnas sin uso,
+    y ordena los mensajes por equipo y tiempo.
+    """
+    df = pd.read_csv(
+        ruta, sep=";",
+        usecols=lambda c: c not in COLUMNAS_ELIMINADAS,
+        dtype=DTYPES,
+    )
+    df = df.dropna(subset=["team_id", "time"])
+    df["time"] = pd.to_datetime(df["time"], utc=True, format="ISO8601")
+    df = df.sort_values(by=["team_id", "time"])
+    return df.astype({c: "category" for c in CATEGORICAS})
+
+
+def ruta_cache(ruta: str = FUENTE) -> str:
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    return os.path.join(CACHE_DIR, f"{nombre}_{hash_archivo(ruta)[:16]}.parquet")
+
+
+def cargar_chat(columnas: list[str] | None = None, ruta: str = FUENTE) -> pd.DataFrame:
+    """
+    Datos limpios y ordenados de `ruta`. La primera vez se guardan en
+    .cache/<nombre>_<hash>.parquet; mientras el CSV no cambie se leen de ahí,
+    y solo las `columnas` pedidas.
+    """
+    cache = ruta_cache(ruta)
+    if not os.path.exists(cache):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        # las versiones anteriores del mismo archivo ya no sirven
+        for viejo in os.listdir(CACHE_DIR):
+            if viejo.startswith(f"{nombre}_") and viejo.endswith(".parquet"):
+                os.remove(os.path.join(CACHE_DIR, viejo))
+        tmp = cache + ".tmp"
+        limpiar_chat(ruta).to_parquet(tmp, compression="zstd")
+        os.replace(tmp, cache)
+    df = pd.read_parquet(cache, columns=columnas)
+    # pyarrow devuelve las categorías enteras como enteros planos
+    return df.astype({c: "category" for c in CATEGORICAS if c in df.columns})
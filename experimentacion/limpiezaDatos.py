@@ -1,16 +1,9 @@
-import pandas as pd
-from datetime import datetime
-from tqdm import tqdm
-import os 
+import sys
+from datos import cargar_chat, ruta_cache
 
-base_dir = os.path.abspath(os.path.dirname(__file__))
-filename = os.path.join(base_dir, "chat_complete.csv")
-# Cargar el CSV
-df = pd.read_csv(filename, sep=';')
-
-# Ordenar los mensajes por tiempo
-df["time"] = pd.to_datetime(df["time"])
-df_ordenado = df.sort_values(by=["team_id", "time"])
-columnas_a_eliminar = ['df', 'title',"opt_left","opt_right","rut"]
-df_ordenado = df_ordenado.drop(columns=columnas_a_eliminar)
-df_ordenado.to_csv("data_filtrada.csv", index=False, sep=";")
\ No newline at end of file
+# Genera (o reutiliza) la caché de datos limpios y ordenados.
+# Con --csv también escribe data_filtrada.csv como antes.
+df_ordenado = cargar_chat()
+print(f"✅ {len(df_ordenado)} mensajes de {df_ordenado['team_id'].nunique()} equipos en {ruta_cache()}")
+if "--csv" in sys.argv:
+    df_ordenado.to_csv("data_filtrada.csv", index=False, sep=";")
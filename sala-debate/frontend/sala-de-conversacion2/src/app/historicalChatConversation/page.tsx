@@ -137,7 +137,7 @@ export default function HistoricalChatPage() {
               <option value="">-- elegir sesión --</option>
               {sessions.map((s) => (
                 <option key={s.id} value={s.id}>
-                  {s.room_name} / {new Date(s.created_at).toLocaleString()}
+                  {s.room_name} / {new Date(s.created_at).toLocaleString()}{s.total_messages != null ? ` · ${s.total_messages} mensajes` : ""}
                 </option>
               ))}
             </select>
@@ -0,0 +1,73 @@
+import os
+from agentscope.agent import AgentBase
+from agentscope.formatter import FormatterBase
+from agentscope.memory import MemoryBase
+from agentscope.message import Msg
+from agentscope.model import ChatModelBase, ChatResponse
+
+# SIMPLE_AGENTS=1 crea los roles que solo clasifican como AgenteSimple (opt-in: por defecto
+# todos los roles son ReActAgent, como en producción)
+SIMPLE_AGENTS = os.getenv("SIMPLE_AGENTS", "0") == "1"
+
+
+async def responder_una_vez(agente, structured_model=None) -> ChatResponse:
+    """
+    Una petición al modelo del agente con sys_prompt + memoria, sin tocar la memoria.
+    Sirve para cualquier agente con model/formatter/memory (también ReActAgent).
+    """
+    prompt = await agente.formatter.format(
+        msgs=[Msg("system", agente.sys_prompt, "system"), *await agente.memory.get_memory()],
+    )
+    if structured_model:
+        res = await agente.model(prompt, structured_model=structured_model)
+    else:
+        res = await agente.model(prompt)
+    if agente.model.stream:
+        # en streaming cada fragmento trae el contenido acumulado
+        async for fragmento in res:
+            ultimo = fragmento
+        res = ultimo
+    return res
+
+
+class AgenteSimple(AgentBase):
+    """
+    Agente de una sola llamada para roles que solo clasifican (Validador, Curador).
+    Misma interfaz que ReActAgent para los pipelines (__call__, observe, memory,
+    sys_prompt, model, formatter), pero sin el ciclo razonar/actuar: sin toolkit,
+    sin esquemas de herramientas ni compresión de memoria. Cada respuesta es
+    exactamente una petición al modelo con sys_prompt + memoria.
+    """
+
+    def __init__(self, name: str, sys_prompt: str, model: ChatModelBase,
+                 formatter: FormatterBase, memory: MemoryBase):
+        super().__init__()
+        self.name = name
+        self.sys_prompt = sys_prompt
+        self.model = model
+        self.formatter = formatter
+        self.memory = memory
+
+    async def observe(self, msg: Msg | list[Msg] | None) -> None:
+        await self.memory.add(msg)
+
+    async def reply(self, msg: Msg | list[Msg] | None = None, structured_model=None) -> Msg:
+        """Con `structured_model` la salida validada por el modelo queda en `metadata`, como en ReActAgent."""
+        await self.memory.add(msg)
+        res = await responder_una_vez(self, structured_model)
+        respuesta = Msg(name=self.name, content=list(res.content), role="assistant", metadata=res.metadata)
+        await self.memory.add(respuesta)
+        await self.print(respuesta, True)
+        return respuesta
+
+    async def handle_interrupt(self, *args, **kwargs) -> Msg:
+        """Igual que ReActAgent: devuelve (y guarda en memoria) un mensaje marcado como interrumpido."""
+        respuesta = Msg(
+            self.name,
+            "La respuesta fue interrumpida antes de terminar.",
+            "assistant",
+            metadata={"_is_interrupted": True},
+        )
+        await self.print(respuesta, True)
+        await self.memory.add(respuesta)
+        return respuesta
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("bienvenida_cache")
+
+# Segundos que una bienvenida generada sigue vigente; 0 desactiva la caché
+WELCOME_CACHE_TTL = int(os.getenv("WELCOME_CACHE_TTL", "3600"))
+
+
+def clave_bienvenida(tema: str, pipeline: str, idioma: str, instruccion: str, sys_prompt: str) -> str:
+    """(tema, pipeline, idioma, versión del prompt): el prompt entra completo al hash."""
+    crudo = json.dumps([tema, pipeline, idioma, instruccion, sys_prompt], ensure_ascii=False)
+    return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+
+def personalizar_bienvenida(texto: str, usuarios: list[str] | None, idioma: str = "español") -> str:
+    """Antepone un saludo con los nombres de la sala (sin llamar al LLM)."""
+    nombres = [u for u in (usuarios or []) if u]
+    if not nombres:
+        return texto
+    ingles = idioma.lower().startswith(("ingl", "engl"))
+    union = " and " if ingles else " y "
+    lista = nombres[0] if len(nombres) == 1 else ", ".join(nombres[:-1]) + union + nombres[-1]
+    saludo = f"Hi {lista}!" if ingles else f"¡Hola {lista}!"
+    return f"{saludo}\n\n{texto}"
+
+
+class BienvenidaCache:
+    """
+    Bienvenidas compartidas entre salas. Single-flight: si varias salas piden la
+    misma clave a la vez, solo la primera llama al LLM y las demás esperan su
+    resultado. Los fallos no se guardan (cada sala vuelve a su flujo normal).
+    """
+
+    def __init__(self, ttl_segundos: int = WELCOME_CACHE_TTL):
+        self.ttl_segundos = ttl_segundos
+        self._entradas: dict[str, tuple[float, asyncio.Future]] = {}
+
+    async def obtener(self, clave: str, generar: Callable[[], Awaitable[str | None]]) -> str | None:
+        if self.ttl_segundos <= 0:
+            return await generar()
+
+        entrada = self._entradas.get(clave)
+        if entrada and time.monotonic() - entrada[0] < self.ttl_segundos:
+            return await asyncio.shield(entrada[1])
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._entradas[clave] = (time.monotonic(), futuro)
+        texto = None
+        try:
+            texto = await generar()
+        except Exception as e:
+            logger.error(f"[Bienvenida] error generando la bienvenida compartida: {e}")
+        finally:
+            if not texto:
+                self._entradas.pop(clave, None)
+            futuro.set_result(texto or None)
+        return texto or None
+
+    def limpiar(self) -> None:
+        self._entradas.clear()
+
+
+# Una caché por proceso, compartida por todas las salas
+bienvenidas = BienvenidaCache()
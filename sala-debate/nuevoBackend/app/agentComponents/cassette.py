@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict
+from typing import Any
+from agentscope.model import ChatModelBase, ChatResponse
+try:
+    from agentscope.model import ChatUsage
+except ImportError:
+    # agentscope 1.0.x no exporta ChatUsage en agentscope.model
+    from agentscope.model._model_usage import ChatUsage
+
+logger = logging.getLogger("cassette")
+
+MODOS = ("record", "replay")
+
+
+class CassetteMissError(KeyError):
+    """No hay respuesta grabada para el prompt pedido en modo replay."""
+
+
+def normalizar_contenido(contenido: Any) -> str:
+    if isinstance(contenido, list):
+        partes = []
+        for bloque in contenido:
+            if isinstance(bloque, dict):
+                partes.append(bloque.get("text") or json.dumps(bloque, sort_keys=True, ensure_ascii=False, default=str))
+            else:
+                partes.append(str(bloque))
+        contenido = "\n".join(partes)
+    # espacios/saltos de línea no cambian el significado del prompt
+    return re.sub(r"\s+", " ", str(contenido or "")).strip()
+
+
+def clave_prompt(model_name: str, messages: list[dict], tools: list[dict] | None = None,
+                 tool_choice: str | None = None, structured_model=None) -> str:
+    """Hash estable del prompt normalizado (rol, nombre y texto de cada mensaje + herramientas)."""
+    normalizado = {
+        "modelo": model_name,
+        "mensajes": [
+            [m.get("role"), m.get("name"), normalizar_contenido(m.get("content"))]
+            for m in messages
+        ],
+        "tools": sorted(t.get("function", {}).get("name", "") for t in (tools or [])),
+        "tool_choice": tool_choice,
+        "structured_model": getattr(structured_model, "__name__", None),
+    }
+    crudo = json.dumps(normalizado, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+
+def _serializar_respuesta(r: ChatResponse) -> dict:
+    return {
+        "content": list(r.content),
+        "usage": asdict(r.usage) if r.usage else None,
+        "metadata": r.metadata,
+    }
+
+
+def _deserializar_respuesta(d: dict) -> ChatResponse:
+    usage = ChatUsage(**d["usage"]) if d.get("usage") else None
+    return ChatResponse(content=d["content"], usage=usage, metadata=d.get("metadata"))
+
+
+class Cassette:
+    """
+    Archivo JSONL con pares prompt/respuesta grabados:
+    {"clave", "modelo", "latencia", "respuesta"} por línea.
+    Si un mismo prompt se grabó varias veces, en replay se sirven en el mismo orden
+    (y la última se repite cuando se agotan).
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._grabaciones: dict[str, list[dict]] = {}
+        self._servidas: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as f:
+                for linea in f:
+                    if linea.strip():
+                        e = json.loads(linea)
+                        self._grabaciones.setdefault(e["clave"], []).append(e)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._grabaciones.values())
+
+    def siguiente(self, clave: str) -> dict:
+        grabadas = self._grabaciones.get(clave)
+        if not grabadas:
+            raise CassetteMissError(clave)
+        i = self._servidas.get(clave, 0)
+        self._servidas[clave] = i + 1
+        return grabadas[min(i, len(grabadas) - 1)]
+
+    async def grabar(self, entrada: dict) -> None:
+        async with self._lock:
+            self._grabaciones.setdefault(entrada["clave"], []).append(entrada)
+            await asyncio.to_thread(self._append, json.dumps(entrada, ensure_ascii=False, default=str))
+
+    def _append(self, linea: str) -> None:
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+# Un cassette por ruta, compartido por todos los agentes del proceso
+_cassettes: dict[str, Cassette] = {}
+
+
+def get_cassette(ruta: str) -> Cassette:
+    ruta = os.path.abspath(ruta)
+    if ruta not in _cassettes:
+        _cassettes[ruta] = Cassette(ruta)
+    return _cassettes[ruta]
+
+
+class CassetteChatModel(ChatModelBase):
+    """
+    Envuelve un modelo de chat para grabar o reproducir sus respuestas.
+      - record: llama al modelo real y guarda respuesta + latencia medida.
+      - replay: sirve la respuesta grabada sin red; con factor_latencia > 0
+        espera la latencia grabada (multiplicada por el factor).
+    """
+
+    def __init__(self, modelo: ChatModelBase | None, cassette: Cassette, modo: str,
+                 model_name: str | None = None, factor_latencia: float = 0.0):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de cassette inválido: {modo}")
+        if modo == "record" and modelo is None:
+            raise ValueError("El modo record necesita el modelo real")
+        super().__init__(model_name=model_name or modelo.model_name, stream=False)
+        self.modelo = modelo
+        self.cassette = cassette
+        self.modo = modo
+        self.factor_latencia = factor_latencia
+
+    async def __call__(self, messages: list[dict], tools: list[dict] | None = None,
+                       tool_choice: str | None = None, structured_model=None, **kwargs) -> ChatResponse:
+        clave = clave_prompt(self.model_name, messages, tools, tool_choice, structured_model)
+
+        if self.modo == "replay":
+            grabada = self.cassette.siguiente(clave)
+            if self.factor_latencia > 0:
+                await asyncio.sleep(grabada["latencia"] * self.factor_latencia)
+            return _deserializar_respuesta(grabada["respuesta"])
+
+        inicio = time.perf_counter()
+        respuesta = await self.modelo(messages, tools=tools, tool_choice=tool_choice,
+                                      structured_model=structured_model, **kwargs)
+        latencia = time.perf_counter() - inicio
+        await self.cassette.grabar({
+            "clave": clave,
+            "modelo": self.model_name,
+            "latencia": round(latencia, 4),
+            "respuesta": _serializar_respuesta(respuesta),
+        })
+        return respuesta
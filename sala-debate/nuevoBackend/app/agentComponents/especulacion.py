@@ -0,0 +1,88 @@
+import os
+import re
+
+# SPECULATIVE_ORIENTADOR=1 arranca el Orientador junto al clasificador cuando la señal local
+# predice una intervención (opt-in: si el clasificador no escala, esa llamada se descarta)
+SPECULATIVE_ORIENTADOR = os.getenv("SPECULATIVE_ORIENTADOR", "0") == "1"
+# Señal (0-1) a partir de la cual se especula
+UMBRAL_ESPECULACION = float(os.getenv("SPECULATIVE_THRESHOLD", "0.5"))
+# Peso de la última decisión del clasificador en la tasa reciente
+ALFA_TASA = 0.3
+
+# Conectores que suelen acompañar una justificación
+_CONECTORES = re.compile(
+    r"\b(porque|ya que|debido|puesto que|por eso|por lo tanto|entonces|sin embargo|aunque|"
+    r"por ejemplo|seg[uú]n|evidencia|dato|demuestra)\b",
+    re.IGNORECASE,
+)
+PALABRAS_MENSAJE_CORTO = 8
+
+
+def senal_intervencion(textos: list[str], tasa_reciente: float) -> float:
+    """
+    Estimación local (sin LLM) de que el clasificador escale al Orientador:
+    mensajes sin justificación, mensajes muy cortos y la tasa reciente de escalamiento.
+    """
+    if not textos:
+        return tasa_reciente
+    sin_justificar = sum(1 for t in textos if not _CONECTORES.search(t)) / len(textos)
+    cortos = sum(1 for t in textos if len(t.split()) < PALABRAS_MENSAJE_CORTO) / len(textos)
+    return round(0.5 * sin_justificar + 0.2 * cortos + 0.3 * tasa_reciente, 4)
+
+
+class Especulador:
+    """Decide cuándo especular en una sala y acumula aciertos y latencia ahorrada."""
+
+    def __init__(self, umbral: float = UMBRAL_ESPECULACION):
+        self.umbral = umbral
+        self.tasa_reciente = 0.0
+        self.evaluaciones = 0
+        self.especuladas = 0
+        self.aciertos = 0        # especuladas y el clasificador escaló: se usó la respuesta
+        self.descartadas = 0     # especuladas y el clasificador no escaló
+        self.no_previstas = 0    # el clasificador escaló sin especulación
+        self.ahorro_s = 0.0
+
+    def debe_especular(self, textos: list[str]) -> bool:
+        return SPECULATIVE_ORIENTADOR and senal_intervencion(textos, self.tasa_reciente) >= self.umbral
+
+    def registrar(self, especulada: bool, intervino: bool, ahorro_s: float = 0.0) -> None:
+        """Resultado de una evaluación; `ahorro_s` es la latencia ahorrada en un acierto."""
+        self.tasa_reciente = ALFA_TASA * intervino + (1 - ALFA_TASA) * self.tasa_reciente
+        self._contar(especulada, intervino, ahorro_s)
+        if self is not _total:
+            _total._contar(especulada, intervino, ahorro_s)
+
+    def _contar(self, especulada: bool, intervino: bool, ahorro_s: float) -> None:
+        self.evaluaciones += 1
+        if especulada:
+            self.especuladas += 1
+            if intervino:
+                self.aciertos += 1
+                self.ahorro_s += max(ahorro_s, 0.0)
+            else:
+                self.descartadas += 1
+        elif intervino:
+            self.no_previstas += 1
+
+    def estado(self) -> dict:
+        return {
+            "activa": SPECULATIVE_ORIENTADOR,
+            "umbral": self.umbral,
+            "evaluaciones": self.evaluaciones,
+            "especuladas": self.especuladas,
+            "aciertos": self.aciertos,
+            "descartadas": self.descartadas,
+            "no_previstas": self.no_previstas,
+            "tasa_acierto": round(self.aciertos / self.especuladas, 4) if self.especuladas else None,
+            "ahorro_total_s": round(self.ahorro_s, 3),
+            "ahorro_medio_s": round(self.ahorro_s / self.aciertos, 3) if self.aciertos else None,
+        }
+
+
+# Totales del proceso (todas las salas)
+_total = Especulador()
+
+
+def estado_especulacion() -> dict:
+    return _total.estado()
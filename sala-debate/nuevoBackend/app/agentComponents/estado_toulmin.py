@@ -0,0 +1,103 @@
+import os
+from pydantic import BaseModel, Field
+
+# TOULMIN_STATE=1 lleva el estado en el servidor: Validador por deltas y Curador fuera del hub
+# (opt-in: cambia lo que ven los agentes respecto de la condición experimental)
+TOULMIN_STATE = os.getenv("TOULMIN_STATE", "0") == "1"
+
+COMPONENTES = ("Claim", "Evidence", "Warrant", "Qualifier")
+
+
+class EstudianteToulmin(BaseModel):
+    """
+    Estado del análisis de un estudiante según el modelo de Toulmin
+    (mismos campos que BaseModelEstudiante del backend anterior).
+    """
+    Claim: int = Field(0, description="0 si no se ha identificado afirmación; 1 si se ha detectado una afirmación.")
+    Evidence: int = Field(-1, description="-1 si no hay evidencia identificada; 1 si la hay.")
+    Warrant: int = Field(-1, description="-1 si no hay justificación identificada; 1 si la hay.")
+    Qualifier: int = Field(0, description="0 si no se detecta calificativo; 1 o 2 según el grado de certeza.")
+    fuentes: dict[str, list[str]] = Field(
+        default_factory=lambda: {c: [] for c in COMPONENTES},
+        description="Diccionario con listas de IDs de mensajes que sustentan cada componente."
+    )
+    explicacion: str = Field(
+        "",
+        description="Texto breve que justifica el cambio más reciente de estado detectado por el Validador."
+    )
+
+
+class DeltaToulmin(BaseModel):
+    """Salida del Validador: lo que aporta el mensaje actual, no el estado completo."""
+    claim: bool = Field(description="true si el mensaje plantea una afirmación o postura")
+    evidence: bool = Field(description="true si el mensaje aporta evidencia o datos")
+    warrant: bool = Field(description="true si el mensaje justifica por qué la evidencia sostiene la afirmación")
+    qualifier: int = Field(description="0 sin calificativo; 1 o 2 según el grado de certeza expresado")
+    explicacion: str = Field(description="Una frase breve (máximo 20 palabras)")
+
+
+# Se agrega al prompt del Validador cuando el estado se lleva en el servidor
+INSTRUCCION_DELTA = (
+    "\n\nEl estado Toulmin de cada estudiante se lleva aparte. Evalúa solo el mensaje actual "
+    "y responde con lo que ese mensaje aporta (claim, evidence, warrant, qualifier y una "
+    "explicación breve); no repitas el estado completo."
+)
+
+
+class EstadoToulmin:
+    """Estado Toulmin de la sala por estudiante; se actualiza con los deltas del Validador."""
+
+    def __init__(self, estudiantes: list[str] | None = None):
+        self.estudiantes: dict[str, EstudianteToulmin] = {e: EstudianteToulmin() for e in estudiantes or []}
+
+    def de(self, estudiante: str) -> EstudianteToulmin:
+        return self.estudiantes.setdefault(estudiante, EstudianteToulmin())
+
+    def aplicar(self, estudiante: str, delta: DeltaToulmin, mensaje_id: str) -> list[str]:
+        """Une el delta al estado (los componentes no retroceden). Devuelve los que cambiaron."""
+        estado = self.de(estudiante)
+        aportes = {
+            "Claim": 1 if delta.claim else None,
+            "Evidence": 1 if delta.evidence else None,
+            "Warrant": 1 if delta.warrant else None,
+            "Qualifier": min(max(delta.qualifier, 0), 2) or None,
+        }
+        cambios = []
+        for componente, valor in aportes.items():
+            if valor is None:
+                continue
+            estado.fuentes[componente].append(mensaje_id)
+            if valor > getattr(estado, componente):
+                setattr(estado, componente, valor)
+                cambios.append(componente)
+        if cambios:
+            estado.explicacion = delta.explicacion
+        return cambios
+
+    def linea(self, estudiante: str) -> str:
+        """
+        Ej.: 'ana: C1 E1 W- Q- (3 msgs con aporte)'. Un componente ausente (-1 en Evidence
+        y Warrant, 0 en Claim y Qualifier) se muestra como '-'; el contador son los
+        mensajes del estudiante que aportaron algún componente.
+        """
+        e = self.de(estudiante)
+        con_aporte = len({m for ids in e.fuentes.values() for m in ids})
+        return (f"{estudiante}: C{_marca(e.Claim)} E{_marca(e.Evidence)} W{_marca(e.Warrant)} "
+                f"Q{_marca(e.Qualifier)} ({con_aporte} msgs con aporte)")
+
+    def resumen_compacto(self) -> str:
+        """Una línea por estudiante, para el Curador en vez del historial completo."""
+        return "\n".join(self.linea(e) for e in self.estudiantes)
+
+    def a_dict(self) -> dict:
+        return {e: estado.model_dump() for e, estado in self.estudiantes.items()}
+
+
+def _marca(valor: int) -> str:
+    return str(valor) if valor > 0 else "-"
+
+
+def texto_delta(estudiante: str, cambios: list[str], delta: DeltaToulmin) -> str:
+    """Texto del Validador para la UI y el log."""
+    aportes = " ".join(f"+{c}" for c in cambios) or "sin cambios"
+    return f"{estudiante}: {aportes}. {delta.explicacion}".strip()
@@ -6,25 +6,73 @@ from agentscope.formatter import OpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
 from agentscope.tool import Toolkit, ToolResponse
 from agentscope.plan import PlanNotebook
+from .cassette import CassetteChatModel, get_cassette
+from .agente_simple import AgenteSimple
+from .niveles_modelo import MODEL_TIERS, NIVEL_DEFECTO, ModeloEnrutado
 load_dotenv()
 api_key = os.getenv("API_KEY")
 
+# Grabación/reproducción de llamadas al LLM (ver cassette.py):
+# AGENT_CASSETTE_MODE=record|replay, AGENT_CASSETTE_PATH, AGENT_CASSETTE_LATENCIA (factor, 0 = sin espera)
+CASSETTE_MODE = os.getenv("AGENT_CASSETTE_MODE", "").lower()
+CASSETTE_PATH = os.getenv("AGENT_CASSETTE_PATH", "./cassettes/agentes.jsonl")
+CASSETTE_LATENCIA = float(os.getenv("AGENT_CASSETTE_LATENCIA", "0"))
+
 
 class ReActAgentFactory:
 
-    def __init__(self, model_name: str = "gpt-4o-mini"):
+    def __init__(self, model_name: str = "gpt-4o-mini", cassette_mode: str | None = None,
+                 cassette_path: str | None = None, cassette_latencia: float | None = None,
+                 rutas: dict[str, str] | None = None):
         self.api_key = api_key
         self.model_name = model_name
+        self.cassette_mode = CASSETTE_MODE if cassette_mode is None else cassette_mode
+        self.cassette_path = cassette_path or CASSETTE_PATH
+        self.cassette_latencia = CASSETTE_LATENCIA if cassette_latencia is None else cassette_latencia
+        # nivel de modelo por agente (tabla agent_model_routes); sin entrada = NIVEL_DEFECTO
+        self.rutas = dict(rutas or {})
+
+    def crear_modelo(self, nivel: str | None = None):
+        """Cliente del modelo del nivel indicado (modelo y max_tokens); sin nivel, `model_name`."""
+        model_name = MODEL_TIERS[nivel].modelo if nivel else self.model_name
+        if self.cassette_mode == "replay":
+            # sin red: no se construye el cliente real
+            return CassetteChatModel(
+                None, get_cassette(self.cassette_path), "replay",
+                model_name=model_name, factor_latencia=self.cassette_latencia,
+            )
+        max_tokens = MODEL_TIERS[nivel].max_tokens if nivel else None
+        modelo = OpenAIChatModel(
+            model_name=model_name,
+            api_key=self.api_key,
+            stream=False,
+            generate_kwargs={"max_tokens": max_tokens} if max_tokens else None,
+        )
+        if self.cassette_mode == "record":
+            return CassetteChatModel(modelo, get_cassette(self.cassette_path), "record")
+        return modelo
+
+    def modelo_para_rol(self, name: str, primario=None) -> ModeloEnrutado:
+        """Modelo del agente según su nivel, con timeout, degradación y métricas del nivel."""
+        return ModeloEnrutado(name, self.rutas.get(name, NIVEL_DEFECTO), self.crear_modelo, primario)
 
-    def create_agent(self, name: str, sys_prompt: str) -> ReActAgent:
+    def create_agent(self, name: str, sys_prompt: str, model=None, simple: bool = False) -> ReActAgent | AgenteSimple:
+        """
+        `model` permite que varios agentes compartan un mismo cliente.
+        `simple` crea un AgenteSimple (una llamada, sin ciclo ReAct) para roles que solo clasifican.
+        """
+        if simple:
+            return AgenteSimple(
+                name=name,
+                sys_prompt=sys_prompt,
+                model=model or self.modelo_para_rol(name),
+                formatter=OpenAIChatFormatter(),
+                memory=InMemoryMemory()
+            )
         return ReActAgent(
             name=name,
             sys_prompt=sys_prompt,
-            model=OpenAIChatModel(
-                model_name=self.model_name,
-                api_key=self.api_key,
-                stream=False
-            ),
+            model=model or self.modelo_para_rol(name),
             formatter=OpenAIChatFormatter(),
             memory=InMemoryMemory()
         )
@@ -33,11 +81,7 @@ class ReActAgentFactory:
         return ReActAgent(
             name=name,
             sys_prompt=sys_prompt,
-            model=OpenAIChatModel(
-                model_name=self.model_name,
-                api_key=self.api_key,
-                stream=False
-            ),
+            model=self.crear_modelo(),
             formatter=OpenAIChatFormatter(),
             memory=InMemoryMemory(),
             toolkit=toolkit,
@@ -47,11 +91,7 @@ class ReActAgentFactory:
         return ReActAgent(
             name=name,
             sys_prompt=sys_prompt,
-            model=OpenAIChatModel(
-                model_name=self.model_name,
-                api_key=self.api_key,
-                stream=False
-            ),
+            model=self.crear_modelo(),
             formatter=OpenAIChatFormatter(),
             memory=InMemoryMemory(),
             plan_notebook=planNotebook,
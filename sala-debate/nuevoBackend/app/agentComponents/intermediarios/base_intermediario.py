@@ -1,14 +1,22 @@
 import asyncio
+import os
 import re
 import logging
+import time
 from typing import Optional, List, Dict, Any
 from abc import ABC, abstractmethod
 from ..timer import Timer
-from app.models.models import insert_message, SenderType
+from app.models.models import insert_message, record_session_startup, SenderType
 
 logger = logging.getLogger("base_intermediario")
 
+# Segundos que stop_session espera a las tareas en segundo plano antes de cancelarlas
+ESPERA_TAREAS_AL_CERRAR = float(os.getenv("SESSION_STOP_TASK_WAIT", "30"))
+
 class BaseIntermediario(ABC):
+    # Agentes que reciben el caso completo en su prompt; el resto recibe el condensado
+    AGENTES_TEMA_COMPLETO = ("Orientador",)
+
     def __init__(self, sio, sala: str, room_session_id):
         self.sio = sio
         self.sala = sala
@@ -17,6 +25,8 @@ class BaseIntermediario(ABC):
         # Infraestructura de mensajes
         self.message_queue: asyncio.Queue = asyncio.Queue(maxsize=500)
         self.processing_task = asyncio.create_task(self._process_messages())
+        # Trabajo lanzado fuera de la cola (p. ej. la cascada de ventana de Toulmin)
+        self.tareas_pendientes: set[asyncio.Task] = set()
         
         # Gestión de tiempo
         self.timer = Timer()
@@ -29,6 +39,10 @@ class BaseIntermediario(ABC):
         # Pipeline (se define en las subclases)
         self.pipeLine = None
 
+        # perf_counter del POST que creó la sala; mide el tiempo hasta el primer mensaje
+        self.t_solicitud: float | None = None
+        self.startup_ms: int | None = None
+
     # --- Gestión de Cola ---
     async def _process_messages(self):
         while True:
@@ -51,6 +65,22 @@ class BaseIntermediario(ABC):
     async def enqueue(self, username: str, message: str, user_message_id: int):
         await self.message_queue.put((username, message, user_message_id))
 
+    def _lanzar_tarea(self, coro) -> asyncio.Task:
+        """Corre `coro` fuera de la cola de mensajes, registrada en tareas_pendientes."""
+        tarea = asyncio.create_task(coro)
+        self.tareas_pendientes.add(tarea)
+        tarea.add_done_callback(self.tareas_pendientes.discard)
+        return tarea
+
+    async def esperar_tareas(self, timeout: float | None = None) -> None:
+        """Espera las tareas en segundo plano; las que sigan tras `timeout` se cancelan."""
+        if not self.tareas_pendientes:
+            return
+        _, sin_terminar = await asyncio.wait(set(self.tareas_pendientes), timeout=timeout)
+        for tarea in sin_terminar:
+            logger.warning(f"[{self.sala}] tarea en segundo plano cancelada al cerrar")
+            tarea.cancel()
+
     # --- Gestión de Timer ---
     async def start_timer(self, duration_seconds: int, update_interval: int):
         self.timer.callback = self.callback
@@ -68,13 +98,19 @@ class BaseIntermediario(ABC):
         }
 
     async def stop_session(self):
+        self.timer.stop()
+        # que las evaluaciones en curso se emitan y guarden antes de cerrar el hub
+        await self.esperar_tareas(timeout=ESPERA_TAREAS_AL_CERRAR)
         if self.pipeLine:
             await self.pipeLine.stop_session()
-        self.timer.stop()
 
     # --- Lógica de Sesión Común ---
-    async def start_session(self, topic: str, usuarios_sala: list, idioma: str):
-        """Inicia la sesión y procesa todas las respuestas iniciales del pipeline."""
+    async def start_session(self, topic: str, usuarios_sala: list, idioma: str, tema_condensado: str | None = None):
+        """
+        Inicia la sesión y procesa todas las respuestas iniciales del pipeline.
+        Con `tema_condensado`, el anuncio del hub lleva el resumen en vez del caso completo.
+        """
+        self.pipeLine.tema_condensado = tema_condensado
         respuestas = await self.pipeLine.start_session(topic, usuarios_sala, idioma)
         
         # Iteramos sobre las respuestas para persistirlas y emitirlas
@@ -91,6 +127,19 @@ class BaseIntermediario(ABC):
                 
                 respuestas_transformadas = self._transformar_respuestas(respuestas_validas)
                 await self.sio.emit("evaluacion", respuestas_transformadas, room=self.sala)
+                await self._registrar_arranque()
+
+    async def _registrar_arranque(self):
+        """Registra los ms entre la creación de la sala y su primer mensaje emitido."""
+        if self.t_solicitud is None or self.startup_ms is not None:
+            return
+        self.startup_ms = int((time.perf_counter() - self.t_solicitud) * 1000)
+        logger.info(f"[{self.sala}] primer mensaje a los {self.startup_ms} ms")
+        if self.room_session_id:
+            try:
+                await asyncio.to_thread(record_session_startup, self.room_session_id, self.startup_ms)
+            except Exception as e:
+                logger.error(f"Error DB (startup_ms): {e}")
 
     # --- Callbacks y Eventos ---
     async def callback(self, elapsed_time: int, remaining_time: int, hito_alcanzado: Optional[int] = None):
@@ -12,7 +12,7 @@ class IntermediarioAbogado(BaseIntermediario):
     Usa los mismos agentes que Standard (Validador + Orientador),
     pero con prompts específicos orientados al cuestionamiento y desafío.
     """
-    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None):
+    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None, factory=None):
         super().__init__(sio, sala, room_session_id)
         
         # Nombre personalizado del orientador para AbogadoPipeline
@@ -21,7 +21,7 @@ class IntermediarioAbogado(BaseIntermediario):
         # Los prompts deben venir de la BD con claves específicas del sistema "abogado-del-diablo"
         window_size = config_multiagente.ventana_mensajes if config_multiagente else 5
         self.pipeLine = AbogadoPipeline(
-            factory=ReActAgentFactory(),
+            factory=factory or ReActAgentFactory(),
             prompt_validador=prompts.get("Validador"),
             prompt_orientador=prompts.get("Orientador"),
             window_size=window_size
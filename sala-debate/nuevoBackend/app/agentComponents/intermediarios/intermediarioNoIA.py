@@ -11,7 +11,7 @@ class IntermediarioNoIA(BaseIntermediario):
     Se mantiene el logging para registro completo de la sesión.
     """
     
-    def __init__(self, prompts: dict = None, sio=None, sala: str = None, room_session_id: int = None, config_multiagente=None):
+    def __init__(self, prompts: dict = None, sio=None, sala: str = None, room_session_id: int = None, config_multiagente=None, factory=None):
         super().__init__(sio, sala, room_session_id)
         
         # Pipeline sin IA - sin agentes, solo conversación de usuarios
@@ -7,14 +7,14 @@ import logging
 logger = logging.getLogger("intermediario_standard")
 
 class IntermediarioStandard(BaseIntermediario):
-    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None):
+    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None, factory=None):
         super().__init__(sio, sala, room_session_id)
         
         # Nombre del orientador (default para StandardPipeline)
         self.nombre_orientador = "Orientador"
         
         self.pipeLine = StandardPipeline(
-            factory=ReActAgentFactory(),
+            factory=factory or ReActAgentFactory(),
             prompt_validador=prompts.get("Validador"),
             prompt_orientador=prompts.get("Orientador")
         )
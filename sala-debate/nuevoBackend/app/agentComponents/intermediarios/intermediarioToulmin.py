@@ -1,13 +1,14 @@
 from .base_intermediario import BaseIntermediario
 from ..pipelines.qualityPipeline import QualityPipeline
 from ..factory_agents import ReActAgentFactory
+import asyncio
 import time
 import logging
 
 logger = logging.getLogger("intermediario_toulmin")
 
 class IntermediarioToulmin(BaseIntermediario):
-    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None):
+    def __init__(self, prompts: dict, sio, sala, room_session_id, config_multiagente=None, factory=None):
         super().__init__(sio, sala, room_session_id)
         
         # Nombre del orientador (default para Toulmin)
@@ -17,7 +18,7 @@ class IntermediarioToulmin(BaseIntermediario):
         self.tamañoVentana = config_multiagente.ventana_mensajes if config_multiagente else 5
         
         self.pipeLine = QualityPipeline(
-            factory=ReActAgentFactory(),
+            factory=factory or ReActAgentFactory(),
             prompt_validador=prompts.get("Validador"),
             prompt_curador=prompts.get("Curador"),
             prompt_orientador=prompts.get("Orientador")
@@ -34,6 +35,8 @@ class IntermediarioToulmin(BaseIntermediario):
         # Seguimiento de mensajes para ventana
         self.numeroMensajes = 0
         self.ids_mensajes_ventana = []
+        # La cascada de cada ventana corre fuera de la cola, de a una por sala y en orden
+        self._semaforo_ventana = asyncio.Semaphore(1)
 
     def puede_intervenir(self) -> bool:
         """Devuelve True si el tiempo de enfriamiento ha pasado."""
@@ -61,18 +64,32 @@ class IntermediarioToulmin(BaseIntermediario):
         # Flujo de Ventana / Calidad
         res_validador = await self.pipeLine.entrar_mensaje_a_la_sala(username=userName, mensaje=message)
         if res_validador:
-            self._insert_in_db("Validador", res_validador, parent_id=user_message_id)
+            self._insert_in_db("Validador", res_validador.get("respuesta", ""), parent_id=user_message_id)
 
         self.numeroMensajes += 1
         self.ids_mensajes_ventana.append(user_message_id)
 
         if self.numeroMensajes >= self.tamañoVentana:
-            respuesta_cascada = await self.pipeLine.evaluar_intervencion_en_cascada()
-            for r in respuesta_cascada:
-                nombre_agente = r.get("agente", "").capitalize()
-                self._insert_in_db(nombre_agente, r.get("respuesta", ""), used_ids=self.ids_mensajes_ventana.copy())
-            
+            # se fija la ventana ahora: la cascada puede correr cuando ya llegaron otros mensajes
+            ids_ventana = self.ids_mensajes_ventana.copy()
+            mensajes_ventana = self.pipeLine._get_recent_user_messages(n=self.tamañoVentana)
             self.ids_mensajes_ventana = []
             self.numeroMensajes = 0
-            return self._transformar_respuestas(respuesta_cascada)
-        return None
\ No newline at end of file
+            # Curador → Orientador fuera de la cola: la validación de los mensajes siguientes no espera
+            self._lanzar_tarea(self._evaluar_ventana(ids_ventana, mensajes_ventana))
+        return None
+
+    async def _evaluar_ventana(self, ids_ventana: list, mensajes_ventana: list) -> None:
+        """Cascada de una ventana cerrada: emite y guarda sus respuestas cuando están listas."""
+        async with self._semaforo_ventana:
+            try:
+                respuesta_cascada = await self.pipeLine.evaluar_intervencion_en_cascada(
+                    self.tamañoVentana, mensajes_ventana
+                )
+                for r in respuesta_cascada:
+                    nombre_agente = r.get("agente", "").capitalize()
+                    self._insert_in_db(nombre_agente, r.get("respuesta", ""), used_ids=ids_ventana)
+                if respuesta_cascada:
+                    await self.sio.emit("evaluacion", self._transformar_respuestas(respuesta_cascada), room=self.sala)
+            except Exception as e:
+                logger.error(f"[{self.sala}] Error en la cascada de ventana: {e}")
\ No newline at end of file
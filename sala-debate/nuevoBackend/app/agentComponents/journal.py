@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+logger = logging.getLogger("session_journal")
+
+_FIN = object()  # centinela para detener el writer
+
+
+class SessionJournal:
+    """
+    Bitácora append-only (JSONL) de una sesión.
+    Cada mensaje difundido se encola con `append` (no bloquea) y un writer en
+    segundo plano lo escribe en disco por lotes fuera del event loop.
+    Al cerrar la sesión solo hace falta `close()` (flush + línea de cierre).
+
+    Formato: una línea JSON por entrada, con campo "tipo":
+      - "cabecera": sala, pipeline, caso, timestamp_inicio
+      - "mensaje": timestamp, agent, autor, contenido | ultimos_mensajes
+      - "cierre": timestamp_cierre, n_mensajes
+    El JSON clásico (conversacion_*.json) se reconstruye offline con
+    `reconstruir_conversacion` o `python -m app.agentComponents.journal <archivo.jsonl>`.
+    """
+
+    def __init__(self, ruta: str, sala: str, pipeline: str, caso: str | None):
+        self.ruta = ruta
+        self.n_mensajes = 0
+        self._cerrado = False
+        self._cola: asyncio.Queue = asyncio.Queue()
+        self._cola.put_nowait({
+            "tipo": "cabecera",
+            "sala": sala,
+            "pipeline": pipeline,
+            "caso": caso,
+            "timestamp_inicio": datetime.now().isoformat(),
+        })
+        self._writer_task = asyncio.create_task(self._writer())
+
+    def append(self, entrada: dict) -> None:
+        """Encola una entrada de mensaje para escribirla en segundo plano."""
+        if self._cerrado:
+            return
+        self.n_mensajes += 1
+        self._cola.put_nowait({"tipo": "mensaje", **entrada})
+
+    async def close(self) -> str:
+        """Escribe la línea de cierre, espera a que se vacíe la cola y detiene el writer."""
+        if not self._cerrado:
+            self._cola.put_nowait({
+                "tipo": "cierre",
+                "timestamp_cierre": datetime.now().isoformat(),
+                "n_mensajes": self.n_mensajes,
+            })
+            self._cerrado = True
+            self._cola.put_nowait(_FIN)
+        await self._writer_task
+        return self.ruta
+
+    async def _writer(self):
+        await asyncio.to_thread(os.makedirs, os.path.dirname(self.ruta) or ".", exist_ok=True)
+        while True:
+            lote = [await self._cola.get()]
+            while not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+
+            fin = any(e is _FIN for e in lote)
+            lineas = [json.dumps(e, ensure_ascii=False, default=str) for e in lote if e is not _FIN]
+            if lineas:
+                try:
+                    await asyncio.to_thread(self._escribir_lineas, lineas)
+                except Exception as e:
+                    logger.error(f"[Journal] Error escribiendo {self.ruta}: {e}")
+            if fin:
+                return
+
+    def _escribir_lineas(self, lineas: list[str]) -> None:
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+
+
+def leer_journal(ruta: str):
+    """Itera las entradas de un journal JSONL (tolera una última línea truncada)."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                logger.warning(f"[Journal] Línea inválida ignorada en {ruta}")
+
+
+def reconstruir_conversacion(ruta: str) -> dict:
+    """
+    Reconstruye desde un journal el mismo formato que
+    BasePipeline.exportar_conversacion_completa.
+    """
+    registro = {"sala": "", "pipeline": "", "caso": "", "timestamp_exportacion": None, "mensajes": []}
+    for e in leer_journal(ruta):
+        tipo = e.pop("tipo", "mensaje")
+        if tipo == "cabecera":
+            registro["sala"] = e.get("sala") or ""
+            registro["pipeline"] = e.get("pipeline") or ""
+            registro["caso"] = e.get("caso") or ""
+        elif tipo == "cierre":
+            registro["timestamp_exportacion"] = e.get("timestamp_cierre")
+        else:
+            registro["mensajes"].append(e)
+
+    if not registro["timestamp_exportacion"]:
+        registro["timestamp_exportacion"] = datetime.fromtimestamp(os.path.getmtime(ruta)).isoformat()
+    registro["mensajes"].sort(key=lambda m: m.get("timestamp") or "")
+    return registro
+
+
+def exportar_journal_a_json(ruta: str, destino: str | None = None) -> str:
+    """Escribe el conversacion_*.json equivalente a un journal. Retorna la ruta escrita."""
+    destino = destino or os.path.splitext(ruta)[0] + ".json"
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(reconstruir_conversacion(ruta), f, indent=2, ensure_ascii=False)
+    return destino
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m app.agentComponents.journal <journal.jsonl> [...]")
+        sys.exit(1)
+    for ruta in sys.argv[1:]:
+        print(f"[✅ Exportado]: {exportar_journal_a_json(ruta)}")
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from agentscope.model import ChatModelBase, ChatResponse
+
+logger = logging.getLogger("niveles_modelo")
+
+
+@dataclass(frozen=True)
+class NivelModelo:
+    modelo: str
+    timeout: float                 # segundos por petición al modelo
+    max_tokens: int | None         # límite de tokens de la respuesta
+    latencia_max: float            # latencia media (EWMA) sobre la que se degrada
+    max_en_vuelo: int              # peticiones simultáneas sobre las que se degrada
+    degradar_a: str | None = None  # nivel más rápido al que se baja con carga
+
+
+# Niveles disponibles. La tabla agent_model_routes asigna uno a cada agente por pipeline;
+# sin fila se usa NIVEL_DEFECTO ("estandar": el modelo de siempre, sin límite de tokens).
+# MODEL_TIERS_JSON permite ajustar campos por despliegue, p. ej. {"rapido": {"modelo": "gpt-4o-mini"}}.
+MODEL_TIERS = {
+    "rapido": NivelModelo("gpt-4.1-nano", timeout=8, max_tokens=300, latencia_max=4, max_en_vuelo=32),
+    "estandar": NivelModelo("gpt-4o-mini", timeout=15, max_tokens=None, latencia_max=6, max_en_vuelo=16,
+                            degradar_a="rapido"),
+    "avanzado": NivelModelo("gpt-4o", timeout=25, max_tokens=1200, latencia_max=10, max_en_vuelo=8,
+                            degradar_a="estandar"),
+}
+for _nombre, _campos in json.loads(os.getenv("MODEL_TIERS_JSON", "{}")).items():
+    _base = asdict(MODEL_TIERS[_nombre]) if _nombre in MODEL_TIERS else {}
+    MODEL_TIERS[_nombre] = NivelModelo(**{**_base, **_campos})
+
+NIVEL_DEFECTO = os.getenv("MODEL_TIER_DEFAULT", "estandar")
+# MODEL_TIER_AUTO_DOWNGRADE=1 activa la degradación automática (opt-in: cambia el modelo con carga)
+AUTO_DOWNGRADE = os.getenv("MODEL_TIER_AUTO_DOWNGRADE", "0") == "1"
+# Peso de la última latencia en la media móvil
+ALFA_EWMA = 0.2
+# Sin llamadas en este tiempo, un nivel degradado por latencia vuelve a probarse
+RECUPERACION_SEGUNDOS = 30
+
+
+@dataclass
+class MetricasNivel:
+    llamadas: int = 0
+    degradadas: int = 0  # llamadas que llegaron a este nivel por degradación
+    timeouts: int = 0
+    errores: int = 0
+    en_vuelo: int = 0
+    latencia_ewma: float | None = None
+    ultima_llamada: float = 0.0
+    tokens_entrada: int = 0
+    tokens_salida: int = 0
+    latencias: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def resumen(self) -> dict:
+        ordenadas = sorted(self.latencias)
+
+        def pct(p):
+            return round(ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))], 4) if ordenadas else None
+
+        return {
+            "llamadas": self.llamadas,
+            "degradadas": self.degradadas,
+            "timeouts": self.timeouts,
+            "errores": self.errores,
+            "en_vuelo": self.en_vuelo,
+            "latencia_ewma_s": round(self.latencia_ewma, 4) if self.latencia_ewma is not None else None,
+            "latencia_p50_s": pct(0.5),
+            "latencia_p95_s": pct(0.95),
+            "tokens_entrada": self.tokens_entrada,
+            "tokens_salida": self.tokens_salida,
+        }
+
+
+class MonitorNiveles:
+    """Carga y métricas por nivel, compartidas por todos los agentes del proceso."""
+
+    def __init__(self, niveles: dict[str, NivelModelo] = MODEL_TIERS):
+        self.niveles = niveles
+        self.metricas = {nombre: MetricasNivel() for nombre in niveles}
+
+    def sobrecargado(self, nivel: str) -> bool:
+        m, n = self.metricas[nivel], self.niveles[nivel]
+        if m.en_vuelo >= n.max_en_vuelo:
+            return True
+        lento = m.latencia_ewma is not None and m.latencia_ewma >= n.latencia_max
+        return lento and time.monotonic() - m.ultima_llamada < RECUPERACION_SEGUNDOS
+
+    def elegir(self, nivel: str) -> str:
+        """El nivel pedido o, si está sobrecargado, el siguiente más rápido (un escalón)."""
+        destino = self.niveles[nivel].degradar_a
+        if AUTO_DOWNGRADE and destino and self.sobrecargado(nivel):
+            return destino
+        return nivel
+
+    def registrar(self, nivel: str, latencia: float | None = None, respuesta: ChatResponse | None = None,
+                  degradada: bool = False, timeout: bool = False, error: bool = False) -> None:
+        m = self.metricas[nivel]
+        m.llamadas += 1
+        m.degradadas += degradada
+        m.timeouts += timeout
+        m.errores += error
+        m.ultima_llamada = time.monotonic()
+        if latencia is not None:
+            m.latencias.append(latencia)
+            m.latencia_ewma = latencia if m.latencia_ewma is None else (
+                ALFA_EWMA * latencia + (1 - ALFA_EWMA) * m.latencia_ewma
+            )
+        uso = getattr(respuesta, "usage", None)
+        if uso:
+            m.tokens_entrada += uso.input_tokens or 0
+            m.tokens_salida += uso.output_tokens or 0
+
+    def estado(self) -> dict:
+        return {
+            nombre: {**asdict(self.niveles[nombre]), **self.metricas[nombre].resumen()}
+            for nombre in self.niveles
+        }
+
+
+# Uno por proceso
+monitor_niveles = MonitorNiveles()
+
+
+class ModeloPerezoso(ChatModelBase):
+    """
+    Modelo que construye el cliente real en su primera llamada, en un hilo aparte.
+    El agente existe desde el inicio (recibe los mensajes del hub); solo se difiere
+    el cliente, que es lo costoso. Un Curador que nunca interviene no lo construye.
+    """
+
+    def __init__(self, crear, model_name: str, stream: bool = False):
+        super().__init__(model_name=model_name, stream=stream)
+        self._crear = crear
+        self._modelo: ChatModelBase | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def construido(self) -> bool:
+        return self._modelo is not None
+
+    async def _obtener(self) -> ChatModelBase:
+        if self._modelo is None:
+            async with self._lock:
+                if self._modelo is None:
+                    self._modelo = await asyncio.to_thread(self._crear)
+        return self._modelo
+
+    async def __call__(self, messages: list[dict], **kwargs) -> ChatResponse:
+        modelo = await self._obtener()
+        return await modelo(messages, **kwargs)
+
+
+class ModeloEnrutado(ChatModelBase):
+    """
+    Modelo de un rol: llama al cliente de su nivel con el timeout del nivel y, si el
+    nivel está sobrecargado (peticiones en vuelo o latencia media sobre el umbral),
+    al del nivel más rápido. Los clientes de otros niveles se crean al primer uso.
+    """
+
+    def __init__(self, rol: str, nivel: str, crear_cliente, primario: ChatModelBase | None = None,
+                 monitor: MonitorNiveles = monitor_niveles):
+        if nivel not in MODEL_TIERS:
+            logger.warning(f"[Niveles] nivel desconocido '{nivel}' para {rol}; se usa {NIVEL_DEFECTO}")
+            nivel = NIVEL_DEFECTO
+        super().__init__(model_name=MODEL_TIERS[nivel].modelo, stream=False)
+        self.rol = rol
+        self.nivel = nivel
+        self.monitor = monitor
+        self._crear_cliente = crear_cliente
+        self._clientes: dict[str, ChatModelBase] = {nivel: primario} if primario else {}
+
+    @property
+    def timeout(self) -> float:
+        """Timeout del nivel del rol (los niveles degradados tienen uno menor)."""
+        return MODEL_TIERS[self.nivel].timeout
+
+    def _cliente(self, nivel: str) -> ChatModelBase:
+        if nivel not in self._clientes:
+            self._clientes[nivel] = ModeloPerezoso(lambda: self._crear_cliente(nivel), MODEL_TIERS[nivel].modelo)
+        return self._clientes[nivel]
+
+    async def __call__(self, messages: list[dict], **kwargs) -> ChatResponse:
+        nivel = self.monitor.elegir(self.nivel)
+        degradada = nivel != self.nivel
+        if degradada:
+            logger.info(f"[Niveles] {self.rol}: {self.nivel} sobrecargado, se usa {nivel}")
+        metricas = self.monitor.metricas[nivel]
+        metricas.en_vuelo += 1
+        inicio = time.perf_counter()
+        try:
+            respuesta = await asyncio.wait_for(
+                self._cliente(nivel)(messages, **kwargs), timeout=MODEL_TIERS[nivel].timeout
+            )
+        except asyncio.TimeoutError:
+            self.monitor.registrar(nivel, time.perf_counter() - inicio, degradada=degradada, timeout=True)
+            raise
+        except Exception:
+            self.monitor.registrar(nivel, degradada=degradada, error=True)
+            raise
+        finally:
+            metricas.en_vuelo -= 1
+        self.monitor.registrar(nivel, time.perf_counter() - inicio, respuesta, degradada=degradada)
+        return respuesta
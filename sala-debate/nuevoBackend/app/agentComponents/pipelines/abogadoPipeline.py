@@ -19,12 +19,14 @@ class AbogadoPipeline(BasePipeline):
     INACTIVITY_THRESHOLD_SECONDS = 60 # Definir a un usuario como inactivo
     INACTIVITY_MENTION_COOLDOWN_SECONDS = 75 #Si fue mencionado como inactivo, en "x" segundos se volverá a contar como inactivo
     INACTIVITY_MIN_RELATIVE_PARTICIPATION = 0.0
+    AGENTES_SIMPLES = ("Validador",)
+    AGENTES_VEREDICTO = ("Validador",)
 
     def __init__(self, factory, prompt_validador, prompt_orientador, window_size: int = 5):
         super().__init__(timeout=15)
         # Agentes específicos de este pipeline
-        self.agenteValidador = factory.create_agent("Validador", prompt_validador)
-        self.agenteOrientador = factory.create_agent("Orientador", prompt_orientador)
+        self.agenteValidador = self._crear_agente(factory, "Validador", prompt_validador)
+        self.agenteOrientador = self._crear_agente(factory, "Orientador", prompt_orientador)
         self.agentes = [self.agenteValidador, self.agenteOrientador]
 
         # métricas de actividad de los usuarios (inactividad + invitados suaves)
@@ -58,9 +60,9 @@ class AbogadoPipeline(BasePipeline):
         # Lógica de bienvenida
         mensaje = Msg(name="Host", role="system", content="Sesión iniciada. Orientador, explica el objetivo y menciona la pregunta del dilema, si es que hay una.")
         await self._broadcast(mensaje)
-        res = await self._call_agent(self.agenteOrientador)
+        respuesta = await self._bienvenida(self.agenteOrientador, mensaje.content, usuarios_sala, idioma)
 
-        return [{"agente": "Orientador", "respuesta": self.ensure_text(self.extract_content(res))}]
+        return [{"agente": "Orientador", "respuesta": respuesta}]
 
     async def entrar_mensaje_a_la_sala(self, username: str, mensaje: str):
         """
@@ -141,9 +143,7 @@ class AbogadoPipeline(BasePipeline):
     async def evaluar_intervencion_en_cascada(self, mensaje: Msg):
         await self._broadcast(mensaje)
 
-        res_val = await self._call_agent(self.agenteValidador, mensaje)
-        if not isinstance(res_val, Msg):
-            res_val = Msg(name=self.agenteValidador.name, role="assistant", content=self.ensure_text(res_val))
+        res_val, intervenir = await self._evaluar(self.agenteValidador, mensaje)
 
         extra = self._inactive_followup_text()
         if extra:
@@ -161,7 +161,7 @@ class AbogadoPipeline(BasePipeline):
             "mensajes_evaluados": mensajes_evaluados
         }]
 
-        if filter_agents(texto_val, self.agentes):
+        if intervenir:
             res_ori = await self._call_agent(self.agenteOrientador)
             if not isinstance(res_ori, Msg):
                 res_ori = Msg(name=self.agenteOrientador.name, role="assistant", content=self.ensure_text(res_ori))
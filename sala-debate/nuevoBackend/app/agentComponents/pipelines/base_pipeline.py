@@ -1,41 +1,86 @@
 import asyncio
 import logging
 import json
-import os
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from ..utils.utilsForAgents import formato_tiempo
+from ..utils.utilsForAgents import filter_agents, formato_tiempo
+from ..journal import SessionJournal
+from ..bienvenida_cache import bienvenidas, clave_bienvenida, personalizar_bienvenida
+from ..agente_simple import SIMPLE_AGENTS, responder_una_vez
+from ..especulacion import Especulador
+from ..veredictos import INSTRUCCION_VEREDICTO, STRUCTURED_VERDICTS, Veredicto, parsear_veredicto, texto_veredicto
+from agentscope.agent import ReActAgent
+from agentscope.memory import InMemoryMemory
 from agentscope.message import Msg
 from agentscope.pipeline import MsgHub
 
 logger = logging.getLogger("base_pipeline")
 
+
+def texto_anuncio(tema: str | None, idioma: str, participantes_text: str) -> str:
+    """Anuncio del hub con el que arranca cada sesión (lo reciben todos los agentes del hub)."""
+    return f"""
+        === CONTEXTO DE LA SESIÓN ===
+        TEMA CENTRAL: {tema}
+        IDIOMA: {idioma}
+        
+        PARTICIPANTES:
+        {participantes_text}
+
+        INSTRUCCIONES:
+        1. Toda intervención debe estar alineada con el TEMA CENTRAL.
+        2. Las respuestas deben ser en {idioma}.
+        """
+
 class BasePipeline(ABC):
+    # Roles que solo clasifican: se crean como AgenteSimple (una llamada, sin ciclo ReAct)
+    AGENTES_SIMPLES: tuple[str, ...] = ()
+    # Clasificadores que deciden la intervención del Orientador con un Veredicto estructurado
+    AGENTES_VEREDICTO: tuple[str, ...] = ()
+
     def __init__(self, timeout: int = 15):
         self._timeout = timeout
-        self._lock_call = asyncio.Lock()
+        # un lock por agente: llamadas a agentes distintos (p. ej. Validador y la cascada
+        # de ventana en segundo plano) pueden solaparse; al mismo agente, no
+        self._locks_call: dict[str, asyncio.Lock] = {}
         self._lock_observe = asyncio.Lock()
         self._lock_broadcast = asyncio.Lock()
         
         self.hub = None
         self.agentes = []
         self.tema_sala = None
+        self.tema_condensado: str | None = None  # resumen del caso para el anuncio del hub
         self.sala_name: str | None = None  # nombre de la sala para los logs
         # registro manual de mensajes de usuario para logging
         self._user_history: list[dict] = []
+        # bitácora JSONL que se escribe en segundo plano durante la sesión
+        self._journal: SessionJournal | None = None
+        self.registrar_journal = True  # las reproducciones offline lo desactivan
+        # Orientador especulativo en la cascada (SPECULATIVE_ORIENTADOR=1)
+        self.especulador = Especulador()
     
     # Hacer disponible formato_tiempo como método
     def formato_tiempo(self, segundos: int) -> str:
         """Convierte segundos a formato legible (ej: '2 minutos y 30 segundos')"""
         return formato_tiempo(segundos)
 
+    def _crear_agente(self, factory, nombre: str, prompt: str):
+        if STRUCTURED_VERDICTS and nombre in self.AGENTES_VEREDICTO:
+            prompt = prompt + INSTRUCCION_VEREDICTO
+        return factory.create_agent(nombre, prompt, simple=SIMPLE_AGENTS and nombre in self.AGENTES_SIMPLES)
+
+    def _timeout_de(self, agent) -> float:
+        """Timeout de una llamada al agente: el del pipeline o, si es mayor, el del nivel de su modelo."""
+        return max(self._timeout, getattr(agent.model, "timeout", 0))
+
     # --- Métodos de ejecución protegidos ---
-    async def _call_agent(self, agent, msg: Msg | None = None):
+    async def _call_agent(self, agent, msg: Msg | None = None, **kwargs):
         try:
-            async with self._lock_call:
+            async with self._locks_call.setdefault(agent.name, asyncio.Lock()):
                 return await asyncio.wait_for(
-                    agent(msg) if msg else agent(),
-                    timeout=self._timeout
+                    agent(msg, **kwargs) if msg else agent(**kwargs),
+                    timeout=self._timeout_de(agent)
                 )
         except asyncio.TimeoutError:
             logger.warning(f"[Timeout] agente={agent.name}")
@@ -44,6 +89,81 @@ class BasePipeline(ABC):
             logger.error(f"[Error LLM] agente={agent.name} err={e}")
             return None
 
+    async def _evaluar(self, agent, msg: Msg) -> tuple[Msg, bool]:
+        """
+        Llama a un clasificador y devuelve su mensaje y si el Orientador debe intervenir.
+        Con veredicto estructurado la decisión es solo `intervenir`: si el veredicto no
+        valida (o hay timeout) se reenvía el texto crudo y no se escala; la mención
+        @Orientador no se usa como respaldo. Sin él, se busca la mención en el texto.
+        """
+        if STRUCTURED_VERDICTS and agent.name in self.AGENTES_VEREDICTO:
+            res = await self._call_agent(agent, msg, structured_model=Veredicto)
+            veredicto = parsear_veredicto(res, agent.name)
+            if veredicto is None:
+                return Msg(name=agent.name, role="assistant", content=self.ensure_text(self.extract_content(res))), False
+            return Msg(
+                name=agent.name, role="assistant", content=texto_veredicto(veredicto),
+                metadata=veredicto.model_dump(mode="json"),
+            ), veredicto.intervenir
+
+        res = await self._call_agent(agent, msg)
+        if not isinstance(res, Msg):
+            res = Msg(name=agent.name, role="assistant", content=self.ensure_text(res))
+        return res, bool(filter_agents(self.ensure_text(self.extract_content(res)), self.agentes))
+
+    async def _evaluar_especulando(self, agent, msg: Msg, orientador, textos: list[str]) -> tuple[Msg, bool, Msg | None]:
+        """
+        `_evaluar` con el Orientador arrancado en paralelo cuando la señal local (`textos`)
+        predice una intervención. Devuelve también la respuesta especulada del Orientador,
+        solo si el clasificador escaló; si no escaló se cancela y se descarta. Con None el
+        pipeline llama al Orientador en serie, como sin especulación.
+
+        A diferencia del camino en serie, la respuesta especulada se genera sin el mensaje
+        del clasificador en la memoria del Orientador (aún no existe): el Orientador
+        responde a la conversación, no al motivo del veredicto.
+        """
+        if not self.especulador.debe_especular(textos):
+            res, intervenir = await self._evaluar(agent, msg)
+            self.especulador.registrar(False, intervenir)
+            return res, intervenir, None
+
+        inicio = time.perf_counter()
+        tarea = asyncio.create_task(self._respuesta_especulada(orientador))
+        try:
+            res, intervenir = await self._evaluar(agent, msg)
+            duracion_clasificador = time.perf_counter() - inicio
+            if not intervenir:
+                self.especulador.registrar(True, False)
+                return res, False, None
+
+            res_ori, duracion_ori = await tarea
+            # en serie habría tardado clasificador + Orientador; en paralelo, lo que tardó el más lento
+            ahorro = duracion_clasificador + duracion_ori - (time.perf_counter() - inicio) if res_ori else 0.0
+            self.especulador.registrar(True, True, ahorro)
+            return res, True, res_ori
+        finally:
+            # sin escalamiento, o si se cancela esta evaluación, la especulación no sigue viva
+            if not tarea.done():
+                tarea.cancel()
+                await asyncio.gather(tarea, return_exceptions=True)
+
+    async def _respuesta_especulada(self, agente) -> tuple[Msg | None, float]:
+        """
+        Una llamada al modelo del agente con su memoria actual, sin pasar por el agente:
+        no escribe en su memoria ni en el hub hasta que el pipeline la difunde. Toma el
+        lock del agente, como `_call_agent`, para no leer su memoria a mitad de otra llamada.
+        """
+        inicio = time.perf_counter()
+        try:
+            async with self._locks_call.setdefault(agente.name, asyncio.Lock()):
+                res = await asyncio.wait_for(responder_una_vez(agente), timeout=self._timeout_de(agente))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Especulación] agente={agente.name} err={e}")
+            return None, 0.0
+        return Msg(name=agente.name, role="assistant", content=list(res.content)), time.perf_counter() - inicio
+
     async def _observe_agent(self, agent, msg: Msg) -> bool:
         if not agent: return False
         try:
@@ -82,6 +202,8 @@ class BasePipeline(ABC):
         else:
             entry["contenido"] = contenido
         self._user_history.append(entry)
+        if self._journal:
+            self._journal.append(entry)
         try:
             if not self.hub: return False
             async with self._lock_broadcast:
@@ -97,38 +219,90 @@ class BasePipeline(ABC):
         hint_text = self._generar_prompt_inicio(usuarios_sala, idioma)
         
         hint = Msg(name="Host", role="system", content=hint_text)
-        self.hub = await MsgHub(participants=self.agentes, announcement=hint).__aenter__()
+        self.hub = await MsgHub(participants=self._participantes_hub(), announcement=hint).__aenter__()
+        self._abrir_journal()
+
+    def _participantes_hub(self) -> list:
+        """Agentes que reciben todos los mensajes de la sala."""
+        return self.agentes
+
+    def _ruta_log(self, extension: str = ".json") -> str:
+        """
+        Ruta ./logs/conversacion_<tema>[_<sala>]_<timestamp><extension>.
+        La sala evita que salas con el mismo caso iniciadas en el mismo segundo compartan archivo.
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        tema_slug = (self.tema_sala or "sin_tema")[:50].replace("/", "_").replace("\\", "_")
+        if self.sala_name:
+            tema_slug += "_" + self.sala_name[:30].replace("/", "_").replace("\\", "_")
+        return f"./logs/conversacion_{tema_slug}_{timestamp}{extension}"
+
+    def _abrir_journal(self):
+        """Abre la bitácora JSONL de la sesión (una por pipeline)."""
+        if self._journal or not self.registrar_journal:
+            return
+        try:
+            self._journal = SessionJournal(
+                ruta=self._ruta_log(".jsonl"),
+                sala=self.sala_name or "",
+                pipeline=self.__class__.__name__,
+                caso=self.tema_sala,
+            )
+        except Exception as e:
+            logger.error(f"[Journal] No se pudo abrir la bitácora: {e}")
     
-    def _generar_prompt_inicio(self, usuarios_sala: list, idioma: str) -> str:
+    def _generar_prompt_inicio(self, usuarios_sala: list, idioma: str, participantes_text: str | None = None) -> str:
         """Genera el bloque de texto estándar incluyendo el TEMA de la sala."""
-        participantes_text = "\n".join(f"- {u}" for u in usuarios_sala) if usuarios_sala else "Ninguno"
-        
-        return f"""
-        === CONTEXTO DE LA SESIÓN ===
-        TEMA CENTRAL: {self.tema_sala}
-        IDIOMA: {idioma}
-        
-        PARTICIPANTES:
-        {participantes_text}
+        if participantes_text is None:
+            participantes_text = "\n".join(f"- {u}" for u in usuarios_sala) if usuarios_sala else "Ninguno"
+        return texto_anuncio(self.tema_condensado or self.tema_sala, idioma, participantes_text)
 
-        INSTRUCCIONES:
-        1. Toda intervención debe estar alineada con el TEMA CENTRAL.
-        2. Las respuestas deben ser en {idioma}.
+    async def _bienvenida(self, agente, instruccion: str, usuarios_sala: list, idioma: str) -> str:
+        """
+        Bienvenida del agente compartida entre salas con el mismo tema, pipeline, idioma
+        y prompt: se genera una vez (sin nombres) y se personaliza con los de esta sala.
+        Se difunde por el hub para que quede en la memoria de los agentes de la sala.
         """
+        clave = clave_bienvenida(self.tema_sala or "", self.__class__.__name__, idioma, instruccion, agente.sys_prompt)
+        texto = await bienvenidas.obtener(clave, lambda: self._generar_bienvenida_neutra(agente, instruccion, idioma))
+        if not texto:
+            # sin bienvenida compartida: la sala la pide por su cuenta
+            res = await self._call_agent(agente)
+            return self.ensure_text(self.extract_content(res))
+
+        texto = personalizar_bienvenida(texto, usuarios_sala, idioma)
+        await self._broadcast(Msg(name=agente.name, role="assistant", content=texto))
+        return texto
+
+    async def _generar_bienvenida_neutra(self, agente, instruccion: str, idioma: str) -> str | None:
+        """Copia del agente con memoria vacía y sin participantes (comparte el cliente del modelo)."""
+        neutro = ReActAgent(
+            name=agente.name,
+            sys_prompt=agente.sys_prompt,
+            model=agente.model,
+            formatter=agente.formatter,
+            memory=InMemoryMemory(),
+        )
+        contexto = self._generar_prompt_inicio(
+            [], idioma, participantes_text="(se saludan aparte; no menciones nombres de participantes)"
+        )
+        await neutro.observe(Msg(name="Host", role="system", content=contexto))
+        res = await self._call_agent(neutro, Msg(name="Host", role="system", content=instruccion))
+        if res is None:
+            return None
+        texto = self.ensure_text(self.extract_content(res)).strip()
+        return texto if texto and texto.lower() != "none" else None
 
     async def stop_session(self) -> None:
-        """Finalización estándar: exporta logs y cierra el hub."""
+        """Finalización estándar: vacía y cierra la bitácora y cierra el hub."""
         if self.hub:
-            try:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                tema_slug = (self.tema_sala or "sin_tema")[:50]
-                ruta = f"./logs/conversacion_{tema_slug}_{timestamp}.json"
-                os.makedirs(os.path.dirname(ruta), exist_ok=True)
-                
-                await self.guardar_conversacion_json(ruta)
-                print(f"[✅ Log guardado]: {ruta}")
-            except Exception as e:
-                print(f"[❌ Error exportando]: {e}")
+            if self._journal:
+                try:
+                    ruta = await self._journal.close()
+                    print(f"[✅ Log guardado]: {ruta}")
+                except Exception as e:
+                    print(f"[❌ Error cerrando bitácora]: {e}")
+                self._journal = None
 
             await self.hub.__aexit__(None, None, None)
             self.hub = None
@@ -299,10 +473,15 @@ class BasePipeline(ABC):
     async def guardar_conversacion_json(self, ruta_archivo: str) -> str:
         """
         Guarda la conversación exportada como archivo JSON ordenado.
+        La escritura se hace en un hilo para no bloquear el event loop.
         """
         datos = await self.exportar_conversacion_completa()
-        with open(ruta_archivo, "w", encoding="utf-8") as f:
-            json.dump(datos, f, indent=2, ensure_ascii=False)
+
+        def _escribir():
+            with open(ruta_archivo, "w", encoding="utf-8") as f:
+                json.dump(datos, f, indent=2, ensure_ascii=False)
+
+        await asyncio.to_thread(_escribir)
         return ruta_archivo
     
     # -----------------------------------------------------------------------
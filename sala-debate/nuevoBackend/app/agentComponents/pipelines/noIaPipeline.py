@@ -1,7 +1,4 @@
 import logging
-import json
-import os
-from datetime import datetime
 from .base_pipeline import BasePipeline
 from agentscope.message import Msg
 from agentscope.pipeline import MsgHub
@@ -73,22 +70,3 @@ class NoIaPipeline(BasePipeline):
         """
         # No enviar mensajes de hitos - sesión completamente limpia
         return None
-
-    async def stop_session(self) -> None:
-        """
-        Finalización: exporta logs y cierra la sesión.
-        """
-        if self.hub:
-            try:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                tema_slug = (self.tema_sala or "sin_tema")[:50]
-                ruta = f"./logs/conversacion_{tema_slug}_{timestamp}.json"
-                os.makedirs(os.path.dirname(ruta), exist_ok=True)
-                
-                await self.guardar_conversacion_json(ruta)
-                logger.info(f"[✅ Log savedado]: {ruta}")
-            except Exception as e:
-                logger.error(f"[❌ Error exportando]: {e}")
-
-            await self.hub.__aexit__(None, None, None)
-            self.hub = None
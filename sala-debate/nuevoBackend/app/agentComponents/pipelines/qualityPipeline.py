@@ -1,33 +1,52 @@
 import logging
 from .base_pipeline import BasePipeline
 from ..utils.utilsForAgents import *
+from ..estado_toulmin import TOULMIN_STATE, INSTRUCCION_DELTA, DeltaToulmin, EstadoToulmin, texto_delta
+from ..veredictos import parsear_veredicto
 from agentscope.message import Msg
 from agentscope.pipeline import MsgHub
 
 logger = logging.getLogger("standard_pipeline")
 
 class QualityPipeline(BasePipeline):
+    AGENTES_SIMPLES = ("Validador", "Curador")
+    AGENTES_VEREDICTO = ("Curador",)
+
     def __init__(self, factory, prompt_validador, prompt_curador, prompt_orientador):
         super().__init__(timeout=15)
-        self.agenteValidador = factory.create_agent("Validador", prompt_validador)
-        self.agenteOrientador = factory.create_agent("Orientador", prompt_orientador)
-        self.agenteCurador = factory.create_agent("Curador", prompt_curador)
+        if TOULMIN_STATE:
+            prompt_validador = prompt_validador + INSTRUCCION_DELTA
+        self.agenteValidador = self._crear_agente(factory, "Validador", prompt_validador)
+        self.agenteOrientador = self._crear_agente(factory, "Orientador", prompt_orientador)
+        self.agenteCurador = self._crear_agente(factory, "Curador", prompt_curador)
         
         self.agentes = [self.agenteCurador, self.agenteOrientador]
+        # Estado Toulmin por estudiante, actualizado con los deltas del Validador
+        self.estado_toulmin = EstadoToulmin()
+        self._mensajes_validados = 0
+
+    def _participantes_hub(self) -> list:
+        # con estado Toulmin el Curador evalúa el estado compacto y la ventana, no el historial
+        if TOULMIN_STATE:
+            return [self.agenteOrientador]
+        return self.agentes
 
     async def start_session(self, tema_sala: str, usuarios_sala: list, idioma: str):
         await self.set_hub(tema_sala, usuarios_sala, idioma)
+        self.estado_toulmin = EstadoToulmin([sanitize_name(u) for u in usuarios_sala or []])
         
         # Lógica específica de inicio
         inicio_msg = Msg(name="Host", role="system", content="La sesión ha comenzado. Orientador, da la bienvenida.")
         await self._broadcast(inicio_msg)
         
-        res = await self._call_agent(self.agenteOrientador, inicio_msg)
-        return [{"agente": "Orientador", "respuesta": self.ensure_text(self.extract_content(res))}]
+        respuesta = await self._bienvenida(self.agenteOrientador, inicio_msg.content, usuarios_sala, idioma)
+        return [{"agente": "Orientador", "respuesta": respuesta}]
 
     async def entrar_mensaje_a_la_sala(self, username: str, mensaje: str):
         msg = Msg(name=sanitize_name(username), role='user', content=mensaje)
         await self._broadcast(msg)  # guardar en historial
+        if TOULMIN_STATE:
+            return await self._validar_delta(msg)
         # Toulmin envía el mensaje al Validador directamente
         res = await self._call_agent(self.agenteValidador, msg)
         if not isinstance(res, Msg):
@@ -42,27 +61,68 @@ class QualityPipeline(BasePipeline):
             "mensajes_evaluados": mensajes_evaluados
         }
 
-    async def evaluar_intervencion_en_cascada(self):
-        # Lógica de Curador -> Orientador
+    async def _validar_delta(self, msg: Msg) -> dict:
+        """
+        El Validador evalúa solo el mensaje actual (con el estado del autor) y devuelve
+        un delta que se une al estado. Su memoria no acumula el historial.
+        """
+        estudiante = msg.name
+        self._mensajes_validados += 1
+        mensaje_id = f"m{self._mensajes_validados}"
+        entrada = Msg(
+            name=estudiante, role="user",
+            content=f"Estado actual: {self.estado_toulmin.linea(estudiante)}\nMensaje {mensaje_id}: {msg.content}",
+        )
+        await self.agenteValidador.memory.clear()
+        res = await self._call_agent(self.agenteValidador, entrada, structured_model=DeltaToulmin)
+        delta = parsear_veredicto(res, self.agenteValidador.name, DeltaToulmin)
+        if delta is None:
+            texto = f"{estudiante}: sin evaluación."
+        else:
+            cambios = self.estado_toulmin.aplicar(estudiante, delta, mensaje_id)
+            texto = texto_delta(estudiante, cambios, delta)
+        await self._broadcast(Msg(name=self.agenteValidador.name, role="assistant", content=texto))
+
+        return {
+            "respuesta": texto,
+            "mensajes_evaluados": self._get_recent_user_messages(n=5),
+            "estado_toulmin": self.estado_toulmin.de(estudiante).model_dump(),
+        }
+
+    async def evaluar_intervencion_en_cascada(self, n_mensajes: int = 5, mensajes_ventana: list | None = None):
+        """
+        Curador -> Orientador sobre una ventana. `mensajes_ventana` fija los mensajes
+        evaluados (la cascada puede correr después de que lleguen otros).
+        """
+        if mensajes_ventana is None:
+            mensajes_ventana = self._get_recent_user_messages(n=n_mensajes)
         msg_curador = Msg(name="Host", role="system", content="Evalúa si se necesita intervención.")
         await self._broadcast(msg_curador)
-        res_curador = await self._call_agent(self.agenteCurador, msg_curador)
-        if not isinstance(res_curador, Msg):
-            res_curador = Msg(name=self.agenteCurador.name, role="assistant", content=self.ensure_text(res_curador))
+        if TOULMIN_STATE:
+            # estado compacto + ventana en lugar del historial de la sala
+            ventana = "\n".join(f"{m['usuario']}: {m['mensaje']}" for m in mensajes_ventana)
+            msg_curador = Msg(name="Host", role="system", content=(
+                f"{msg_curador.content}\n\nESTADO TOULMIN (C=afirmación, E=evidencia, W=garantía, "
+                f"Q=calificador; - = ausente; msgs con aporte = mensajes que aportaron algún componente):\n{self.estado_toulmin.resumen_compacto()}"
+                f"\n\nÚLTIMOS MENSAJES:\n{ventana}"
+            ))
+            await self.agenteCurador.memory.clear()
+        textos = [m["mensaje"] for m in mensajes_ventana]
+        res_curador, intervenir, res_ori = await self._evaluar_especulando(
+            self.agenteCurador, msg_curador, self.agenteOrientador, textos
+        )
         await self._broadcast(res_curador)
         texto_curador = self.ensure_text(self.extract_content(res_curador))
         
-        # Extraer últimos 5 mensajes de usuario para mostrar qué evaluó el Curador
-        mensajes_evaluados = self._get_recent_user_messages(n=5)
-        
         respuestas = [{
             "agente": "Curador", 
             "respuesta": texto_curador,
-            "mensajes_evaluados": mensajes_evaluados
+            "mensajes_evaluados": mensajes_ventana
         }]
         
-        if filter_agents(texto_curador, self.agentes): # Si decide que sigue el Orientador
-            res_ori = await self._call_agent(self.agenteOrientador)
+        if intervenir: # Si decide que sigue el Orientador
+            if res_ori is None:
+                res_ori = await self._call_agent(self.agenteOrientador)
             if not isinstance(res_ori, Msg):
                 res_ori = Msg(name=self.agenteOrientador.name, role="assistant", content=self.ensure_text(res_ori))
             await self._broadcast(res_ori)
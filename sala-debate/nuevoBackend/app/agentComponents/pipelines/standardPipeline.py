@@ -11,12 +11,14 @@ class StandardPipeline(BasePipeline):
     INACTIVITY_THRESHOLD_SECONDS = 180  # 3 minutos sin enviar mensaje
     INACTIVITY_MENTION_COOLDOWN_SECONDS = 300  # 5 minutos entre avisos del mismo usuario
     INACTIVITY_MIN_RELATIVE_PARTICIPATION = 0.25  # si menos del 25% de la sala está activa, avisar
+    AGENTES_SIMPLES = ("Validador",)
+    AGENTES_VEREDICTO = ("Validador",)
 
     def __init__(self, factory, prompt_validador, prompt_orientador):
         super().__init__(timeout=15)
         # Agentes específicos de este pipeline
-        self.agenteValidador = factory.create_agent("Validador", prompt_validador)
-        self.agenteOrientador = factory.create_agent("Orientador", prompt_orientador)
+        self.agenteValidador = self._crear_agente(factory, "Validador", prompt_validador)
+        self.agenteOrientador = self._crear_agente(factory, "Orientador", prompt_orientador)
         self.agentes = [self.agenteValidador, self.agenteOrientador]
 
         # métricas de actividad de los usuarios (para no invasivo y llamadas de atención)
@@ -41,9 +43,9 @@ class StandardPipeline(BasePipeline):
         # Lógica de bienvenida
         mensaje = Msg(name="Host", role="system", content="Sesión iniciada. Orientador, explica el objetivo.")
         await self._broadcast(mensaje)
-        res = await self._call_agent(self.agenteOrientador)
+        respuesta = await self._bienvenida(self.agenteOrientador, mensaje.content, usuarios_sala, idioma)
 
-        return [{"agente": "Orientador", "respuesta": self.ensure_text(self.extract_content(res))}]
+        return [{"agente": "Orientador", "respuesta": respuesta}]
 
     async def entrar_mensaje_a_la_sala(self, username: str, mensaje: str):
         nombre_limpio = sanitize_name(username)
@@ -72,9 +74,10 @@ class StandardPipeline(BasePipeline):
     async def evaluar_intervencion_en_cascada(self, mensaje: Msg):
         await self._broadcast(mensaje)
         # solicitar evaluación al Validador y difundir su mensaje para que quede en el historial
-        res_val = await self._call_agent(self.agenteValidador, mensaje)
-        if not isinstance(res_val, Msg):
-            res_val = Msg(name=self.agenteValidador.name, role="assistant", content=self.ensure_text(res_val))
+        textos = [m["mensaje"] for m in self._get_recent_user_messages(n=3)]
+        res_val, intervenir, res_ori = await self._evaluar_especulando(
+            self.agenteValidador, mensaje, self.agenteOrientador, textos
+        )
         await self._broadcast(res_val)
         texto_val = self.ensure_text(self.extract_content(res_val))
         
@@ -87,8 +90,9 @@ class StandardPipeline(BasePipeline):
             "mensajes_evaluados": mensajes_evaluados
         }]
         
-        if filter_agents(texto_val, self.agentes):
-            res_ori = await self._call_agent(self.agenteOrientador)
+        if intervenir:
+            if res_ori is None:
+                res_ori = await self._call_agent(self.agenteOrientador)
             if not isinstance(res_ori, Msg):
                 res_ori = Msg(name=self.agenteOrientador.name, role="assistant", content=self.ensure_text(res_ori))
             await self._broadcast(res_ori)
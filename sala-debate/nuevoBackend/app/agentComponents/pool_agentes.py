@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+from agentscope.model import ChatModelBase
+from .factory_agents import ReActAgentFactory
+from .niveles_modelo import NIVEL_DEFECTO, ModeloEnrutado
+
+logger = logging.getLogger("pool_agentes")
+
+# Juegos de modelos precalentados por (pipeline, versión de prompts); 0 desactiva el pool
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "2"))
+
+
+class FabricaPrecalentada(ReActAgentFactory):
+    """
+    Factory de una sesión: entrega a cada agente el modelo de su nivel tomado de un
+    juego precalentado; si no hay, el cliente se crea en la primera llamada
+    (ver ModeloEnrutado). Crear los agentes no construye clientes.
+    """
+
+    def __init__(self, base: ReActAgentFactory, modelos: dict[str, ChatModelBase] | None = None,
+                 rutas: dict[str, str] | None = None):
+        super().__init__(base.model_name, base.cassette_mode, base.cassette_path, base.cassette_latencia, rutas)
+        self.base = base
+        self._modelos = dict(modelos or {})
+        self.precalentada = bool(self._modelos)
+
+    def modelo_para_rol(self, name: str, primario=None):
+        primario = primario or self._modelos.pop(name, None)
+        return ModeloEnrutado(name, self.rutas.get(name, NIVEL_DEFECTO), self.base.crear_modelo, primario)
+
+
+class PoolModelos:
+    """
+    Pool de clientes de modelo ya construidos, no de agentes ni de pipelines: cada
+    juego trae un cliente por agente (del nivel de su ruta) y se guarda por tipo de
+    pipeline y versión de los prompts (las rutas comparten esa versión). Los agentes
+    y el pipeline se siguen creando por sesión, con esos clientes. `tomar` nunca
+    espera: si el pool está vacío entrega modelos perezosos. Después de cada `tomar`
+    el pool se rellena en segundo plano.
+    """
+
+    def __init__(self, tamaño: int = AGENT_POOL_SIZE, factory: ReActAgentFactory | None = None):
+        self.tamaño = tamaño
+        self.factory = factory or ReActAgentFactory()
+        self._juegos: dict[tuple[str, int], list[dict[str, ChatModelBase]]] = {}
+        self._rellenos: dict[tuple[str, int], asyncio.Task] = {}
+        self.entregas = {"precalentadas": 0, "perezosas": 0}
+
+    def tomar(self, pipeline_type: str, agentes: list[str], version: int,
+              rutas: dict[str, str] | None = None) -> FabricaPrecalentada:
+        rutas = rutas or {}
+        self._descartar_versiones(pipeline_type, version)
+        juegos = self._juegos.get((pipeline_type, version))
+        juego = juegos.pop() if juegos else None
+        self.entregas["precalentadas" if juego else "perezosas"] += 1
+        self.rellenar(pipeline_type, agentes, version, rutas)
+        return FabricaPrecalentada(self.factory, juego, rutas)
+
+    def rellenar(self, pipeline_type: str, agentes: list[str], version: int,
+                 rutas: dict[str, str] | None = None) -> None:
+        if self.tamaño <= 0 or not agentes:
+            return
+        clave = (pipeline_type, version)
+        tarea = self._rellenos.get(clave)
+        if tarea and not tarea.done():
+            return
+        niveles = {a: (rutas or {}).get(a, NIVEL_DEFECTO) for a in agentes}
+        self._rellenos[clave] = asyncio.create_task(self._rellenar(clave, niveles))
+
+    async def _rellenar(self, clave: tuple[str, int], niveles: dict[str, str]) -> None:
+        juegos = self._juegos.setdefault(clave, [])
+        while len(juegos) < self.tamaño:
+            try:
+                juego = {a: await asyncio.to_thread(self.factory.crear_modelo, n) for a, n in niveles.items()}
+            except Exception as e:
+                logger.error(f"[Pool] no se pudo precalentar {clave[0]}: {e}")
+                return
+            if self._juegos.get(clave) is not juegos:
+                return  # los prompts cambiaron mientras se construía
+            juegos.append(juego)
+
+    def _descartar_versiones(self, pipeline_type: str, version: int) -> None:
+        for clave in [c for c in self._juegos if c[0] == pipeline_type and c[1] != version]:
+            del self._juegos[clave]
+
+    def estado(self) -> dict:
+        return {
+            "tamaño": self.tamaño,
+            "disponibles": {f"{p}@v{v}": len(j) for (p, v), j in self._juegos.items()},
+            **self.entregas,
+        }
+
+
+# Uno por proceso, compartido por todas las salas
+pool_modelos = PoolModelos()
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from agentscope.message import Msg
+from .factory_agents import ReActAgentFactory
+from .utils.utilsForAgents import contar_tokens
+from app.models.models import get_tema_resumen, save_tema_resumen
+
+logger = logging.getLogger("tema_condensado")
+
+# TOPIC_CONDENSE=1 activa la condensación (opt-in: por defecto todos los agentes reciben el
+# caso completo)
+TOPIC_CONDENSE = os.getenv("TOPIC_CONDENSE", "0") == "1"
+# Casos más cortos que esto se usan tal cual: no vale la pena resumirlos
+UMBRAL_TOKENS = int(os.getenv("TOPIC_CONDENSE_MIN_TOKENS", "300"))
+
+PROMPT_CONDENSADOR = """
+Eres un asistente que resume casos de discusión ética para otros agentes (no para estudiantes).
+Reescribe el caso en un resumen compacto, en el mismo idioma del caso, que conserve:
+- los actores y su rol,
+- los hechos relevantes y el dilema central,
+- las opciones o posturas que se discuten.
+Omite ambientación, repeticiones y detalles que no cambian el dilema.
+Máximo 120 palabras, en texto plano, sin títulos ni viñetas. Responde solo con el resumen.
+"""
+
+
+def hash_tema(tema: str) -> str:
+    """sha256 del texto del tema con los espacios normalizados."""
+    return hashlib.sha256(" ".join(tema.split()).encode("utf-8")).hexdigest()
+
+
+class CondensadorTema:
+    """
+    Resumen compacto del caso, generado una sola vez por texto y guardado en
+    'tema_resumenes'. Memoria del proceso -> BD -> LLM; si varias salas piden el
+    mismo caso a la vez solo una llama al LLM. Devuelve None si el caso es corto,
+    si la condensación está desactivada o si falla (se usa el caso completo).
+    Al crear salas se usa `disponible`, que nunca espera al LLM.
+    """
+
+    def __init__(self, factory: ReActAgentFactory | None = None, umbral_tokens: int = UMBRAL_TOKENS,
+                 activo: bool = TOPIC_CONDENSE):
+        self.factory = factory
+        self.umbral_tokens = umbral_tokens
+        self.activo = activo
+        self._memo: dict[str, str] = {}
+        self._en_curso: dict[str, asyncio.Future] = {}
+        self._tareas: set[asyncio.Task] = set()
+
+    def _aplica(self, tema: str | None) -> bool:
+        return bool(self.activo and tema and contar_tokens(tema) >= self.umbral_tokens)
+
+    def disponible(self, tema: str | None) -> str | None:
+        """
+        Resumen ya condensado en este proceso, sin esperar. Si aún no existe, la
+        condensación se lanza en segundo plano y la sala usa el caso completo;
+        las siguientes salas con el mismo caso reciben el resumen.
+        """
+        if not self._aplica(tema):
+            return None
+        clave = hash_tema(tema)
+        if clave in self._memo:
+            return self._memo[clave]
+        if clave not in self._en_curso:
+            tarea = asyncio.create_task(self.condensar(tema))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+        return None
+
+    async def condensar(self, tema: str | None) -> str | None:
+        if not self._aplica(tema):
+            return None
+        clave = hash_tema(tema)
+        if clave in self._memo:
+            return self._memo[clave]
+        if clave in self._en_curso:
+            return await asyncio.shield(self._en_curso[clave])
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[clave] = futuro
+        resumen = None
+        try:
+            resumen = await self._obtener(clave, tema)
+        except Exception as e:
+            logger.error(f"[Condensador] no se pudo condensar el tema: {e}")
+        finally:
+            self._en_curso.pop(clave, None)
+            if resumen:
+                self._memo[clave] = resumen
+            futuro.set_result(resumen)
+        return resumen
+
+    async def _obtener(self, clave: str, tema: str) -> str | None:
+        guardado = await asyncio.to_thread(get_tema_resumen, clave)
+        if guardado:
+            return guardado["resumen"]
+
+        factory = self.factory or ReActAgentFactory()
+        agente = factory.create_agent("Condensador", PROMPT_CONDENSADOR)
+        res = await agente(Msg(name="Host", role="user", content=tema))
+        resumen = (res.get_text_content() if res else "") or ""
+        resumen = re.sub(r"\s+\n", "\n", resumen).strip()
+
+        tokens_original, tokens_resumen = contar_tokens(tema), contar_tokens(resumen)
+        if not resumen or tokens_resumen >= tokens_original:
+            logger.warning("[Condensador] el resumen no es más corto que el caso; se usa el caso completo")
+            return None
+        await asyncio.to_thread(
+            save_tema_resumen, clave, tema, resumen, tokens_original, tokens_resumen, factory.model_name
+        )
+        print(f"[✅ Tema condensado] {tokens_original} -> {tokens_resumen} tokens")
+        return resumen
+
+
+# Uno por proceso, compartido por todas las salas
+condensador = CondensadorTema()
+
+
+def preparar_prompts(prompts: dict, tema: str, tema_condensado: str | None = None,
+                     agentes_tema_completo=("Orientador",)) -> dict:
+    """Reemplaza {tema}: caso completo para `agentes_tema_completo`, condensado para el resto."""
+    return {
+        agente: prompt.replace(
+            "{tema}", tema if agente in agentes_tema_completo or not tema_condensado else tema_condensado
+        )
+        for agente, prompt in prompts.items()
+    }
+
+
+def reporte_tokens(prompts: dict, tema: str, tema_condensado: str | None,
+                   agentes_tema_completo=("Orientador",)) -> dict:
+    """
+    Tokens de prompt ahorrados por llamada de cada agente: el {tema} del sys_prompt
+    (si le toca el condensado) y el TEMA CENTRAL del anuncio del hub (todos lo reciben).
+    """
+    if not tema_condensado:
+        return {"condensado": False, "por_agente": {}, "total_por_ronda": 0}
+    diferencia = contar_tokens(tema) - contar_tokens(tema_condensado)
+    por_agente = {}
+    for agente, prompt in prompts.items():
+        en_prompt = 0 if agente in agentes_tema_completo else prompt.count("{tema}") * diferencia
+        por_agente[agente] = en_prompt + diferencia
+    return {
+        "condensado": True,
+        "tokens_tema": contar_tokens(tema),
+        "tokens_tema_condensado": contar_tokens(tema_condensado),
+        "por_agente": por_agente,
+        "total_por_ronda": sum(por_agente.values()),
+    }
@@ -80,7 +80,29 @@ def safe_parse_json(text: str, model_class=None):
         return data
     except Exception:
         return None
-    
+
+
+_encoding_tokens = None
+
+
+def contar_tokens(texto: str) -> int:
+    """
+    Cuenta tokens con tiktoken (o200k_base, la de gpt-4o-mini).
+    Si tiktoken o su codificación no están disponibles, aproxima con ~4 caracteres por token.
+    """
+    global _encoding_tokens
+    if not texto:
+        return 0
+    if _encoding_tokens is None:
+        try:
+            import tiktoken
+            _encoding_tokens = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding_tokens = False
+    if _encoding_tokens:
+        return len(_encoding_tokens.encode(texto))
+    return max(1, len(texto) // 4)
+
 
 def formato_tiempo(segundos: int) -> str:
         minutos = segundos // 60
@@ -0,0 +1,65 @@
+import logging
+import os
+from collections import defaultdict
+from enum import Enum
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger("veredictos")
+
+# STRUCTURED_VERDICTS=1 pide a los clasificadores un Veredicto estructurado (opt-in: agrega
+# INSTRUCCION_VEREDICTO a sus prompts); sin él, texto libre con @Orientador (filter_agents)
+STRUCTURED_VERDICTS = os.getenv("STRUCTURED_VERDICTS", "0") == "1"
+
+
+class MotivoVeredicto(str, Enum):
+    SUSTENTADO = "sustentado"
+    SIN_EVIDENCIA = "sin_evidencia"
+    SIN_GARANTIA = "sin_garantia"
+    FALACIA = "falacia"
+    FUERA_DE_TEMA = "fuera_de_tema"
+    PARTICIPACION_DESIGUAL = "participacion_desigual"
+    ESTANCADO = "estancado"
+    OTRO = "otro"
+
+
+class Veredicto(BaseModel):
+    """Salida de los clasificadores (Validador/Curador): decide si interviene el Orientador."""
+    intervenir: bool = Field(description="true si el Orientador debe intervenir ahora")
+    motivo: MotivoVeredicto = Field(description="Código del motivo principal")
+    nota: str = Field(description="Una frase breve (máximo 20 palabras) para el registro")
+
+
+# Se agrega al prompt de los clasificadores: los prompts de la BD piden mencionar a @Orientador
+INSTRUCCION_VEREDICTO = (
+    "\n\nResponde solo con el veredicto estructurado: intervenir=true cuando corresponda "
+    "mencionar a @Orientador, el código de motivo y una nota breve."
+)
+
+# Veredictos válidos y fallos de validación por agente, desde que arrancó el proceso
+metricas_veredictos = {"validos": defaultdict(int), "fallos": defaultdict(int)}
+
+
+def parsear_veredicto(respuesta, agente: str, modelo: type[BaseModel] = Veredicto):
+    """
+    Valida la salida estructurada (metadata del Msg, del `structured_model`) con el
+    modelo Pydantic. Sin reintentos ni lectura del texto libre: lo que no valida,
+    incluido un JSON escrito en el contenido, cuenta como fallo y devuelve None.
+    """
+    try:
+        veredicto = modelo.model_validate(getattr(respuesta, "metadata", None) or None)
+    except ValidationError as e:
+        metricas_veredictos["fallos"][agente] += 1
+        logger.warning(f"[Veredicto] {agente} devolvió una salida inválida: {e.error_count()} errores")
+        return None
+    metricas_veredictos["validos"][agente] += 1
+    return veredicto
+
+
+def texto_veredicto(veredicto: Veredicto) -> str:
+    """Texto del veredicto para el hub, la UI y el log (conserva la mención al Orientador)."""
+    texto = f"[{veredicto.motivo.value}] {veredicto.nota}".strip()
+    return f"{texto} @Orientador" if veredicto.intervenir else texto
+
+
+def estado_veredictos() -> dict:
+    return {clave: dict(por_agente) for clave, por_agente in metricas_veredictos.items()}
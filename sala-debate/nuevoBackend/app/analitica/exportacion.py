@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from app.models.models import EXPORT_TABLES, stream_rows_for_export
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dependencia opcional: solo la necesita la exportación
+    pa = pq = None
+
+logger = logging.getLogger("exportacion")
+
+DESTINO_DEFECTO = "./exports"
+
+
+def _esquemas() -> dict:
+    """Esquemas tipados por tabla. Las columnas de baja cardinalidad van como diccionario."""
+    ts_utc = pa.timestamp("us", tz="UTC")
+    categoria = pa.dictionary(pa.int16(), pa.string())
+    return {
+        "room_sessions": pa.schema([
+            ("id", pa.string()),
+            ("room_name", categoria),
+            ("topic", pa.string()),
+            ("status", categoria),
+            ("pipeline_type", categoria),
+            ("created_at", ts_utc),
+            ("closed_at", ts_utc),
+        ]),
+        "messages": pa.schema([
+            ("id", pa.int32()),
+            ("room_session_id", categoria),
+            ("user_id", categoria),
+            ("agent_name", categoria),
+            ("sender_type", categoria),
+            ("content", pa.string()),
+            ("parent_message_id", pa.int32()),
+            ("used_message_ids", pa.list_(pa.int32())),
+            ("created_at", ts_utc),
+        ]),
+        "agent_prompts": pa.schema([
+            ("id", pa.int32()),
+            ("agent_name", categoria),
+            ("prompt", pa.string()),
+            ("system_type", categoria),
+            # agent_prompts.created_at no tiene zona horaria en la BD
+            ("created_at", pa.timestamp("us")),
+        ]),
+    }
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise RuntimeError("La exportación requiere pyarrow (pip install pyarrow)")
+
+
+def _dir_dia(destino: str, tabla: str, dia: str) -> str:
+    return os.path.join(destino, tabla, f"day={dia}")
+
+
+def dias_exportados(destino: str, tabla: str) -> list[str]:
+    """Días (YYYY-MM-DD) con partición completa escrita para la tabla."""
+    base = os.path.join(destino, tabla)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        nombre[4:] for nombre in os.listdir(base)
+        if nombre.startswith("day=") and os.path.exists(os.path.join(base, nombre, "part-0.parquet"))
+    )
+
+
+class _EscritorParticiones:
+    """Un ParquetWriter abierto por día; cada partición se publica con os.replace al cerrarla."""
+
+    def __init__(self, destino: str, tabla: str, esquema):
+        self.destino = destino
+        self.tabla = tabla
+        self.esquema = esquema
+        self._dia = None
+        self._writer = None
+        self._tmp = None
+        self.filas_por_dia: dict[str, int] = {}
+
+    def escribir(self, dia: str, filas: list[dict]):
+        if dia != self._dia:
+            self.cerrar()
+            carpeta = _dir_dia(self.destino, self.tabla, dia)
+            os.makedirs(carpeta, exist_ok=True)
+            self._tmp = os.path.join(carpeta, "part-0.parquet.tmp")
+            self._writer = pq.ParquetWriter(self._tmp, self.esquema, compression="zstd")
+            self._dia = dia
+            self.filas_por_dia[dia] = 0
+        self._writer.write_table(pa.Table.from_pylist(filas, schema=self.esquema))
+        self.filas_por_dia[dia] += len(filas)
+
+    def cerrar(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(self._tmp, os.path.join(os.path.dirname(self._tmp), "part-0.parquet"))
+        self._writer = self._tmp = self._dia = None
+
+
+def exportar_tabla(tabla: str, destino: str = DESTINO_DEFECTO, desde: str | None = None,
+                   hasta: str | None = None, completo: bool = False, chunk_size: int = 5000) -> dict:
+    """
+    Exporta una tabla a <destino>/<tabla>/day=YYYY-MM-DD/part-0.parquet.
+    Incremental: sin `completo`, parte desde el último día exportado (inclusive,
+    porque pudo quedar a medias) y no vuelve a leer los anteriores.
+    `hasta` es exclusivo.
+    """
+    _requerir_pyarrow()
+    esquema = _esquemas()[tabla]
+    if not completo:
+        previos = dias_exportados(destino, tabla)
+        if previos and (desde is None or previos[-1] > desde):
+            desde = previos[-1]
+
+    escritor = _EscritorParticiones(destino, tabla, esquema)
+    columnas = esquema.names
+    try:
+        for bloque in stream_rows_for_export(tabla, desde, hasta, chunk_size):
+            # un bloque puede cruzar la medianoche: se separa por día
+            por_dia: dict[str, list[dict]] = {}
+            for fila in bloque:
+                por_dia.setdefault(fila["day"].isoformat(), []).append({c: fila[c] for c in columnas})
+            for dia, filas in por_dia.items():
+                escritor.escribir(dia, filas)
+    finally:
+        escritor.cerrar()
+
+    return {
+        "tabla": tabla,
+        "desde": desde,
+        "hasta": hasta,
+        "filas": sum(escritor.filas_por_dia.values()),
+        "dias": escritor.filas_por_dia,
+    }
+
+
+def exportar(destino: str = DESTINO_DEFECTO, desde: str | None = None, hasta: str | None = None,
+             tablas: list[str] | None = None, completo: bool = False) -> list[dict]:
+    """Exporta varias tablas (por defecto todas las de EXPORT_TABLES)."""
+    for valor in (desde, hasta):
+        if valor:
+            datetime.strptime(valor, "%Y-%m-%d")
+    resultados = []
+    for tabla in tablas or list(EXPORT_TABLES):
+        if tabla not in EXPORT_TABLES:
+            raise ValueError(f"Tabla no exportable: {tabla}")
+        r = exportar_tabla(tabla, destino, desde, hasta, completo)
+        print(f"[✅ Export] {tabla}: {r['filas']} filas en {len(r['dias'])} días")
+        resultados.append(r)
+    return resultados
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta sesiones y mensajes a Parquet particionado por día.")
+    parser.add_argument("--desde", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--hasta", help="YYYY-MM-DD (exclusivo); por defecto mañana")
+    parser.add_argument("--destino", default=DESTINO_DEFECTO)
+    parser.add_argument("--tablas", nargs="*", choices=list(EXPORT_TABLES))
+    parser.add_argument("--completo", action="store_true", help="Reexporta todo el rango, ignorando lo ya exportado")
+    args = parser.parse_args(argv)
+
+    hasta = args.hasta or (date.today() + timedelta(days=1)).isoformat()
+    resultados = exportar(args.destino, args.desde, hasta, args.tablas, args.completo)
+    print(json.dumps(resultados, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,175 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from app.models.models import stream_rows_for_export
+
+COLUMNAS = ["id", "room_session_id", "user_id", "agent_name", "sender_type", "content", "created_at"]
+
+
+def cargar_mensajes_db(desde: str | None = None, hasta: str | None = None,
+                       session_ids: list[str] | None = None) -> pd.DataFrame:
+    """Mensajes de la tabla messages (en bloques, con cursor del servidor)."""
+    bloques = [
+        pd.DataFrame(filas, columns=COLUMNAS)
+        for filas in stream_rows_for_export("messages", desde, hasta, session_ids=session_ids)
+    ]
+    if not bloques:
+        return pd.DataFrame(columns=COLUMNAS)
+    df = pd.concat(bloques, ignore_index=True)
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    return df
+
+
+def cargar_mensajes_parquet(directorio: str = "./exports", desde: str | None = None,
+                            hasta: str | None = None) -> pd.DataFrame:
+    """Mensajes desde la exportación particionada por día (ver app.analitica.exportacion)."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        os.path.join(directorio, "messages"), format="parquet",
+        partitioning=ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive"),
+    )
+    filtro = None
+    if desde:
+        filtro = ds.field("day") >= desde
+    if hasta:
+        filtro = (ds.field("day") < hasta) if filtro is None else filtro & (ds.field("day") < hasta)
+    return dataset.to_table(columns=COLUMNAS, filter=filtro).to_pandas()
+
+
+def _gini(conteos: pd.DataFrame) -> pd.Series:
+    """Gini de la cantidad de mensajes por participante, para todas las sesiones a la vez."""
+    c = conteos.sort_values(["sesion", "n"], kind="stable")
+    rango = c.groupby("sesion").cumcount().to_numpy() + 1
+    g = c.assign(ix=rango * c["n"].to_numpy()).groupby("sesion").agg(
+        k=("n", "size"), total=("n", "sum"), ix=("ix", "sum")
+    )
+    return 2 * g["ix"] / (g["k"] * g["total"]) - (g["k"] + 1) / g["k"]
+
+
+def _entropia_normalizada(turnos: pd.DataFrame) -> pd.Series:
+    """Entropía de Shannon del reparto de turnos entre participantes, normalizada a [0, 1]."""
+    total = turnos.groupby("sesion")["n"].transform("sum")
+    p = turnos["n"] / total
+    h = (-p * np.log2(p)).groupby(turnos["sesion"]).sum()
+    k = turnos.groupby("sesion").size()
+    return (h / np.log2(k.where(k > 1))).fillna(0.0)
+
+
+def calcular_metricas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Métricas de dinámica conversacional por sesión (una fila por room_session_id):
+      - gini_participacion: desigualdad de mensajes entre estudiantes (0 = equilibrio).
+      - entropia_turnos: reparto de turnos (rachas de un mismo autor), 1 = alternancia pareja.
+      - gap_mediana_s / gap_p90_s: segundos entre mensajes consecutivos de estudiantes.
+      - rafagas / latencia_intervencion_*: una ráfaga es una racha de mensajes de estudiantes
+        sin agentes en medio; la latencia va del último mensaje de la ráfaga al agente que la sigue.
+      - palabras_por_mensaje: promedio en mensajes de estudiantes.
+    Todo se calcula con operaciones vectorizadas sobre el DataFrame completo.
+    """
+    df = pd.DataFrame({
+        "sesion": df["room_session_id"].astype(str).to_numpy(),
+        "usuario": df["user_id"].astype(object).to_numpy(),
+        "es_usuario": (df["sender_type"].astype(str) == "user").to_numpy(),
+        "contenido": df["content"].astype(str).to_numpy(),
+        "t": pd.to_datetime(df["created_at"], utc=True).dt.tz_localize(None).to_numpy(),
+        "id": df["id"].to_numpy(),
+    }).sort_values(["sesion", "t", "id"], kind="stable", ignore_index=True)
+    sesiones = pd.Index(df["sesion"].unique(), name="room_session_id")
+    if df.empty:
+        return pd.DataFrame(index=sesiones)
+
+    segundos = df["t"].to_numpy().astype("datetime64[us]").astype(np.int64) / 1e6
+    sesion = df["sesion"].to_numpy()
+    es_usuario = df["es_usuario"].to_numpy()
+    misma_prev = np.r_[False, sesion[1:] == sesion[:-1]]
+    misma_sig = np.r_[sesion[:-1] == sesion[1:], False]
+
+    u = df[es_usuario]
+    seg_u = segundos[es_usuario]
+    sesion_u = u["sesion"].to_numpy()
+    usuario_u = u["usuario"].to_numpy()
+    # banderas del tamaño de `u` (puede estar vacío: sesiones con solo mensajes de agentes)
+    misma_prev_u = np.zeros(len(u), dtype=bool)
+    misma_prev_u[1:] = sesion_u[1:] == sesion_u[:-1]
+
+    conteos = u.groupby(["sesion", "usuario"]).size().rename("n").reset_index()
+
+    cambio_usuario = np.ones(len(u), dtype=bool)
+    cambio_usuario[1:] = usuario_u[1:] != usuario_u[:-1]
+    cambio_autor = ~misma_prev_u | cambio_usuario
+    turnos = u[cambio_autor].groupby(["sesion", "usuario"]).size().rename("n").reset_index()
+
+    gaps = pd.Series(np.where(misma_prev_u, np.diff(seg_u, prepend=np.nan), np.nan), index=u.index)
+    gaps_sesion = gaps.groupby(u["sesion"])
+
+    # fin de ráfaga: mensaje de estudiante seguido por un agente o por el fin de la sesión
+    agente_sig = np.r_[~es_usuario[1:], False] & misma_sig
+    fin_rafaga = es_usuario & (~misma_sig | agente_sig)
+    respuesta = ~es_usuario & misma_prev & np.r_[False, es_usuario[:-1]]
+    latencias = pd.Series(segundos - np.r_[np.nan, segundos[:-1]], index=df.index)[respuesta]
+    latencias_sesion = latencias.groupby(df.loc[respuesta, "sesion"])
+
+    palabras = u["contenido"].str.count(r"\S+")
+
+    metricas = pd.DataFrame({
+        "mensajes_usuario": u.groupby("sesion").size(),
+        "mensajes_agente": df[~es_usuario].groupby("sesion").size(),
+        "participantes": conteos.groupby("sesion").size(),
+        "gini_participacion": _gini(conteos),
+        "turnos": turnos.groupby("sesion")["n"].sum(),
+        "entropia_turnos": _entropia_normalizada(turnos),
+        "gap_mediana_s": gaps_sesion.median(),
+        "gap_p90_s": gaps_sesion.quantile(0.9),
+        "rafagas": pd.Series(fin_rafaga).groupby(sesion).sum(),
+        "rafagas_con_intervencion": latencias_sesion.size(),
+        "latencia_intervencion_mediana_s": latencias_sesion.median(),
+        "latencia_intervencion_media_s": latencias_sesion.mean(),
+        "palabras_por_mensaje": palabras.groupby(u["sesion"]).mean(),
+    }).reindex(sesiones)
+
+    enteras = ["mensajes_usuario", "mensajes_agente", "participantes", "turnos", "rafagas",
+               "rafagas_con_intervencion"]
+    metricas[enteras] = metricas[enteras].fillna(0).astype(int)
+    return metricas.round(4)
+
+
+def a_registros(metricas: pd.DataFrame) -> list[dict]:
+    """Filas como dicts serializables (NaN -> None)."""
+    limpio = metricas.reset_index().astype(object)
+    return limpio.where(limpio.notna(), None).to_dict(orient="records")
+
+
+def metricas_sesion(session_id: str) -> dict | None:
+    registros = a_registros(calcular_metricas(cargar_mensajes_db(session_ids=[session_id])))
+    return registros[0] if registros else None
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Métricas de dinámica conversacional por sesión.")
+    parser.add_argument("--desde", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--hasta", help="YYYY-MM-DD (exclusivo)")
+    parser.add_argument("--parquet", help="Directorio de exportación; por defecto se lee la BD")
+    parser.add_argument("--salida", help="Archivo .csv o .parquet; por defecto se imprime")
+    args = parser.parse_args(argv)
+
+    if args.parquet:
+        df = cargar_mensajes_parquet(args.parquet, args.desde, args.hasta)
+    else:
+        df = cargar_mensajes_db(args.desde, args.hasta)
+    metricas = calcular_metricas(df)
+
+    if not args.salida:
+        with pd.option_context("display.max_columns", None, "display.width", 200):
+            print(metricas)
+    elif args.salida.endswith(".parquet"):
+        metricas.to_parquet(args.salida)
+    else:
+        metricas.to_csv(args.salida)
+    print(f"[✅ Métricas] {len(metricas)} sesiones")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+from app.agentComponents.estado_toulmin import TOULMIN_STATE
+from app.agentComponents.pipelines.base_pipeline import texto_anuncio
+from app.agentComponents.registry import INTERMEDIARIO_MAP
+from app.agentComponents.tema_condensado import hash_tema, preparar_prompts
+from app.agentComponents.utils.utilsForAgents import contar_tokens
+from app.models.models import (
+    get_multiagent_config,
+    get_prompt_versions,
+    get_prompts_by_system,
+    get_tema_resumen,
+    get_temas,
+)
+
+# Tokens máximos del contexto de una llamada (prompt + anuncio + ventana)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+# Fracción del prompt en líneas repetidas a partir de la cual se avisa
+UMBRAL_BOILERPLATE = 0.35
+# Aumento de esa fracción respecto a la versión anterior del prompt que se avisa
+UMBRAL_CRECIMIENTO_BOILERPLATE = 0.05
+# Líneas más cortas no cuentan como boilerplate ("Responde en español.", viñetas sueltas)
+LARGO_MINIMO_LINEA = 25
+
+# Cómo ve cada agente la conversación (ver los pipelines):
+#   "hub": participa del MsgHub, recibe el anuncio y todos los mensajes de la ventana
+#   "directo": fuera del hub, se le pasa cada mensaje de usuario por separado
+#   "ventana": fuera del hub, recibe solo la ventana (y el estado Toulmin compacto)
+CONTEXTO_AGENTES = {
+    "standard": {"Validador": "hub", "Orientador": "hub"},
+    "abogado-del-diablo": {"Validador": "hub", "Orientador": "hub"},
+    "toulmin": {"Validador": "directo", "Curador": "ventana" if TOULMIN_STATE else "hub", "Orientador": "hub"},
+}
+
+PARTICIPANTES_EJEMPLO = ["estudiante_1", "estudiante_2", "estudiante_3", "estudiante_4"]
+MENSAJE_EJEMPLO = (
+    "Creo que Sebastián debería informar el error, porque si no lo hace está aprovechándose "
+    "de una falla que perjudica a sus compañeros, aunque entiendo que tenga miedo a las consecuencias."
+)
+
+
+def _lineas(texto: str) -> list[str]:
+    normalizadas = (" ".join(l.split()).lower() for l in texto.splitlines())
+    return [l for l in normalizadas if len(l) >= LARGO_MINIMO_LINEA]
+
+
+def fraccion_boilerplate(prompt: str, otros: list[str]) -> float:
+    """
+    Fracción de tokens del prompt en líneas repetidas: líneas que aparecen en el
+    prompt de otro agente o más de una vez en el mismo prompt.
+    """
+    total = contar_tokens(prompt)
+    if not total:
+        return 0.0
+    ajenas = {l for otro in otros for l in _lineas(otro)}
+    vistas: set[str] = set()
+    repetidos = 0
+    for linea in _lineas(prompt):
+        if linea in ajenas or linea in vistas:
+            repetidos += contar_tokens(linea)
+        vistas.add(linea)
+    return round(min(1.0, repetidos / total), 4)
+
+
+def texto_ventana(n_mensajes: int, mensaje: str = MENSAJE_EJEMPLO) -> str:
+    """Ventana de `n_mensajes` mensajes de usuario como la ven los agentes."""
+    return "\n".join(
+        f"{PARTICIPANTES_EJEMPLO[i % len(PARTICIPANTES_EJEMPLO)]}: {mensaje}" for i in range(n_mensajes)
+    )
+
+
+def tema_ejemplo(tema_id: int | None = None) -> str:
+    """Texto de un tema de la BD (por id o el más reciente)."""
+    temas = get_temas()
+    if tema_id is not None:
+        temas = [t for t in temas if t["id"] == tema_id]
+        if not temas:
+            raise ValueError(f"Tema no encontrado: {tema_id}")
+    if not temas:
+        raise ValueError("No hay temas en la BD; indica un tema de ejemplo")
+    return temas[0]["tema_text"]
+
+
+def analizar_pipeline(pipeline_type: str, tema: str, ventana: int, presupuesto: int = PROMPT_TOKEN_BUDGET,
+                      todos_los_prompts: list[str] | None = None, idioma: str = "español") -> dict:
+    """Contexto efectivo de cada agente del pipeline para una llamada y alertas."""
+    prompts = get_prompts_by_system(pipeline_type)
+    intermediario = INTERMEDIARIO_MAP.get(pipeline_type)
+    completos = intermediario.AGENTES_TEMA_COMPLETO if intermediario else ("Orientador",)
+    # mismo reparto que create_session: condensado solo si ya existe (el análisis no llama al LLM)
+    resumen = get_tema_resumen(hash_tema(tema))
+    tema_condensado = resumen["resumen"] if resumen else None
+    preparados = preparar_prompts(prompts, tema, tema_condensado, completos)
+
+    participantes = "\n".join(f"- {u}" for u in PARTICIPANTES_EJEMPLO)
+    tokens_anuncio = contar_tokens(texto_anuncio(tema_condensado or tema, idioma, participantes))
+    tokens_ventana = contar_tokens(texto_ventana(ventana))
+    tokens_mensaje = contar_tokens(texto_ventana(1))
+    todos_los_prompts = todos_los_prompts if todos_los_prompts is not None else list(prompts.values())
+
+    agentes = {}
+    for agente, prompt in prompts.items():
+        modo = CONTEXTO_AGENTES.get(pipeline_type, {}).get(agente, "hub")
+        tokens_sys = contar_tokens(preparados[agente])
+        contexto = tokens_sys + {
+            "hub": tokens_anuncio + tokens_ventana, "ventana": tokens_ventana,
+        }.get(modo, tokens_mensaje)
+        otros = list(todos_los_prompts)
+        if prompt in otros:
+            otros.remove(prompt)  # el propio prompt no cuenta como repetición
+        boilerplate = fraccion_boilerplate(prompt, otros)
+
+        versiones = get_prompt_versions(pipeline_type, agente, limit=2)
+        anterior = versiones[1] if len(versiones) > 1 else None
+        boilerplate_anterior = fraccion_boilerplate(anterior, otros) if anterior else None
+
+        alertas = []
+        if contexto > presupuesto:
+            alertas.append(f"contexto de {contexto} tokens supera el presupuesto de {presupuesto}")
+        if boilerplate >= UMBRAL_BOILERPLATE:
+            alertas.append(f"{boilerplate:.0%} del prompt son líneas repetidas")
+        if boilerplate_anterior is not None and boilerplate - boilerplate_anterior >= UMBRAL_CRECIMIENTO_BOILERPLATE:
+            alertas.append(f"las líneas repetidas subieron de {boilerplate_anterior:.0%} a {boilerplate:.0%}")
+
+        agentes[agente] = {
+            "modo": modo,
+            "tema": "completo" if agente in completos or not tema_condensado else "condensado",
+            "tokens_prompt": contar_tokens(prompt),
+            "tokens_prompt_anterior": contar_tokens(anterior) if anterior else None,
+            "tokens_sys_prompt": tokens_sys,
+            "tokens_anuncio": tokens_anuncio if modo == "hub" else 0,
+            "tokens_ventana": tokens_mensaje if modo == "directo" else tokens_ventana,
+            "tokens_contexto": contexto,
+            "boilerplate": boilerplate,
+            "boilerplate_anterior": boilerplate_anterior,
+            "alertas": alertas,
+        }
+    return {"pipeline": pipeline_type, "tema_condensado": bool(tema_condensado), "agentes": agentes}
+
+
+def analizar(pipelines: list[str] | None = None, tema: str | None = None, tema_id: int | None = None,
+             presupuesto: int = PROMPT_TOKEN_BUDGET, ventana: int | None = None) -> dict:
+    """
+    Analiza los prompts vigentes de cada pipeline con un tema de ejemplo.
+    Cuenta los tokens localmente (tiktoken o aproximación); no llama al LLM.
+    """
+    tema = tema or tema_ejemplo(tema_id)
+    if ventana is None:
+        config = get_multiagent_config()
+        ventana = config.ventana_mensajes if config else 5
+    pipelines = pipelines or list(CONTEXTO_AGENTES)
+    # el boilerplate se compara contra los prompts de todos los pipelines
+    todos = [p for tipo in CONTEXTO_AGENTES for p in get_prompts_by_system(tipo).values()]
+
+    resultados = [analizar_pipeline(p, tema, ventana, presupuesto, todos) for p in pipelines]
+    return {
+        "presupuesto": presupuesto,
+        "ventana_mensajes": ventana,
+        "tokens_tema": contar_tokens(tema),
+        "pipelines": resultados,
+        "alertas": sum(len(a["alertas"]) for r in resultados for a in r["agentes"].values()),
+    }
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tokens del contexto de cada agente.")
+    parser.add_argument("--pipelines", nargs="*", choices=list(CONTEXTO_AGENTES))
+    parser.add_argument("--tema", help="Texto del tema de ejemplo; por defecto el más reciente de la BD")
+    parser.add_argument("--tema-id", type=int)
+    parser.add_argument("--presupuesto", type=int, default=PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--ventana", type=int, help="Mensajes por ventana; por defecto la configuración actual")
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado completo en JSON")
+    args = parser.parse_args(argv)
+
+    reporte = analizar(args.pipelines, args.tema, args.tema_id, args.presupuesto, args.ventana)
+    if args.json:
+        print(json.dumps(reporte, ensure_ascii=False, indent=2))
+    else:
+        for r in reporte["pipelines"]:
+            for agente, a in r["agentes"].items():
+                marca = "⚠️ " if a["alertas"] else "  "
+                print(f"{marca}{r['pipeline']:<20} {agente:<12} contexto={a['tokens_contexto']:>6} "
+                      f"prompt={a['tokens_prompt']:>5} boilerplate={a['boilerplate']:.0%}")
+                for alerta in a["alertas"]:
+                    print(f"      - {alerta}")
+    print(f"[{'⚠️' if reporte['alertas'] else '✅'} Prompts] {reporte['alertas']} alertas "
+          f"(presupuesto {reporte['presupuesto']} tokens)")
+    return 1 if reporte["alertas"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from agentscope.message import Msg
+from app.agentComponents.factory_agents import ReActAgentFactory
+from app.agentComponents.utils.utilsForAgents import contar_tokens, safe_parse_json
+
+logger = logging.getLogger("revision")
+
+DIRECTORIO_REVISIONES = os.path.join("logs", "revisiones")
+PRESUPUESTO_TOKENS = 6000
+MAX_CARACTERES_MENSAJE = 600
+
+# Los logs guardan el nombre de la clase del pipeline; los prompts se guardan por tipo
+_TIPO_PIPELINE = {
+    "StandardPipeline": "standard",
+    "QualityPipeline": "toulmin",
+    "AbogadoPipeline": "abogado-del-diablo",
+    "NoIaPipeline": "No_IA",
+}
+
+PROMPT_REVISOR = """
+Eres un agente llamado **Revisor**, experto en el análisis de performance de sistemas multiagente.
+Tu tarea es evaluar el desempeño que tuvo cada agente según su rol.
+
+Contexto:
+- Este sistema multiagente se utiliza en una sala de chat donde estudiantes debaten temas éticos.
+- El objetivo de la sesión es fomentar argumentación clara, colaborativa y bien estructurada.
+- Los agentes (Validador, Puntuador, Curador, Orientador y otros según el pipeline) guían y evalúan el debate.
+
+Analiza:
+1. Si cada agente cumplió su propósito descrito en su prompt.
+2. Cómo fue su comportamiento real (según el registro de mensajes).
+3. Si hubo redundancias, errores o intervenciones inadecuadas.
+4. Qué podrías mejorar en la coordinación del sistema multiagente.
+
+Responde SOLO con un JSON con esta forma:
+{
+  "agentes": {
+    "<NombreAgente>": {
+      "cumple_rol": true | false,
+      "puntaje": 1-5,
+      "hallazgos": ["frase corta", ...]
+    }
+  },
+  "observaciones_generales": "texto",
+  "sugerencias": ["frase corta", ...]
+}
+"""
+
+
+def _es_agente(m: dict) -> bool:
+    if "agent" in m:
+        return bool(m["agent"])
+    if "sender_type" in m:
+        return m["sender_type"] == "agent"
+    return str(m.get("rol", "")).lower() != "user"
+
+
+_PATRON_MEMORIA = re.compile(
+    r"Timestamp: (?P<timestamp>.*)\nRol: (?P<rol>.*)\nAutor: (?P<autor>.*)\nContenido:\n(?P<contenido>.*)", re.DOTALL
+)
+_QUIEN_POR_ROL = {"user": "estudiante", "assistant": "agente", "system": "sistema"}
+
+
+def _mensajes_desde_memorias(mensajes: list[dict]) -> list[dict]:
+    """
+    Logs antiguos: solo traen el volcado de la memoria de cada agente, donde los
+    mensajes compartidos se repiten una vez por agente. Se deduplican y ordenan.
+    """
+    vistos, resultado = set(), []
+    for m in mensajes:
+        encontrado = _PATRON_MEMORIA.search(str(m.get("contenido") or ""))
+        if not encontrado:
+            continue
+        e = encontrado.groupdict()
+        clave = (e["timestamp"], e["autor"], e["contenido"].strip())
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        resultado.append({"timestamp": e["timestamp"], "autor": e["autor"],
+                          "quien": _QUIEN_POR_ROL.get(e["rol"].strip(), "agente"), "contenido": e["contenido"]})
+    return sorted(resultado, key=lambda m: m["timestamp"])
+
+
+def lineas_log(registro: dict) -> list[str]:
+    """
+    Una línea compacta por mensaje. Los volcados de memoria de los agentes solo se
+    usan si el log no trae los mensajes de la sala (logs antiguos).
+    """
+    mensajes = [m for m in registro.get("mensajes", []) if m.get("tipo") != "memoria_agente"]
+    if mensajes:
+        mensajes = [{**m, "quien": "agente" if _es_agente(m) else "estudiante"} for m in mensajes]
+    else:
+        mensajes = _mensajes_desde_memorias(registro.get("mensajes", []))
+
+    lineas = []
+    for m in mensajes:
+        contenido = re.sub(r"\s+", " ", str(m.get("contenido") or "")).strip()
+        if not contenido:
+            continue
+        if len(contenido) > MAX_CARACTERES_MENSAJE:
+            contenido = contenido[:MAX_CARACTERES_MENSAJE] + "…"
+        hora = str(m.get("timestamp") or "")[11:19]
+        lineas.append(f"[{hora}] {m.get('autor') or '?'} ({m['quien']}): {contenido}")
+    return lineas
+
+
+def recortar_log(lineas: list[str], presupuesto: int = PRESUPUESTO_TOKENS) -> tuple[str, int]:
+    """
+    Ajusta el log al presupuesto de tokens conservando el inicio (un tercio)
+    y el final de la sesión. Retorna (texto, mensajes omitidos).
+    """
+    costos = [contar_tokens(l) for l in lineas]
+    if sum(costos) <= presupuesto:
+        return "\n".join(lineas), 0
+
+    usado, n_inicio = 0, 0
+    for c in costos:
+        if usado + c > presupuesto // 3:
+            break
+        usado += c
+        n_inicio += 1
+    desde_final = len(lineas)
+    while desde_final > n_inicio and usado + costos[desde_final - 1] <= presupuesto:
+        desde_final -= 1
+        usado += costos[desde_final]
+
+    omitidos = desde_final - n_inicio
+    recortado = lineas[:n_inicio] + [f"… ({omitidos} mensajes omitidos) …"] + lineas[desde_final:]
+    return "\n".join(recortado), omitidos
+
+
+def clave_revision(texto_log: str, prompts_agentes: dict, model_name: str) -> str:
+    """Hash del log recortado y de todo lo que cambia la respuesta del Revisor."""
+    crudo = json.dumps(
+        {"log": texto_log, "prompts": prompts_agentes, "revisor": PROMPT_REVISOR, "modelo": model_name},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+
+# --- Selección de sesiones ---
+def sesiones_desde_catalogo(directorio_logs: str = "./logs", **filtros) -> list[dict]:
+    """filtros: los de LogCatalog.buscar (sala, pipeline, tema, desde, hasta, min_mensajes, limite)."""
+    from app.utils.log_catalog import LogCatalog
+
+    return [
+        {"origen": entrada.origen, "sala": registro.get("sala") or entrada.sala,
+         "pipeline": _TIPO_PIPELINE.get(registro.get("pipeline"), registro.get("pipeline")),
+         "caso": registro.get("caso") or registro.get("tema"), "mensajes": registro.get("mensajes", [])}
+        for entrada, registro in LogCatalog(directorio_logs).iterar(**filtros)
+    ]
+
+
+def sesiones_desde_db(session_ids: list[str] | None = None, dia: str | None = None,
+                      limite: int | None = None) -> list[dict]:
+    from app.models.models import get_recorded_user_messages_from_db
+
+    return [
+        {"origen": s["id"], "sala": s["room_name"], "pipeline": s["pipeline_type"], "caso": s["topic"],
+         "mensajes": [
+             {"autor": m["agent_name"] or m["user_id"], "agent": m["agent_name"] is not None,
+              "contenido": m["content"], "timestamp": m["created_at"]}
+             for m in s["mensajes"]
+         ]}
+        for s in get_recorded_user_messages_from_db(session_ids, dia, limite, include_agents=True)
+    ]
+
+
+# --- Revisión ---
+class RevisorLote:
+    """
+    Revisa muchas sesiones con el agente Revisor: como máximo `concurrencia` a la vez,
+    todas con el mismo cliente del modelo. Cada resultado se guarda en
+    <directorio>/<hash>.json; una sesión ya revisada con el mismo log y prompts no
+    vuelve a llamar al modelo.
+    """
+
+    def __init__(self, prompts_por_pipeline: dict | None = None, factory: ReActAgentFactory | None = None,
+                 directorio: str = DIRECTORIO_REVISIONES, presupuesto_tokens: int = PRESUPUESTO_TOKENS,
+                 concurrencia: int = 4):
+        self.factory = factory or ReActAgentFactory()
+        self.modelo = self.factory.crear_modelo()
+        self.prompts_por_pipeline = prompts_por_pipeline or {}
+        self.directorio = directorio
+        self.presupuesto_tokens = presupuesto_tokens
+        self.semaforo = asyncio.Semaphore(concurrencia)
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    async def revisar(self, sesion: dict) -> dict:
+        prompts = self.prompts_por_pipeline.get(sesion.get("pipeline"), {})
+        texto, omitidos = recortar_log(lineas_log(sesion), self.presupuesto_tokens)
+        clave = clave_revision(texto, prompts, self.factory.model_name)
+        ruta = self._ruta(clave)
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as f:
+                return {**json.load(f), "desde_cache": True}
+
+        async with self.semaforo:
+            # un agente (y memoria) por sesión, el cliente del modelo es compartido
+            agente = self.factory.create_agent("Revisor", PROMPT_REVISOR, model=self.modelo)
+            contenido = (
+                f"Pipeline: {sesion.get('pipeline')}\nCaso: {sesion.get('caso') or ''}\n\n"
+                f"Prompts de los agentes:\n{json.dumps(prompts, indent=2, ensure_ascii=False)}\n\n"
+                f"Registro de mensajes de la sesión:\n{texto}\n\n"
+                "Genera el informe evaluando el desempeño de cada agente según su rol."
+            )
+            respuesta = await agente(Msg(name="user", role="user", content=contenido))
+
+        texto_respuesta = respuesta.get_text_content() or ""
+        resultado = {
+            "clave": clave,
+            "origen": sesion.get("origen"),
+            "sala": sesion.get("sala"),
+            "pipeline": sesion.get("pipeline"),
+            "tokens_log": contar_tokens(texto),
+            "mensajes_omitidos": omitidos,
+            "revision": safe_parse_json(texto_respuesta),
+            "texto": texto_respuesta,
+        }
+        os.makedirs(self.directorio, exist_ok=True)
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, ruta)
+        return {**resultado, "desde_cache": False}
+
+    async def revisar_lote(self, sesiones: list[dict]) -> list[dict]:
+        async def _una(sesion):
+            try:
+                return await self.revisar(sesion)
+            except Exception as e:
+                logger.exception(f"[Revisor] sesión {sesion.get('origen')}: {e}")
+                return {"origen": sesion.get("origen"), "error": str(e)}
+
+        return list(await asyncio.gather(*(_una(s) for s in sesiones)))
+
+
+def agregar(resultados: list[dict], top: int = 10) -> dict:
+    """Consolida por agente los hallazgos de todas las revisiones con formato válido."""
+    por_agente = defaultdict(lambda: {"sesiones": 0, "cumple_rol": 0, "puntajes": [], "hallazgos": Counter()})
+    sugerencias = Counter()
+    sin_formato = 0
+    for r in resultados:
+        revision = r.get("revision")
+        if not isinstance(revision, dict):
+            sin_formato += 1
+            continue
+        for agente, datos in (revision.get("agentes") or {}).items():
+            a = por_agente[agente]
+            a["sesiones"] += 1
+            a["cumple_rol"] += bool(datos.get("cumple_rol"))
+            if isinstance(datos.get("puntaje"), (int, float)):
+                a["puntajes"].append(datos["puntaje"])
+            a["hallazgos"].update(h.strip().lower() for h in datos.get("hallazgos") or [] if h)
+        sugerencias.update(s.strip().lower() for s in revision.get("sugerencias") or [] if s)
+
+    return {
+        "sesiones": len(resultados),
+        "desde_cache": sum(1 for r in resultados if r.get("desde_cache")),
+        "errores": sum(1 for r in resultados if "error" in r),
+        "sin_formato": sin_formato,
+        "agentes": {
+            agente: {
+                "sesiones": a["sesiones"],
+                "cumple_rol_pct": round(100 * a["cumple_rol"] / a["sesiones"], 1),
+                "puntaje_promedio": round(sum(a["puntajes"]) / len(a["puntajes"]), 2) if a["puntajes"] else None,
+                "hallazgos_frecuentes": a["hallazgos"].most_common(top),
+            }
+            for agente, a in sorted(por_agente.items())
+        },
+        "sugerencias_frecuentes": sugerencias.most_common(top),
+    }
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Revisión en lote de sesiones con el agente Revisor.")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--db", action="store_true", help="Sesiones cerradas de la BD")
+    origen.add_argument("--logs", help="Directorio de logs catalogados (ver app.utils.log_catalog)")
+    parser.add_argument("--sesiones", nargs="*", help="IDs de sesión (con --db)")
+    parser.add_argument("--dia", help="YYYY-MM-DD (con --db)")
+    parser.add_argument("--pipeline", help="Filtra por pipeline (con --logs)")
+    parser.add_argument("--desde", help="Fecha ISO (con --logs)")
+    parser.add_argument("--hasta", help="Fecha ISO exclusiva (con --logs)")
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--presupuesto", type=int, default=PRESUPUESTO_TOKENS, help="Tokens máximos del log por sesión")
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--modelo", default="gpt-4o-mini")
+    parser.add_argument("--salida", help="Archivo JSON con revisiones y agregado")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        sesiones = sesiones_desde_db(args.sesiones, args.dia, args.limite)
+    else:
+        sesiones = sesiones_desde_catalogo(args.logs, pipeline=args.pipeline, desde=args.desde,
+                                           hasta=args.hasta, limite=args.limite)
+    if not sesiones:
+        parser.error("No se encontraron sesiones")
+
+    prompts = {}
+    try:
+        from app.models.models import get_prompts_by_system
+        prompts = {p: get_prompts_by_system(p) for p in {s["pipeline"] for s in sesiones if s.get("pipeline")}}
+    except Exception as e:
+        logger.warning(f"[Revisor] sin prompts de la BD: {e}")
+
+    revisor = RevisorLote(prompts, ReActAgentFactory(model_name=args.modelo),
+                          presupuesto_tokens=args.presupuesto, concurrencia=args.concurrencia)
+    resultados = asyncio.run(revisor.revisar_lote(sesiones))
+    resumen = agregar(resultados)
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"resumen": resumen, "revisiones": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"[✅ Revisiones]: {args.salida}")
+
+
+if __name__ == "__main__":
+    _main()
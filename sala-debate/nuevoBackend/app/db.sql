@@ -12,6 +12,10 @@ CREATE DATABASE chatdb OWNER chat_user;
 -- 1. CREACIÓN DE TABLAS
 -- ==========================================
 -- Borrar tablas en orden de dependencia
+DROP TABLE IF EXISTS tema_resumenes CASCADE;
+DROP TABLE IF EXISTS agent_model_routes CASCADE;
+DROP TABLE IF EXISTS session_day_summaries CASCADE;
+DROP TABLE IF EXISTS session_summaries CASCADE;
 DROP TABLE IF EXISTS messages CASCADE;
 DROP TABLE IF EXISTS room_sessions CASCADE;
 DROP TABLE IF EXISTS agent_prompts CASCADE;
@@ -51,7 +55,9 @@ CREATE TABLE room_sessions (
     room_name TEXT NOT NULL,
     topic TEXT,
     status VARCHAR(20) DEFAULT 'active', -- Tu compañero no tenía NOT NULL explícito en el dump
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    pipeline_type TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP WITH TIME ZONE
 );
 
 -- 5. Tabla Temas (La agregamos porque tu código Python la pide)
@@ -84,6 +90,15 @@ CREATE TABLE agent_prompts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Nivel de modelo (ver agentComponents/niveles_modelo.py) de cada agente por pipeline
+CREATE TABLE agent_model_routes (
+    system_type VARCHAR(50) NOT NULL,
+    agent_name VARCHAR NOT NULL,
+    tier VARCHAR(20) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (system_type, agent_name)
+);
+
 -- 8. Tabla MultiAgentConfig
 CREATE TABLE multiagent_config (
     id SERIAL PRIMARY KEY,
@@ -93,6 +108,56 @@ CREATE TABLE multiagent_config (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 9. Índices para consultas históricas (timeline por día)
+CREATE INDEX idx_room_sessions_created ON room_sessions (created_at);
+CREATE INDEX idx_messages_session_created ON messages (room_session_id, created_at);
+
+-- 10. Resúmenes precalculados para el historial (se llenan al crear/cerrar la sesión)
+CREATE TABLE session_summaries (
+    room_session_id UUID PRIMARY KEY REFERENCES room_sessions(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    room_name TEXT NOT NULL,
+    topic TEXT,
+    pipeline_type TEXT,
+    status TEXT NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    closed_at TIMESTAMP WITH TIME ZONE,
+    first_message_at TIMESTAMP WITH TIME ZONE,
+    last_message_at TIMESTAMP WITH TIME ZONE,
+    duration_seconds INTEGER,
+    -- ms desde POST /sessions hasta el primer mensaje emitido a la sala
+    startup_ms INTEGER,
+    total_messages INTEGER NOT NULL DEFAULT 0,
+    user_messages INTEGER NOT NULL DEFAULT 0,
+    agent_messages INTEGER NOT NULL DEFAULT 0,
+    messages_by_agent JSON NOT NULL DEFAULT '{}',
+    messages_by_user JSON NOT NULL DEFAULT '{}',
+    participants TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_session_summaries_day ON session_summaries (day);
+
+CREATE TABLE session_day_summaries (
+    day DATE PRIMARY KEY,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    total_messages INTEGER NOT NULL DEFAULT 0,
+    user_messages INTEGER NOT NULL DEFAULT 0,
+    agent_messages INTEGER NOT NULL DEFAULT 0,
+    sessions_by_pipeline JSON NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 11. Versión condensada de cada caso (por hash del texto), se genera una sola vez
+CREATE TABLE tema_resumenes (
+    texto_hash VARCHAR(64) PRIMARY KEY,
+    tema_id INTEGER REFERENCES temas(id) ON DELETE SET NULL,
+    resumen TEXT NOT NULL,
+    tokens_original INTEGER NOT NULL,
+    tokens_resumen INTEGER NOT NULL,
+    modelo VARCHAR(50),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ==========================================
 -- 2. POBLADO DE DATOS (SEEDING)
 -- ==========================================
@@ -127,4 +192,13 @@ INSERT INTO multiagent_config (ventana_mensajes, fase_segundos, update_interval)
 GRANT CONNECT ON DATABASE chatdb TO chat_user;
 GRANT USAGE ON SCHEMA public TO chat_user;
 GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO chat_user;
-GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO chat_user;
\ No newline at end of file
+GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO chat_user;
+
+-- ==========================================
+-- 4. MIGRACIÓN DE UNA BD EXISTENTE
+-- ==========================================
+-- Si la BD ya existía, basta con agregar las columnas nuevas y crear las tablas
+-- de resúmenes (sección 10) y los índices (sección 9); luego poblar con
+-- POST /api/sessions/summaries/rebuild
+-- ALTER TABLE room_sessions ADD COLUMN IF NOT EXISTS pipeline_type TEXT;
+-- ALTER TABLE room_sessions ADD COLUMN IF NOT EXISTS closed_at TIMESTAMP WITH TIME ZONE;
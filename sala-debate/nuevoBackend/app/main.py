@@ -1,13 +1,15 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
 import socketio
-import io
-import matplotlib.pyplot as plt
-from datetime import datetime
 from uuid import UUID
 from pathlib import Path
 from fastapi import FastAPI,Request, Query
 from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -17,12 +19,21 @@ load_dotenv(env_path)
 from app.controllers.ChatSocketController import register_sockets, get_user_list
 from app.agentComponents.intermediarios.base_intermediario import BaseIntermediario
 from app.agentComponents.registry import INTERMEDIARIO_MAP, get_intermediario_class
+from app.agentComponents.tema_condensado import condensador, preparar_prompts, reporte_tokens
+from app.agentComponents.pool_agentes import pool_modelos
+from app.agentComponents.niveles_modelo import MODEL_TIERS, NIVEL_DEFECTO, AUTO_DOWNGRADE, monitor_niveles
+from app.agentComponents.veredictos import estado_veredictos
+from app.agentComponents.especulacion import estado_especulacion
+from app.utils.plots import generate_day_plot
+from app.analitica import exportacion, metricas, presupuesto_prompts
 from app.models.models import (
     get_latest_room_statuses,
     get_or_create_Active_room_session,
     get_all_agents_by_pipeline,
     get_multiagent_config,
     close_active_room_session,
+    get_or_create_active_room_sessions_bulk,
+    close_active_room_sessions_bulk,
     get_temas,
     get_active_room_topic,
     get_rooms,
@@ -32,13 +43,28 @@ from app.models.models import (
     create_prompt_for_system,
     update_multiagent_config,
     get_all_session_days_from_db,
+    get_session_day_summaries_from_db,
     get_sessions_by_day_from_db,
+    refresh_session_summary,
+    rebuild_session_summaries,
     get_messages_by_session_from_db,
+    get_room_session_status,
+    get_day_timeline_bins_from_db,
+    TIMELINE_CATEGORIAS,
+    cache_prompts,
+    cache_config,
+    get_model_routes,
+    set_model_route,
     insert_tema,
     update_tema
     )
 from pydantic import BaseModel
 
+class ModelRouteSchema(BaseModel):
+    pipeline: str
+    agent_name: str
+    tier: str
+
 class MultiAgentConfigSchema(BaseModel):
     ventana_mensajes: int
     fase_segundos: int
@@ -47,6 +73,21 @@ class TemaCreate(BaseModel):
     titulo: str
     tema_text: str
 
+class ExportRequest(BaseModel):
+    desde: str | None = None
+    hasta: str | None = None
+    tablas: list[str] | None = None
+    completo: bool = False
+
+class BatchSessionsCreate(BaseModel):
+    rooms: list[str]
+    prompt_inicial: str
+    pipeline_type: str = "standard"
+    idioma: str = "español"
+
+class BatchSessionsTerminate(BaseModel):
+    rooms: list[str]
+
 class TemaUpdate(BaseModel):
     id: int
     titulo: str
@@ -54,8 +95,14 @@ class TemaUpdate(BaseModel):
 
 
 load_dotenv()
+logger = logging.getLogger("main")
 # Guardamos las salas activas , room_name -> Intermediario
 salas_activas: dict[str, BaseIntermediario] = {}
+# Cierres de sala en curso (stop_session espera las evaluaciones pendientes de la sala)
+cierres_pendientes: set[asyncio.Task] = set()
+
+# Bienvenidas (llamadas al LLM) simultáneas al iniciar salas en lote
+BATCH_WELCOME_CONCURRENCY = int(os.getenv("BATCH_WELCOME_CONCURRENCY", "4"))
 
 # ---------------------------------------------------------
 # 1) Crear servidor socket.io en modo ASGI (async nativo)
@@ -71,7 +118,27 @@ socket_app = socketio.ASGIApp(sio)
 # ---------------------------------------------------------
 # 2) Crear instancia FastAPI
 # ---------------------------------------------------------
-app = FastAPI()
+async def precalentar_modelos():
+    """Deja modelos listos para las primeras salas de cada pipeline (en segundo plano)."""
+    for pipeline_type in INTERMEDIARIO_MAP:
+        try:
+            prompts = await asyncio.to_thread(get_prompts_by_system, pipeline_type)
+        except Exception as e:
+            print(f"[❌ Pool] No se pudieron leer los prompts de {pipeline_type}: {e}")
+            continue
+        rutas = await asyncio.to_thread(get_model_routes, pipeline_type)
+        pool_modelos.rellenar(pipeline_type, list(prompts), cache_prompts.version, rutas)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await precalentar_modelos()
+    yield
+    # salas que se estaban cerrando: que vacíen sus bitácoras antes de apagar
+    await asyncio.gather(*cierres_pendientes, return_exceptions=True)
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -79,6 +146,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -105,36 +173,185 @@ def estado_salas():
 
 @app.post("/api/rooms/{room_name}/sessions", status_code=201)
 async def create_session(room_name: str, payload: dict):
+    inicio = time.perf_counter()
     topic = payload.get("prompt_inicial")
     pipeline_type = payload.get("pipeline_type", "standard")
 
-    room_session = get_or_create_Active_room_session(room_name, topic)
+    room_session = get_or_create_Active_room_session(room_name, topic, pipeline_type)
     if not room_session.get("primera_inicializacion", False):
         return {"status": "ya_inicializado"}
 
-    current_prompts = get_prompts_by_system(pipeline_type)
-
-    prompts_preparados = {k: v.replace("{tema}", topic) for k, v in current_prompts.items()}
-    
+    prompts = get_prompts_by_system(pipeline_type)
+    tema_condensado = condensador.disponible(topic)
+    completos = get_intermediario_class(pipeline_type).AGENTES_TEMA_COMPLETO
+    prompts_preparados = preparar_prompts(prompts, topic, tema_condensado, completos)
     config_ma = get_multiagent_config()
 
+    try:
+        intermediario = _crear_intermediario(room_name, room_session["id"], pipeline_type, prompts_preparados, config_ma)
+        await _arrancar_sala(intermediario, topic, payload.get("idioma", "español"), config_ma,
+                             tema_condensado=tema_condensado, t_solicitud=inicio)
+    except Exception as e:
+        await _liberar_sala_fallida(room_name, room_session["id"])
+        raise HTTPException(status_code=500, detail=str(e))
+    await _refrescar_resumen(room_session["id"])
+
+    return {
+        "status": "created",
+        "room": room_name,
+        "startup_ms": intermediario.startup_ms,
+        "tokens_ahorrados": reporte_tokens(prompts, topic, tema_condensado, completos),
+    }
+
+
+async def _refrescar_resumen(session_id: str) -> None:
+    """Resumen de la sesión y rollup de su día, en un hilo. Un fallo se registra y no afecta a la sala."""
+    try:
+        await asyncio.to_thread(refresh_session_summary, session_id)
+    except Exception as e:
+        logger.error(f"[Resumen] no se pudo actualizar la sesión {session_id}: {e}")
+
+
+async def _cerrar_sala(intermediario: BaseIntermediario | None, session_id: str) -> None:
+    """Cierra el intermediario (si lo hay) y luego actualiza el resumen con lo que vació."""
+    if intermediario:
+        try:
+            await intermediario.stop_session()
+        except Exception as e:
+            logger.error(f"[Cierre] error cerrando la sala {intermediario.sala}: {e}")
+    await _refrescar_resumen(session_id)
+
+
+def _cerrar_en_segundo_plano(intermediario: BaseIntermediario | None, session_id: str) -> None:
+    """El cierre puede esperar evaluaciones en curso: no se hace esperar a la petición HTTP."""
+    tarea = asyncio.create_task(_cerrar_sala(intermediario, session_id))
+    cierres_pendientes.add(tarea)
+    tarea.add_done_callback(cierres_pendientes.discard)
+
+
+async def _liberar_sala_fallida(room: str, session_id: str) -> None:
+    """
+    Una sala que no llegó a arrancar: detiene su cola, cierra su sesión en la BD y
+    cierra el intermediario, para que un reintento la inicie de nuevo en vez de
+    responder `ya_inicializado`.
+    """
+    intermediario = salas_activas.pop(room, None)
+    if intermediario:
+        intermediario.processing_task.cancel()
+    try:
+        await asyncio.to_thread(close_active_room_session, room)
+    except Exception as e:
+        logger.error(f"[Inicio] no se pudo cerrar la sesión de la sala {room}: {e}")
+    _cerrar_en_segundo_plano(intermediario, session_id)
+
+
+def _crear_intermediario(room_name: str, room_session_id: str, pipeline_type: str,
+                         prompts_preparados: dict, config_ma) -> BaseIntermediario:
     IntermediarioClass = get_intermediario_class(pipeline_type)
-    
+    # modelos precalentados (o perezosos): crear la sala no construye clientes del LLM
+    factory = pool_modelos.tomar(
+        pipeline_type, list(prompts_preparados), cache_prompts.version, get_model_routes(pipeline_type)
+    )
     intermediario = IntermediarioClass(
         prompts=prompts_preparados,
         sio=sio,
         sala=room_name,
-        room_session_id=room_session["id"],
-        config_multiagente=config_ma
+        room_session_id=room_session_id,
+        config_multiagente=config_ma,
+        factory=factory
     )
-
     salas_activas[room_name] = intermediario
-    usuarios_sala = await get_user_list(room_name)
-    
-    await intermediario.start_session(topic, usuarios_sala, payload.get("idioma", "español"))
+    return intermediario
+
+
+async def _arrancar_sala(intermediario: BaseIntermediario, topic: str, idioma: str, config_ma,
+                         limite: asyncio.Semaphore | None = None, tema_condensado: str | None = None,
+                         t_solicitud: float | None = None):
+    """
+    Bienvenida del Orientador y timer. `limite` acota las bienvenidas simultáneas;
+    `t_solicitud` (perf_counter del POST) mide el tiempo hasta el primer mensaje.
+    """
+    intermediario.t_solicitud = t_solicitud
+    usuarios_sala = await get_user_list(intermediario.sala)
+    if limite:
+        async with limite:
+            await intermediario.start_session(topic, usuarios_sala, idioma, tema_condensado)
+    else:
+        await intermediario.start_session(topic, usuarios_sala, idioma, tema_condensado)
+    # el timer parte apenas la sala está lista, sin esperar al resto del lote
     await intermediario.start_timer(config_ma.fase_segundos, config_ma.update_interval)
 
-    return {"status": "created", "room": room_name}
+
+@app.post("/api/rooms/sessions/batch", status_code=201)
+async def create_sessions_batch(data: BatchSessionsCreate):
+    """
+    Inicia varias salas con el mismo caso y pipeline en una sola petición.
+    Las filas de sesión se crean en lote; las bienvenidas se escalonan con un
+    máximo de BATCH_WELCOME_CONCURRENCY llamadas simultáneas al LLM.
+    Retorna el estado por sala: created, ya_inicializado o error.
+    """
+    inicio = time.perf_counter()
+    rooms = list(dict.fromkeys(data.rooms))
+    if not rooms:
+        raise HTTPException(status_code=400, detail="Lista de salas vacía")
+    try:
+        sesiones, prompts, config_ma = await asyncio.gather(
+            asyncio.to_thread(get_or_create_active_room_sessions_bulk, rooms, data.prompt_inicial, data.pipeline_type),
+            asyncio.to_thread(get_prompts_by_system, data.pipeline_type),
+            asyncio.to_thread(get_multiagent_config),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    tema_condensado = condensador.disponible(data.prompt_inicial)
+    completos = get_intermediario_class(data.pipeline_type).AGENTES_TEMA_COMPLETO
+    prompts_preparados = preparar_prompts(prompts, data.prompt_inicial, tema_condensado, completos)
+    estado = {
+        room: {"status": "ya_inicializado"} for room in rooms
+        if not sesiones[room]["primera_inicializacion"]
+    }
+    nuevas = [room for room in rooms if room not in estado]
+    limite = asyncio.Semaphore(BATCH_WELCOME_CONCURRENCY)
+
+    async def _iniciar(room: str):
+        try:
+            intermediario = _crear_intermediario(
+                room, sesiones[room]["id"], data.pipeline_type, prompts_preparados, config_ma
+            )
+            await _arrancar_sala(intermediario, data.prompt_inicial, data.idioma, config_ma, limite,
+                                 tema_condensado=tema_condensado, t_solicitud=inicio)
+            await _refrescar_resumen(sesiones[room]["id"])
+            estado[room] = {"status": "created", "session_id": sesiones[room]["id"],
+                            "startup_ms": intermediario.startup_ms}
+        except Exception as e:
+            await _liberar_sala_fallida(room, sesiones[room]["id"])
+            estado[room] = {"status": "error", "detail": str(e)}
+
+    await asyncio.gather(*(_iniciar(room) for room in nuevas))
+    return {
+        "rooms": {room: estado[room] for room in rooms},
+        "tokens_ahorrados": reporte_tokens(prompts, data.prompt_inicial, tema_condensado, completos),
+    }
+
+
+@app.post("/api/rooms/sessions/batch/terminate")
+async def terminate_sessions_batch(data: BatchSessionsTerminate):
+    """
+    Cierra varias salas en una sola petición: un UPDATE para todas las sesiones;
+    los intermediarios (bitácora incluida) se cierran en segundo plano.
+    """
+    rooms = list(dict.fromkeys(data.rooms))
+    try:
+        cerradas = await asyncio.to_thread(close_active_room_sessions_bulk, rooms)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    estado = {room: {"status": "sin_sesion_activa"} for room in rooms}
+    for sesion in cerradas:
+        room = sesion["room_name"]
+        _cerrar_en_segundo_plano(salas_activas.pop(room, None), sesion["id"])
+        estado[room] = {"status": "terminated", "session_id": sesion["id"]}
+    return {"rooms": estado}
 
 @app.delete("/api/rooms/{room_name}/sessions/active")
 async def terminate_session(room_name: str):
@@ -142,10 +359,8 @@ async def terminate_session(room_name: str):
         result = close_active_room_session(room_name)
         if not result:
             raise HTTPException(status_code=404, detail="No active session found")
-
-        if room_name in salas_activas:
-            await salas_activas[room_name].stop_session()
-            del salas_activas[room_name]
+        # el resumen se actualiza después del cierre, con lo último que vació la sala
+        _cerrar_en_segundo_plano(salas_activas.pop(room_name, None), result["id"])
 
         return {"status": "terminated"}
     except Exception as e:
@@ -174,21 +389,59 @@ async def get_room_timer(room_name: str):
         raise HTTPException(404, "Room not found or inactive")
     return salas_activas[room_name].get_timer_state()
 
+def _cabeceras_etag(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _no_modificado(request: Request, etag: str) -> Response | None:
+    """304 si el cliente ya tiene esta versión (If-None-Match); si no, None."""
+    vistas = [e.strip() for e in request.headers.get("if-none-match", "").split(",")]
+    if etag in vistas or "*" in vistas:
+        return Response(status_code=304, headers=_cabeceras_etag(etag))
+    return None
+
+
+def _respuesta_con_etag(request: Request, etag: str, contenido) -> Response:
+    """304 si el cliente ya tiene esta versión; si no, el JSON con su ETag."""
+    return _no_modificado(request, etag) or JSONResponse(contenido, headers=_cabeceras_etag(etag))
+
+
 @app.get("/api/prompts")
 async def get_prompts(request: Request):
     """
     GET /api/prompts?pipeline=standard
-    Devuelve los prompts del tipo de sistema seleccionado.
+    Devuelve los prompts del tipo de sistema seleccionado (con ETag).
+    Con varios workers, un cambio hecho en otro proceso tarda hasta CONFIG_CACHE_TTL
+    segundos en verse aquí.
     """
     pipeline = request.query_params.get("pipeline", "standard")
 
     try:
-        prompts = get_prompts_by_system(pipeline)
-        return JSONResponse(prompts)
+        prompts = await asyncio.to_thread(get_prompts_by_system, pipeline)
+        return _respuesta_con_etag(request, cache_prompts.etag(pipeline), prompts)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+@app.get("/api/prompts/analysis")
+def analyze_prompts(pipeline: str | None = None, tema_id: int | None = None,
+                    presupuesto: int = presupuesto_prompts.PROMPT_TOKEN_BUDGET, ventana: int | None = None):
+    """
+    GET /api/prompts/analysis?pipeline=toulmin&tema_id=3&presupuesto=4000
+    Tokens del contexto efectivo de cada agente (prompt con {tema}, anuncio del hub y
+    ventana de mensajes) con los prompts vigentes, y alertas de presupuesto/boilerplate.
+    """
+    if pipeline and pipeline not in presupuesto_prompts.CONTEXTO_AGENTES:
+        raise HTTPException(status_code=400, detail=f"Pipeline sin agentes: {pipeline}")
+    try:
+        return presupuesto_prompts.analizar([pipeline] if pipeline else None, tema_id=tema_id,
+                                            presupuesto=presupuesto, ventana=ventana)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/prompts")
 async def save_prompt(request: Request):
     """
@@ -216,23 +469,77 @@ async def save_prompt(request: Request):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.get("/api/agents")
-def get_agents(pipeline: str = Query("standard")):
+def get_agents(request: Request, pipeline: str = Query("standard")):
     """
-    Retorna los agentes disponibles filtrados por pipeline.
+    Retorna los agentes disponibles filtrados por pipeline (con ETag).
     """
     agents = get_all_agents_by_pipeline(pipeline)
-    return {"agents": agents}
+    return _respuesta_con_etag(request, cache_prompts.etag(f"agentes-{pipeline}"), {"agents": agents})
+
+@app.get("/api/agents/pool")
+def get_agents_pool():
+    """Juegos de modelos precalentados disponibles y cuántas salas los usaron."""
+    return pool_modelos.estado()
 
-@app.get("/api/multiagent-config",response_model=MultiAgentConfigSchema)
-def get_config():
+@app.get("/api/agents/speculation")
+def get_agents_speculation():
+    """Orientador especulativo: especulaciones, aciertos, descartes y latencia ahorrada (todas las salas)."""
+    return estado_especulacion()
+
+@app.get("/api/models/tiers")
+def get_model_tiers():
+    """
+    Configuración de cada nivel de modelo con sus métricas (llamadas, latencia, timeouts,
+    degradaciones) y los veredictos válidos / fallidos de los clasificadores.
+    """
+    return {
+        "defecto": NIVEL_DEFECTO,
+        "degradacion_automatica": AUTO_DOWNGRADE,
+        "niveles": monitor_niveles.estado(),
+        "veredictos": estado_veredictos(),
+    }
+
+@app.get("/api/model-routes")
+def get_routes(pipeline: str = Query("standard")):
+    """Nivel de modelo de cada agente del pipeline (los agentes sin ruta usan el nivel por defecto)."""
+    rutas = get_model_routes(pipeline)
+    agentes = get_all_agents_by_pipeline(pipeline)
+    return {
+        "pipeline": pipeline,
+        "rutas": {a: rutas.get(a, NIVEL_DEFECTO) for a in sorted(set(agentes) | set(rutas))},
+    }
+
+@app.post("/api/model-routes")
+def post_route(ruta: ModelRouteSchema):
+    """Asigna un nivel de modelo a un agente; aplica a las salas que se creen después."""
+    if ruta.tier not in MODEL_TIERS:
+        raise HTTPException(status_code=400, detail=f"Nivel desconocido: {ruta.tier}")
+    if ruta.pipeline not in INTERMEDIARIO_MAP:
+        raise HTTPException(status_code=400, detail=f"Pipeline desconocido: {ruta.pipeline}")
+    set_model_route(ruta.pipeline, ruta.agent_name, ruta.tier)
+    return {"status": "ok"}
+
+@app.get("/api/multiagent-config", response_model=MultiAgentConfigSchema,
+         responses={304: {"description": "Sin cambios desde el ETag enviado en If-None-Match"}})
+def get_config(request: Request, response: Response):
+    """
+    Configuración multiagente con ETag. Cada proceso cachea la configuración hasta
+    CONFIG_CACHE_TTL segundos: con varios workers, un cambio hecho en otro proceso
+    puede tardar ese tiempo en verse (y en cambiar el ETag) en este.
+    """
     config = get_multiagent_config()
     if not config:
         raise HTTPException(status_code=404, detail="No existe configuración")
-    return {
-        "ventana_mensajes": config.ventana_mensajes,
-        "fase_segundos": config.fase_segundos,
-        "update_interval": config.update_interval
-    }
+    etag = cache_config.etag("actual")
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado:
+        return no_modificado
+    response.headers.update(_cabeceras_etag(etag))
+    return MultiAgentConfigSchema(
+        ventana_mensajes=config.ventana_mensajes,
+        fase_segundos=config.fase_segundos,
+        update_interval=config.update_interval
+    )
 
 @app.post("/api/multiagent-config",response_model=MultiAgentConfigSchema)
 def post_config(data: MultiAgentConfigSchema):
@@ -252,18 +559,38 @@ def post_config(data: MultiAgentConfigSchema):
     
 
 @app.get("/api/sessions/days")
-def get_all_session_days():
+def get_all_session_days(detalle: bool = Query(False)):
+    """
+    Días con sesiones, leídos del rollup diario precalculado.
+    ?detalle=true agrega los totales de cada día.
+    """
     try:
+        if detalle:
+            resumen = get_session_day_summaries_from_db()
+            return {"days": [d["day"] for d in resumen], "summaries": resumen}
         days = get_all_session_days_from_db()
         return {"days": days}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/sessions/summaries/rebuild")
+def rebuild_summaries(todas: bool = Query(False)):
+    """
+    Rellena los resúmenes de sesiones que aún no lo tienen (o recalcula todas con ?todas=true).
+    """
+    try:
+        procesadas = rebuild_session_summaries(only_missing=not todas)
+        return {"status": "ok", "sesiones_procesadas": procesadas}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/sessions/by-day/{day}")
 def get_sessions_by_day(day: str):
     """
     day = 'YYYY-MM-DD'
+    Devuelve las sesiones del día con sus conteos precalculados (session_summaries).
     """
     try:
         sessions = get_sessions_by_day_from_db(day)
@@ -280,76 +607,78 @@ def get_messages_by_session(session_id: UUID):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_day_plot(day: str) -> io.BytesIO:
-    # 1. Obtener sesiones del día
-    sessions = get_sessions_by_day_from_db(day)
-    if not sessions:
-        raise ValueError("No hay sesiones para este día")
-
-    plt.figure(figsize=(13, max(len(sessions) * 1.5, 4)))
-    plt.title(f"Timeline de sesiones del día {day}")
-    plt.xlabel("Timestamp")
-    plt.ylabel("Sesiones")
-
-    session_labels = []
-    all_points = {"x": [], "y": [], "color": [], "marker": []}
-
-    user_color = "blue"
-    orientador_color = "orange"
-    other_agents_color = "green"
-
-    for idx, s in enumerate(sessions):
-        created_at = s.created_at
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at)
-        session_labels.append(f"{s.room_name} ({created_at.strftime('%H:%M')})")
-
-        msgs = get_messages_by_session_from_db(s.id)
-        for m in msgs:
-            ts = m["created_at"]
-            if isinstance(ts, str):
-                ts = datetime.fromisoformat(ts)
-
-            if m.get("agent_name") and m["agent_name"].lower() == "orientador":
-                color = orientador_color
-                marker = "o"
-            elif m.get("agent_name"):
-                color = other_agents_color
-                marker = "s"
-            else:
-                color = user_color
-                marker = "o"
-
-            all_points["x"].append(ts)
-            all_points["y"].append(idx)
-            all_points["color"].append(color)
-            all_points["marker"].append(marker)
-
-    for x, y, c, m in zip(all_points["x"], all_points["y"], all_points["color"], all_points["marker"]):
-        plt.scatter(x, y, color=c, marker=m, s=80, edgecolor="black" if m=="s" else "none")
-
-    plt.yticks(range(len(session_labels)), session_labels)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plt.close()
-    return buf
+@app.get("/api/sessions/{session_id}/metrics")
+def get_session_metrics(session_id: UUID):
+    """
+    Métricas de dinámica conversacional de una sesión cerrada
+    (participación, turnos, tiempos de respuesta, latencia de los agentes).
+    """
+    status = get_room_session_status(session_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if status != "closed":
+        raise HTTPException(status_code=409, detail="La sesión aún está activa")
+    try:
+        return metricas.metricas_sesion(str(session_id)) or {"room_session_id": str(session_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/sessions/plot-day/{day}")
-def plot_sessions_day(day: str):
+async def plot_sessions_day(day: str):
     """
     Devuelve un gráfico PNG con todas las sesiones de un día.
     day = 'YYYY-MM-DD'
     """
     try:
-        buf = generate_day_plot(day)
+        buf = await generate_day_plot(day)
         return StreamingResponse(buf, media_type="image/png")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@app.get("/api/sessions/timeline/{day}")
+def get_sessions_timeline(day: str, acumulado: bool = Query(False)):
+    """
+    Serie de tiempo del día (datos detrás de /api/sessions/plot-day/{day}).
+    day = 'YYYY-MM-DD'
+    Por sesión devuelve conteos de mensajes por minuto y por categoría de emisor.
+    ?acumulado=true devuelve los conteos acumulados en vez de por minuto.
+    """
+    try:
+        sessions = get_day_timeline_bins_from_db(day, acumulado=acumulado)
+        return {
+            "day": day,
+            "categorias": list(TIMELINE_CATEGORIAS),
+            "acumulado": acumulado,
+            "sessions": sessions,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/exports")
+def export_sessions(data: ExportRequest):
+    """
+    Exporta room_sessions, messages y agent_prompts a Parquet particionado por día
+    (exports/<tabla>/day=YYYY-MM-DD/). Incremental salvo completo=true.
+    """
+    try:
+        return {"status": "ok", "tablas": exportacion.exportar(
+            desde=data.desde, hasta=data.hasta, tablas=data.tablas, completo=data.completo
+        )}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/exports")
+def list_exports():
+    """Días ya exportados por tabla."""
+    return {tabla: exportacion.dias_exportados(exportacion.DESTINO_DEFECTO, tabla)
+            for tabla in exportacion.EXPORT_TABLES}
+
 @app.get("/api/topics")
 def list_topics():
     return get_temas()
@@ -2,16 +2,18 @@
 import uuid
 import os
 import enum
+import threading
+import time
 from pathlib import Path
 from sqlalchemy import (
-    Column, Integer, String, Text, DateTime, ForeignKey, func, select, JSON
+    Column, Integer, String, Text, Date, DateTime, ForeignKey, func, select, update, case, cast, JSON, Index
 )
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, insert as pg_insert
 from sqlalchemy.orm import declarative_base, relationship, scoped_session, sessionmaker
 from sqlalchemy import create_engine, Enum
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Cargar variables de entorno
 env_path = Path(__file__).parent.parent / ".env"
@@ -60,7 +62,13 @@ class RoomSession(Base):
     room_name = Column(Text, nullable=False)
     topic = Column(Text, nullable=True)
     status = Column(Enum(SessionStatus), nullable=False, default=SessionStatus.active)
+    pipeline_type = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_room_sessions_created", "created_at"),
+    )
 
 class Tema(Base):
     __tablename__ = 'temas'
@@ -87,6 +95,60 @@ class Message(Base):
     used_message_ids = Column(ARRAY(Integer), nullable=True)    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("idx_messages_session_created", "room_session_id", "created_at"),
+    )
+
+
+# Tabla: session_summaries (resumen precalculado por sesión, se llena al cerrar)
+class SessionSummary(Base):
+    __tablename__ = 'session_summaries'
+
+    room_session_id = Column(UUID(as_uuid=True), ForeignKey('room_sessions.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, nullable=False, index=True)
+    room_name = Column(Text, nullable=False)
+    topic = Column(Text, nullable=True)
+    pipeline_type = Column(Text, nullable=True)
+    status = Column(Text, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+    first_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Integer, nullable=True)
+    startup_ms = Column(Integer, nullable=True)  # POST /sessions -> primer mensaje emitido
+    total_messages = Column(Integer, nullable=False, default=0)
+    user_messages = Column(Integer, nullable=False, default=0)
+    agent_messages = Column(Integer, nullable=False, default=0)
+    messages_by_agent = Column(JSON, nullable=False, default=dict)
+    messages_by_user = Column(JSON, nullable=False, default=dict)
+    participants = Column(ARRAY(Text), nullable=False, default=list)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Tabla: session_day_summaries (rollup diario de session_summaries)
+class SessionDaySummary(Base):
+    __tablename__ = 'session_day_summaries'
+
+    day = Column(Date, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    total_messages = Column(Integer, nullable=False, default=0)
+    user_messages = Column(Integer, nullable=False, default=0)
+    agent_messages = Column(Integer, nullable=False, default=0)
+    sessions_by_pipeline = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# Tabla: tema_resumenes (caso condensado, clave = sha256 del texto del tema)
+class TemaResumen(Base):
+    __tablename__ = 'tema_resumenes'
+
+    texto_hash = Column(String(64), primary_key=True)
+    tema_id = Column(Integer, ForeignKey('temas.id', ondelete='SET NULL'), nullable=True)
+    resumen = Column(Text, nullable=False)
+    tokens_original = Column(Integer, nullable=False)
+    tokens_resumen = Column(Integer, nullable=False)
+    modelo = Column(String(50), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 
 class AgentPrompt(Base):
     __tablename__ = 'agent_prompts'
@@ -98,6 +160,16 @@ class AgentPrompt(Base):
     created_at = Column(DateTime, default=datetime.now())
 
 
+# Tabla: agent_model_routes (nivel de modelo por pipeline y agente; sin fila = nivel por defecto)
+class AgentModelRoute(Base):
+    __tablename__ = 'agent_model_routes'
+
+    system_type = Column(String(50), primary_key=True)
+    agent_name = Column(String, primary_key=True)
+    tier = Column(String(20), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class MultiAgentConfig(Base):
     __tablename__ = 'multiagent_config'
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -155,6 +227,48 @@ def update_tema(tema_id:int, titulo:str=None, tema_text:str=None) -> bool:
     finally:
         session.close()
 
+def get_tema_resumen(texto_hash: str) -> dict | None:
+    """Resumen persistido de un tema, o None si aún no se ha condensado."""
+    session = Session()
+    try:
+        r = session.get(TemaResumen, texto_hash)
+        if not r:
+            return None
+        return {
+            "texto_hash": r.texto_hash,
+            "tema_id": r.tema_id,
+            "resumen": r.resumen,
+            "tokens_original": r.tokens_original,
+            "tokens_resumen": r.tokens_resumen,
+            "modelo": r.modelo,
+        }
+    finally:
+        session.close()
+
+def save_tema_resumen(texto_hash: str, tema_text: str, resumen: str, tokens_original: int,
+                      tokens_resumen: int, modelo: str | None = None) -> None:
+    """
+    Guarda el resumen de un tema (si otro proceso ya lo guardó, no hace nada).
+    tema_id se enlaza si el texto corresponde a un tema de la tabla 'temas'.
+    """
+    session = Session()
+    try:
+        tema_id = session.execute(
+            select(Tema.id).where(Tema.tema_text == tema_text).order_by(Tema.id.desc()).limit(1)
+        ).scalar_one_or_none()
+        session.execute(
+            pg_insert(TemaResumen)
+            .values(texto_hash=texto_hash, tema_id=tema_id, resumen=resumen,
+                    tokens_original=tokens_original, tokens_resumen=tokens_resumen, modelo=modelo)
+            .on_conflict_do_nothing(index_elements=["texto_hash"])
+        )
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
 #----------------------------- Funciones para la sala ---------------------------------------
 def get_rooms() -> list[dict]:
     'Devuelve todas las salas a las cuales se pueden entrar'
@@ -182,7 +296,7 @@ def get_active_room_topic(room_name:str) -> str:
     finally: 
         session.close()
 
-def get_or_create_Active_room_session(room_name:str, topic:str) -> dict:
+def get_or_create_Active_room_session(room_name:str, topic:str, pipeline_type:str | None = None) -> dict:
     '''
     Devuelve el id de la sesión activa para la sala indicada.
     Si no existe, crea una nueva sesión activa.
@@ -202,7 +316,8 @@ def get_or_create_Active_room_session(room_name:str, topic:str) -> dict:
         nueva_sesion = RoomSession(
             room_name=room_name,
             topic=topic,
-            status=SessionStatus.active
+            status=SessionStatus.active,
+            pipeline_type=pipeline_type
         )
         session.add(nueva_sesion)
         session.commit()
@@ -231,6 +346,7 @@ def close_active_room_session(room_name: str) -> dict:
             return None
 
         active_session.status = SessionStatus.closed
+        active_session.closed_at = func.now()
         session.commit()
         session.refresh(active_session)
 
@@ -246,6 +362,61 @@ def close_active_room_session(room_name: str) -> dict:
     finally:
         session.close()
 
+def get_or_create_active_room_sessions_bulk(room_names: list[str], topic: str,
+                                            pipeline_type: str | None = None) -> dict[str, dict]:
+    """
+    Versión en lote de get_or_create_Active_room_session: una consulta para las
+    sesiones activas existentes y un solo commit para las nuevas.
+    Retorna {room_name: {"id", "primera_inicializacion"}}.
+    """
+    session = Session()
+    try:
+        existentes = session.execute(
+            select(RoomSession.room_name, RoomSession.id)
+            .where(RoomSession.room_name.in_(room_names), RoomSession.status == SessionStatus.active)
+        ).all()
+        resultado = {r.room_name: {"id": str(r.id), "primera_inicializacion": False} for r in existentes}
+
+        nuevas = [
+            RoomSession(id=uuid.uuid4(), room_name=nombre, topic=topic,
+                        status=SessionStatus.active, pipeline_type=pipeline_type)
+            for nombre in dict.fromkeys(room_names) if nombre not in resultado
+        ]
+        session.add_all(nuevas)
+        session.commit()
+        for s in nuevas:
+            resultado[s.room_name] = {"id": str(s.id), "primera_inicializacion": True}
+        return resultado
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+def close_active_room_sessions_bulk(room_names: list[str]) -> list[dict]:
+    """
+    Cierra en un solo UPDATE las sesiones activas de las salas indicadas.
+    Retorna las sesiones cerradas (las salas sin sesión activa no aparecen).
+    """
+    session = Session()
+    try:
+        filas = session.execute(
+            update(RoomSession)
+            .where(RoomSession.room_name.in_(room_names), RoomSession.status == SessionStatus.active)
+            .values(status=SessionStatus.closed, closed_at=func.now())
+            .returning(RoomSession.id, RoomSession.room_name)
+        ).all()
+        session.commit()
+        return [
+            {"id": str(f.id), "room_name": f.room_name, "status": SessionStatus.closed.value}
+            for f in filas
+        ]
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
 def get_active_room_session_id(room_name:str) -> str | None:
     """
     Retorna el ID de la sesión activa para una sala dada.
@@ -371,6 +542,54 @@ def get_messages_by_room(id_session:str) -> list[dict]:
         session.close()
 
 #----------------------------- Funciones para IA --------------------------------------
+
+# Caché en memoria de prompts y configuración. create_prompt_for_system y
+# update_multiagent_config la invalidan y suben su versión; el TTL cubre los cambios
+# hechos desde otro proceso (varios workers o scripts), que tardan hasta ese tiempo en verse.
+CONFIG_CACHE_TTL = float(os.getenv("CONFIG_CACHE_TTL", "30"))
+# Distingue los ETag de cada proceso: las versiones son locales
+_EPOCA_CACHE = uuid.uuid4().hex[:8]
+
+
+class _CacheVersionada:
+    def __init__(self, nombre: str, ttl_segundos: float = CONFIG_CACHE_TTL):
+        self.nombre = nombre
+        self.ttl_segundos = ttl_segundos
+        self.version = 0
+        self._entradas: dict = {}  # clave -> (instante, firma, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, cargar, firma=lambda v: v):
+        """Valor cacheado de `clave`; al recargar por TTL sube la versión solo si cambió."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if entrada and time.monotonic() - entrada[0] < self.ttl_segundos:
+            return entrada[2]
+        valor = cargar()
+        with self._lock:
+            if entrada and entrada[1] != firma(valor):
+                self.version += 1
+            self._entradas[clave] = (time.monotonic(), firma(valor), valor)
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.version += 1
+
+    def etag(self, clave) -> str:
+        return f'W/"{self.nombre}-{_EPOCA_CACHE}-{self.version}-{clave}"'
+
+
+cache_prompts = _CacheVersionada("prompts")
+cache_config = _CacheVersionada("config")
+
+
+def _firma_config(config):
+    if config is None:
+        return None
+    return (config.ventana_mensajes, config.fase_segundos, config.update_interval)
+
 def get_current_prompts():
     """
     Retorna los prompts más recientes para cada agente.
@@ -419,6 +638,7 @@ def create_promt(agent_name:str, prompt_text: str) -> int:
         session.add(new_prompt)
         session.commit()
         session.refresh(new_prompt)
+        cache_prompts.invalidar()
         return new_prompt.id
     except Exception as e:
         session.rollback()
@@ -431,6 +651,10 @@ def get_all_agents_by_pipeline(system_type: str) -> list[str]:
     """
     Retorna lista de agentes que tienen prompts asociados a un pipeline específico.
     """
+    return list(cache_prompts.obtener(("agentes", system_type), lambda: _cargar_agents_by_pipeline(system_type)))
+
+
+def _cargar_agents_by_pipeline(system_type: str) -> list[str]:
     session = Session()
     try:
         query = (
@@ -446,8 +670,14 @@ def get_all_agents_by_pipeline(system_type: str) -> list[str]:
 
 def get_prompts_by_system(system_type: str):
     """
-    Retorna los prompts más recientes por agente según system_type.
-    Selecciona el registro con el ID más alto (más reciente) para evitar
+    Retorna los prompts más recientes por agente según system_type (desde la caché).
+    """
+    return dict(cache_prompts.obtener(system_type, lambda: _cargar_prompts_by_system(system_type)))
+
+
+def _cargar_prompts_by_system(system_type: str) -> dict:
+    """
+    Selecciona el registro con el ID más alto (más reciente) por agente para evitar
     problemas de comparación de timestamps con microsegundos.
     """
     session = Session()
@@ -475,6 +705,20 @@ def get_prompts_by_system(system_type: str):
         return {p.agent_name: p.prompt for p in results}
     finally:
         session.close()
+def get_prompt_versions(system_type: str, agent_name: str, limit: int = 2) -> list[str]:
+    """Textos de las últimas `limit` versiones del prompt de un agente (la más reciente primero)."""
+    session = Session()
+    try:
+        query = (
+            select(AgentPrompt.prompt)
+            .where(AgentPrompt.system_type == system_type, AgentPrompt.agent_name == agent_name)
+            .order_by(AgentPrompt.id.desc())
+            .limit(limit)
+        )
+        return list(session.execute(query).scalars().all())
+    finally:
+        session.close()
+
 def create_prompt_for_system(agent_name: str, prompt_text: str, system_type: str = "standard") -> int:
     """
     Inserta un nuevo prompt en la tabla, asociado a un system_type.
@@ -491,6 +735,7 @@ def create_prompt_for_system(agent_name: str, prompt_text: str, system_type: str
         session.add(new_prompt)
         session.commit()
         session.refresh(new_prompt)
+        cache_prompts.invalidar()
         return new_prompt.id
     except Exception:
         session.rollback()
@@ -498,11 +743,49 @@ def create_prompt_for_system(agent_name: str, prompt_text: str, system_type: str
     finally:
         session.close()
 
+def get_model_routes(system_type: str) -> dict[str, str]:
+    """Nivel de modelo por agente del pipeline (desde la caché de prompts)."""
+    return dict(cache_prompts.obtener(("rutas", system_type), lambda: _cargar_model_routes(system_type)))
+
+
+def _cargar_model_routes(system_type: str) -> dict[str, str]:
+    session = Session()
+    try:
+        filas = session.execute(
+            select(AgentModelRoute.agent_name, AgentModelRoute.tier)
+            .where(AgentModelRoute.system_type == system_type)
+        ).all()
+        return {agente: tier for agente, tier in filas}
+    finally:
+        session.close()
+
+
+def set_model_route(system_type: str, agent_name: str, tier: str) -> None:
+    """Asigna el nivel de modelo de un agente; invalida la caché de prompts (y el pool)."""
+    session = Session()
+    try:
+        stmt = pg_insert(AgentModelRoute).values(system_type=system_type, agent_name=agent_name, tier=tier)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["system_type", "agent_name"], set_={"tier": tier, "updated_at": func.now()}
+        ))
+        session.commit()
+        cache_prompts.invalidar()
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
 def get_multiagent_config() -> MultiAgentConfig | None:
     """
-    Devuelve la fila de configuración actual. 
+    Devuelve la fila de configuración actual (desde la caché).
     Si no existe, devuelve None.
     """
+    return cache_config.obtener("actual", _cargar_multiagent_config, firma=_firma_config)
+
+
+def _cargar_multiagent_config() -> MultiAgentConfig | None:
     session = Session()
     try:
         config = session.query(MultiAgentConfig).first()
@@ -534,6 +817,7 @@ def update_multiagent_config(
         config.update_interval = update_interval
         session.commit()
         session.refresh(config)
+        cache_config.invalidar()
         return config
     finally:
         session.close()
@@ -542,34 +826,32 @@ def update_multiagent_config(
 ## Funciones para consulta historia cde sessiones 
 
 
-# 1) Obtener todos los días donde hubo sesiones
+# 1) Obtener todos los días donde hubo sesiones (desde el rollup diario)
 def get_all_session_days_from_db():
     session = Session()
     try:
-        query = select(func.date(RoomSession.created_at)).distinct()
-        rows = session.execute(query).all()
-        return [str(r[0]) for r in rows]
+        query = select(SessionDaySummary.day).order_by(SessionDaySummary.day)
+        rows = session.execute(query).scalars().all()
+        return [str(d) for d in rows]
     finally:
         session.close()
 
 
-# 2) Obtener sesiones de un día
-def get_sessions_by_day_from_db(day_str: str):
+def get_session_day_summaries_from_db() -> list[dict]:
+    """Devuelve el rollup diario completo (una fila por día)."""
     session = Session()
     try:
-        query = (
-            select(RoomSession)
-            .where(func.date(RoomSession.created_at) == day_str)
-            .order_by(RoomSession.created_at)
-        )
-        rows = session.execute(query).scalars().all()
-
+        rows = session.execute(
+            select(SessionDaySummary).order_by(SessionDaySummary.day)
+        ).scalars().all()
         return [
             {
-                "id": str(r.id),
-                "room_name": r.room_name,
-                "topic": r.topic,
-                "created_at": r.created_at
+                "day": str(r.day),
+                "sessions": r.sessions,
+                "total_messages": r.total_messages,
+                "user_messages": r.user_messages,
+                "agent_messages": r.agent_messages,
+                "sessions_by_pipeline": r.sessions_by_pipeline,
             }
             for r in rows
         ]
@@ -577,6 +859,22 @@ def get_sessions_by_day_from_db(day_str: str):
         session.close()
 
 
+# 2) Obtener sesiones de un día (desde session_summaries, columna day indexada)
+def get_sessions_by_day_from_db(day_str: str):
+    day = datetime.strptime(day_str, "%Y-%m-%d").date()
+    session = Session()
+    try:
+        query = (
+            select(SessionSummary)
+            .where(SessionSummary.day == day)
+            .order_by(SessionSummary.started_at)
+        )
+        rows = session.execute(query).scalars().all()
+        return [_summary_to_dict(r) for r in rows]
+    finally:
+        session.close()
+
+
 # 3) Obtener mensajes por session_id
 def get_messages_by_session_from_db(session_id: UUID):
     session = Session()
@@ -599,4 +897,454 @@ def get_messages_by_session_from_db(session_id: UUID):
             for m in rows
         ]
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+def get_room_session_status(session_id: UUID) -> str | None:
+    """Estado ('active'/'closed') de una sesión, o None si no existe."""
+    session = Session()
+    try:
+        status = session.execute(
+            select(RoomSession.status).where(RoomSession.id == session_id)
+        ).scalar_one_or_none()
+        return status.value if status else None
+    finally:
+        session.close()
+
+
+# 4) Mensajes de usuario de varias sesiones (para reproducirlas offline)
+def get_recorded_user_messages_from_db(
+    session_ids: list[str] | None = None,
+    day_str: str | None = None,
+    limit_sessions: int | None = None,
+    include_agents: bool = False,
+) -> list[dict]:
+    """
+    Devuelve las sesiones seleccionadas con sus mensajes de usuario en orden
+    (también los de los agentes con include_agents=True).
+    Sin filtros: las sesiones cerradas más recientes.
+    """
+    session = Session()
+    try:
+        query = select(RoomSession).order_by(RoomSession.created_at.desc())
+        if session_ids:
+            query = query.where(RoomSession.id.in_(session_ids))
+        else:
+            query = query.where(RoomSession.status == SessionStatus.closed)
+        if day_str:
+            inicio, fin = _rango_dia(day_str)
+            query = query.where(RoomSession.created_at >= inicio, RoomSession.created_at < fin)
+        if limit_sessions:
+            query = query.limit(limit_sessions)
+        sesiones = session.execute(query).scalars().all()
+        if not sesiones:
+            return []
+
+        resultado = {
+            s.id: {
+                "id": str(s.id),
+                "room_name": s.room_name,
+                "topic": s.topic,
+                "pipeline_type": s.pipeline_type,
+                "mensajes": [],
+            }
+            for s in sesiones
+        }
+        query = (
+            select(Message.room_session_id, Message.user_id, Message.agent_name, Message.content, Message.created_at)
+            .where(Message.room_session_id.in_(list(resultado.keys())))
+            .order_by(Message.room_session_id, Message.created_at)
+        )
+        if not include_agents:
+            query = query.where(Message.sender_type == SenderType.user)
+        for f in session.execute(query).all():
+            mensaje = {
+                "user_id": f.user_id,
+                "content": f.content,
+                "created_at": f.created_at.isoformat() if f.created_at else None,
+            }
+            if include_agents:
+                mensaje["agent_name"] = f.agent_name
+            resultado[f.room_session_id]["mensajes"].append(mensaje)
+        return list(resultado.values())
+    finally:
+        session.close()
+
+
+def _rango_dia(day_str: str) -> tuple[datetime, datetime]:
+    """
+    Convierte 'YYYY-MM-DD' en el rango [inicio, fin) del día.
+    Filtrar por rango (en vez de func.date) permite usar el índice de created_at.
+    """
+    inicio = datetime.strptime(day_str, "%Y-%m-%d")
+    return inicio, inicio + timedelta(days=1)
+
+
+# 4) Puntos del timeline de un día en una sola consulta
+def get_day_timeline_from_db(day_str: str) -> list[dict]:
+    """
+    Devuelve, en una sola consulta, las sesiones del día unidas a sus mensajes.
+    Cada fila trae los datos de la sesión y (si existe) el timestamp y agente del mensaje,
+    ordenadas por inicio de sesión y luego por mensaje.
+    """
+    inicio, fin = _rango_dia(day_str)
+    session = Session()
+    try:
+        query = (
+            select(
+                RoomSession.id,
+                RoomSession.room_name,
+                RoomSession.created_at,
+                Message.created_at,
+                Message.agent_name,
+            )
+            .select_from(RoomSession)
+            .outerjoin(Message, Message.room_session_id == RoomSession.id)
+            .where(RoomSession.created_at >= inicio, RoomSession.created_at < fin)
+            .order_by(RoomSession.created_at, RoomSession.id, Message.created_at)
+        )
+        rows = session.execute(query).all()
+        return [
+            {
+                "session_id": str(r[0]),
+                "room_name": r[1],
+                "session_created_at": r[2],
+                "created_at": r[3],
+                "agent_name": r[4],
+            }
+            for r in rows
+        ]
+    finally:
+        session.close()
+
+
+# 5) Huella de los datos de un día (para invalidar cachés)
+def get_day_fingerprint_from_db(day_str: str) -> tuple | None:
+    """
+    Devuelve una huella barata de las sesiones del día:
+    (n° sesiones, n° mensajes, último id de mensaje, último timestamp de mensaje).
+    Si cambia cualquier sesión del día (nueva sesión o nuevo mensaje) cambia la huella.
+    Retorna None si no hay sesiones ese día.
+    """
+    inicio, fin = _rango_dia(day_str)
+    session = Session()
+    try:
+        query = (
+            select(
+                func.count(func.distinct(RoomSession.id)),
+                func.count(Message.id),
+                func.max(Message.id),
+                func.max(Message.created_at),
+            )
+            .select_from(RoomSession)
+            .outerjoin(Message, Message.room_session_id == RoomSession.id)
+            .where(RoomSession.created_at >= inicio, RoomSession.created_at < fin)
+        )
+        n_sesiones, n_mensajes, ultimo_id, ultimo_ts = session.execute(query).one()
+        if not n_sesiones:
+            return None
+        return (n_sesiones, n_mensajes, ultimo_id, ultimo_ts.isoformat() if ultimo_ts else None)
+    finally:
+        session.close()
+
+
+# 6) Serie de tiempo por minuto y categoría de emisor, calculada en la BD
+TIMELINE_CATEGORIAS = ("user", "orientador", "otros")
+
+def get_day_timeline_bins_from_db(day_str: str, acumulado: bool = False) -> list[dict]:
+    """
+    Devuelve, por sesión del día, la cantidad de mensajes agrupados por minuto
+    (date_trunc) y por categoría de emisor: usuario, Orientador u otros agentes.
+    El binning y los totales/acumulados se calculan en Postgres con funciones de ventana,
+    de modo que nunca se transfieren los mensajes individuales.
+
+    Formato columnar por sesión:
+      - minutos: offsets (en minutos) desde el inicio de la sesión, solo minutos con mensajes
+      - conteos: {categoria: [n por cada minuto]} (o acumulados si acumulado=True)
+      - totales: {categoria: total de la sesión}
+    """
+    inicio, fin = _rango_dia(day_str)
+    session = Session()
+    try:
+        minuto = func.date_trunc("minute", Message.created_at)
+        categoria = case(
+            (Message.sender_type == SenderType.user, "user"),
+            (func.lower(Message.agent_name) == "orientador", "orientador"),
+            else_="otros",
+        )
+        bins = (
+            select(
+                Message.room_session_id.label("sid"),
+                minuto.label("minuto"),
+                categoria.label("categoria"),
+                func.count().label("n"),
+            )
+            .join(RoomSession, RoomSession.id == Message.room_session_id)
+            .where(RoomSession.created_at >= inicio, RoomSession.created_at < fin)
+            .group_by(Message.room_session_id, minuto, categoria)
+            .cte("bins")
+        )
+        por_categoria = (bins.c.sid, bins.c.categoria)
+        offset = cast(
+            func.floor(func.extract("epoch", bins.c.minuto - func.date_trunc("minute", RoomSession.created_at)) / 60),
+            Integer,
+        )
+        query = (
+            select(
+                RoomSession.id,
+                RoomSession.room_name,
+                RoomSession.created_at,
+                offset.label("offset"),
+                bins.c.categoria,
+                bins.c.n,
+                func.sum(bins.c.n).over(partition_by=por_categoria, order_by=bins.c.minuto).label("acumulado"),
+                func.sum(bins.c.n).over(partition_by=por_categoria).label("total"),
+            )
+            .select_from(RoomSession)
+            .outerjoin(bins, bins.c.sid == RoomSession.id)
+            .where(RoomSession.created_at >= inicio, RoomSession.created_at < fin)
+            .order_by(RoomSession.created_at, RoomSession.id, bins.c.minuto)
+        )
+        rows = session.execute(query).all()
+    finally:
+        session.close()
+
+    sesiones: dict[str, dict] = {}
+    for sid, room_name, created_at, off, cat, n, acum, total in rows:
+        s = sesiones.get(str(sid))
+        if s is None:
+            s = sesiones[str(sid)] = {
+                "id": str(sid),
+                "room_name": room_name,
+                "inicio": created_at.isoformat(),
+                "minutos": [],
+                "conteos": {c: [] for c in TIMELINE_CATEGORIAS},
+                "totales": {c: 0 for c in TIMELINE_CATEGORIAS},
+            }
+        if cat is None:
+            continue  # sesión sin mensajes
+        if not s["minutos"] or s["minutos"][-1] != off:
+            s["minutos"].append(off)
+            for c in TIMELINE_CATEGORIAS:
+                s["conteos"][c].append(None)
+        s["conteos"][cat][-1] = int(acum if acumulado else n)
+        s["totales"][cat] = int(total)
+
+    # Rellenar huecos: 0 por minuto, o el último acumulado conocido
+    for s in sesiones.values():
+        for c in TIMELINE_CATEGORIAS:
+            previo = 0
+            serie = s["conteos"][c]
+            for i, v in enumerate(serie):
+                if v is None:
+                    serie[i] = previo if acumulado else 0
+                else:
+                    previo = v
+    return list(sesiones.values())
+
+
+#----------------------------- Resúmenes de sesiones --------------------------------------
+
+def _summary_to_dict(r: SessionSummary) -> dict:
+    return {
+        "id": str(r.room_session_id),
+        "room_name": r.room_name,
+        "topic": r.topic,
+        "created_at": r.started_at,
+        "closed_at": r.closed_at,
+        "status": r.status,
+        "pipeline_type": r.pipeline_type,
+        "first_message_at": r.first_message_at,
+        "last_message_at": r.last_message_at,
+        "duration_seconds": r.duration_seconds,
+        "startup_ms": r.startup_ms,
+        "total_messages": r.total_messages,
+        "user_messages": r.user_messages,
+        "agent_messages": r.agent_messages,
+        "messages_by_agent": r.messages_by_agent,
+        "messages_by_user": r.messages_by_user,
+        "participants": r.participants,
+    }
+
+
+def refresh_session_summary(session_id: str) -> dict | None:
+    """
+    Calcula (o recalcula) el resumen de una sesión y actualiza el rollup de su día.
+    Se llama al crear la sesión (fila vacía) y al cerrarla (conteos definitivos).
+    Retorna el resumen como dict, o None si la sesión no existe.
+    """
+    session = Session()
+    try:
+        rs = session.get(RoomSession, uuid.UUID(str(session_id)))
+        if rs is None:
+            return None
+
+        # Conteos por emisor (agente o usuario) en una sola agregación
+        emisor = func.coalesce(Message.agent_name, Message.user_id)
+        por_emisor = session.execute(
+            select(
+                Message.sender_type,
+                emisor,
+                func.count(),
+                func.min(Message.created_at),
+                func.max(Message.created_at),
+            )
+            .where(Message.room_session_id == rs.id)
+            .group_by(Message.sender_type, emisor)
+        ).all()
+
+        messages_by_agent, messages_by_user = {}, {}
+        first_at, last_at = None, None
+        for sender_type, nombre, n, primero, ultimo in por_emisor:
+            destino = messages_by_user if sender_type == SenderType.user else messages_by_agent
+            destino[nombre or "desconocido"] = n
+            first_at = primero if first_at is None else min(first_at, primero)
+            last_at = ultimo if last_at is None else max(last_at, ultimo)
+
+        fin = rs.closed_at or last_at
+        duration = int((fin - rs.created_at).total_seconds()) if fin else None
+        valores = {
+            "day": session.execute(select(func.date(rs.created_at))).scalar(),
+            "room_name": rs.room_name,
+            "topic": rs.topic,
+            "pipeline_type": rs.pipeline_type,
+            "status": rs.status.value,
+            "started_at": rs.created_at,
+            "closed_at": rs.closed_at,
+            "first_message_at": first_at,
+            "last_message_at": last_at,
+            "duration_seconds": duration,
+            "total_messages": sum(messages_by_user.values()) + sum(messages_by_agent.values()),
+            "user_messages": sum(messages_by_user.values()),
+            "agent_messages": sum(messages_by_agent.values()),
+            "messages_by_agent": messages_by_agent,
+            "messages_by_user": messages_by_user,
+            "participants": sorted(messages_by_user),
+            "updated_at": func.now(),
+        }
+        stmt = pg_insert(SessionSummary).values(room_session_id=rs.id, **valores)
+        stmt = stmt.on_conflict_do_update(index_elements=[SessionSummary.room_session_id], set_=valores)
+        session.execute(stmt)
+        _refresh_day_summary(session, valores["day"])
+        session.commit()
+
+        resumen = session.get(SessionSummary, rs.id)
+        session.refresh(resumen)
+        return _summary_to_dict(resumen)
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def record_session_startup(session_id: str, startup_ms: int) -> None:
+    """Guarda el tiempo de arranque de la sesión (no lo toca refresh_session_summary)."""
+    session = Session()
+    try:
+        session.execute(
+            update(SessionSummary)
+            .where(SessionSummary.room_session_id == uuid.UUID(str(session_id)))
+            .values(startup_ms=startup_ms)
+        )
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def _refresh_day_summary(session, day) -> None:
+    """Recalcula el rollup de un día a partir de session_summaries (solo filas de ese día)."""
+    n, total, users, agents = session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(SessionSummary.total_messages), 0),
+            func.coalesce(func.sum(SessionSummary.user_messages), 0),
+            func.coalesce(func.sum(SessionSummary.agent_messages), 0),
+        ).where(SessionSummary.day == day)
+    ).one()
+    por_pipeline = dict(session.execute(
+        select(func.coalesce(SessionSummary.pipeline_type, "desconocido"), func.count())
+        .where(SessionSummary.day == day)
+        .group_by(func.coalesce(SessionSummary.pipeline_type, "desconocido"))
+    ).all())
+
+    valores = {
+        "sessions": n,
+        "total_messages": total,
+        "user_messages": users,
+        "agent_messages": agents,
+        "sessions_by_pipeline": por_pipeline,
+        "updated_at": func.now(),
+    }
+    stmt = pg_insert(SessionDaySummary).values(day=day, **valores)
+    stmt = stmt.on_conflict_do_update(index_elements=[SessionDaySummary.day], set_=valores)
+    session.execute(stmt)
+
+
+def rebuild_session_summaries(only_missing: bool = True) -> int:
+    """
+    Rellena session_summaries para sesiones existentes (p. ej. anteriores a esta tabla).
+    Con only_missing=False recalcula todas. Retorna la cantidad de sesiones procesadas.
+    """
+    session = Session()
+    try:
+        query = select(RoomSession.id)
+        if only_missing:
+            query = query.where(
+                ~select(SessionSummary.room_session_id)
+                .where(SessionSummary.room_session_id == RoomSession.id)
+                .exists()
+            )
+        ids = session.execute(query).scalars().all()
+    finally:
+        session.close()
+
+    for sid in ids:
+        refresh_session_summary(str(sid))
+    return len(ids)
+
+
+#----------------------------- Exportación analítica -------------------------------------
+
+EXPORT_TABLES = {
+    "room_sessions": RoomSession,
+    "messages": Message,
+    "agent_prompts": AgentPrompt,
+}
+
+
+def _valor_exportable(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    return valor
+
+
+def stream_rows_for_export(table_name: str, desde: str | None = None, hasta: str | None = None,
+                           chunk_size: int = 5000, session_ids: list[str] | None = None):
+    """
+    Itera en bloques de `chunk_size` las filas de una tabla ordenadas por created_at,
+    con un cursor del lado del servidor (stream_results): nunca carga la tabla completa.
+    Cada fila es un dict con sus columnas más 'day' (date(created_at)).
+    desde/hasta: 'YYYY-MM-DD', hasta exclusivo. session_ids filtra messages por sesión.
+    """
+    model = EXPORT_TABLES[table_name]
+    query = (
+        select(*model.__table__.columns, func.date(model.created_at).label("day"))
+        .order_by(model.created_at, model.id)
+    )
+    if desde:
+        query = query.where(model.created_at >= _rango_dia(desde)[0])
+    if hasta:
+        query = query.where(model.created_at < _rango_dia(hasta)[0])
+    if session_ids is not None and model is Message:
+        query = query.where(Message.room_session_id.in_(session_ids))
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for filas in result.partitions():
+            yield [{k: _valor_exportable(v) for k, v in fila._mapping.items()} for fila in filas]
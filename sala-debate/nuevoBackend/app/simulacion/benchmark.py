@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from app.agentComponents.registry import INTERMEDIARIO_MAP
+from app.simulacion.modelos_simulados import FactoriaMedida, MetricasLLM
+from app.simulacion.replay import reproducir_sesion, _es_intervencion
+from app.simulacion.sesiones_grabadas import (
+    SesionGrabada, cargar_sesiones_db, cargar_sesiones_catalogo, cargar_corpus_csv
+)
+
+logger = logging.getLogger("benchmark")
+
+NOTA_ESCRITURAS_DB = (
+    "db_writes = inserciones de agentes contadas + 1 por mensaje de usuario (estimada: la "
+    "reproducción no pasa por el controlador de sockets); no incluye sesiones, resúmenes ni arranque."
+)
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def _resumen_latencias(valores: list[float]) -> dict:
+    return {
+        "n": len(valores),
+        "media": round(sum(valores) / len(valores), 4) if valores else 0.0,
+        "p50": round(_percentil(valores, 0.50), 4),
+        "p95": round(_percentil(valores, 0.95), 4),
+    }
+
+
+async def benchmark_pipeline(
+    pipeline_type: str,
+    sesiones: list[SesionGrabada],
+    prompts: dict,
+    tema_defecto: str,
+    llm: str = "mock",
+    prob_intervencion: float = 0.3,
+    latencia_llm: float = 0.0,
+    cassette_path: str | None = None,
+    concurrencia: int = 4,
+    config_multiagente=None,
+) -> dict:
+    """Reproduce todas las sesiones en un pipeline y agrega sus métricas de costo."""
+    metricas = MetricasLLM()
+    semaforo = asyncio.Semaphore(concurrencia)
+    resultados, fallidas = [], []
+
+    async def _una(sesion: SesionGrabada):
+        async with semaforo:
+            factoria = FactoriaMedida(metricas, llm, prob_intervencion, latencia_llm, cassette_path)
+            try:
+                resultados.append(await reproducir_sesion(
+                    sesion, pipeline_type, prompts, sesion.tema or tema_defecto,
+                    config_multiagente=config_multiagente, factory=factoria,
+                ))
+            except Exception as e:
+                logger.exception(f"[Benchmark {pipeline_type}] sesión {sesion.id}: {e}")
+                fallidas.append(sesion.id)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_una(s) for s in sesiones))
+    duracion = time.perf_counter() - inicio
+
+    msgs_usuario = sum(r["n_mensajes"] for r in resultados)
+    respuestas = [resp for r in resultados for m in r["mensajes"] for resp in m["respuestas"]]
+    llamadas = sum(metricas.llamadas.values())
+    tokens = sum(metricas.tokens_prompt.values())
+
+    def por_msg(x):
+        return round(x / msgs_usuario, 3) if msgs_usuario else 0.0
+
+    return {
+        "pipeline": pipeline_type,
+        "sesiones": len(resultados),
+        "sesiones_fallidas": fallidas,
+        "mensajes_usuario": msgs_usuario,
+        "llamadas_llm": llamadas,
+        "llamadas_llm_por_mensaje": por_msg(llamadas),
+        "tokens_prompt": tokens,
+        "tokens_prompt_por_mensaje": por_msg(tokens),
+        "tokens_respuesta": sum(metricas.tokens_respuesta.values()),
+        "intervenciones": sum(1 for resp in respuestas if _es_intervencion(resp)),
+        "mensajes_debug": sum(1 for resp in respuestas if not _es_intervencion(resp)),
+        # contadas: inserciones de agentes hechas por el intermediario (_insert_in_db)
+        "escrituras_db_agentes": sum(r["escrituras_db"] for r in resultados),
+        # estimadas, no contadas: el controlador de sockets inserta cada mensaje de usuario y la
+        # reproducción no pasa por él. Tampoco incluye sesiones, resúmenes ni tiempos de arranque.
+        "escrituras_db_totales": sum(r["escrituras_db"] for r in resultados) + msgs_usuario,
+        "nota_escrituras_db": NOTA_ESCRITURAS_DB,
+        "por_agente": {
+            agente: {
+                "llamadas": metricas.llamadas[agente],
+                "tokens_prompt": metricas.tokens_prompt[agente],
+                "tokens_respuesta": metricas.tokens_respuesta[agente],
+            }
+            for agente in sorted(metricas.llamadas)
+        },
+        "latencias": {
+            "bienvenida": _resumen_latencias([r["latencia_bienvenida"] for r in resultados]),
+            "mensaje": _resumen_latencias([m["latencia"] for r in resultados for m in r["mensajes"]]),
+            **{f"llm_{agente}": _resumen_latencias(v) for agente, v in sorted(metricas.latencias.items())},
+        },
+        "duracion_segundos": round(duracion, 3),
+    }
+
+
+async def benchmark(pipelines: list[str], sesiones: list[SesionGrabada], prompts_por_pipeline: dict,
+                    tema_defecto: str, **kwargs) -> list[dict]:
+    """Corre el benchmark de todos los pipelines en paralelo."""
+    return list(await asyncio.gather(*(
+        benchmark_pipeline(p, sesiones, prompts_por_pipeline.get(p, {}), tema_defecto, **kwargs)
+        for p in pipelines
+    )))
+
+
+def formatear_tabla(resultados: list[dict]) -> str:
+    columnas = [
+        ("pipeline", "pipeline"),
+        ("sesiones", "sesiones"),
+        ("msgs", "mensajes_usuario"),
+        ("llm", "llamadas_llm"),
+        ("llm/msg", "llamadas_llm_por_mensaje"),
+        ("tok_prompt", "tokens_prompt"),
+        ("tok/msg", "tokens_prompt_por_mensaje"),
+        ("interv", "intervenciones"),
+        ("db_writes*", "escrituras_db_totales"),
+        ("msg_p50", None),
+        ("msg_p95", None),
+    ]
+    filas = []
+    for r in resultados:
+        lat = r["latencias"]["mensaje"]
+        filas.append([
+            str(r[clave]) if clave else str(lat["p50" if titulo == "msg_p50" else "p95"])
+            for titulo, clave in columnas
+        ])
+    anchos = [max(len(t), *(len(f[i]) for f in filas)) for i, (t, _) in enumerate(columnas)]
+    lineas = [" | ".join(t.ljust(a) for (t, _), a in zip(columnas, anchos))]
+    lineas.append("-+-".join("-" * a for a in anchos))
+    lineas += [" | ".join(v.ljust(a) for v, a in zip(f, anchos)) for f in filas]
+    lineas.append(f"* {NOTA_ESCRITURAS_DB}")
+    return "\n".join(lineas)
+
+
+def _cargar_prompts(pipelines: list[str], ruta: str | None) -> dict:
+    """
+    JSON {pipeline: {agente: prompt}} o {agente: prompt} (el mismo para todos).
+    Sin archivo se usan los prompts vigentes en la BD.
+    """
+    if ruta:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        if all(isinstance(v, dict) for v in datos.values()):
+            return datos
+        return {p: datos for p in pipelines}
+    from app.models.models import get_prompts_by_system
+    return {p: get_prompts_by_system(p) for p in pipelines}
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el costo de los pipelines sobre sesiones grabadas.")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--db", action="store_true", help="Sesiones cerradas de la tabla messages")
+    origen.add_argument("--logs", help="Directorio de logs catalogados (ver app.utils.log_catalog)")
+    origen.add_argument("--corpus", help="CSV tipo chat_complete.csv")
+    parser.add_argument("--sesiones", nargs="*", help="IDs de sesión (con --db)")
+    parser.add_argument("--dia", help="YYYY-MM-DD (con --db)")
+    parser.add_argument("--limite", type=int, default=20, help="Máximo de sesiones")
+    parser.add_argument("--pipelines", nargs="*", default=list(INTERMEDIARIO_MAP.keys()),
+                        choices=list(INTERMEDIARIO_MAP.keys()))
+    parser.add_argument("--llm", choices=["mock", "cassette"], default="mock")
+    parser.add_argument("--cassette", help="Ruta del cassette (con --llm cassette)")
+    parser.add_argument("--prob-intervencion", type=float, default=0.3, help="Modelo simulado: prob. de escalar")
+    parser.add_argument("--latencia-llm", type=float, default=0.0,
+                        help="Modelo simulado: segundos por llamada; cassette: >0 reproduce la latencia grabada")
+    parser.add_argument("--prompts", help="JSON de prompts; por defecto los de la BD")
+    parser.add_argument("--tema", default="Tema de discusión", help="Tema si la sesión no trae uno")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Sesiones simultáneas por pipeline")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        sesiones = cargar_sesiones_db(args.sesiones, args.dia, args.limite)
+    elif args.logs:
+        sesiones = cargar_sesiones_catalogo(args.logs, limite=args.limite)
+    else:
+        sesiones = cargar_corpus_csv(args.corpus)[:args.limite]
+    if not sesiones:
+        parser.error("No se encontraron sesiones grabadas")
+
+    resultados = asyncio.run(benchmark(
+        args.pipelines, sesiones, _cargar_prompts(args.pipelines, args.prompts), args.tema,
+        llm=args.llm, prob_intervencion=args.prob_intervencion, latencia_llm=args.latencia_llm,
+        cassette_path=args.cassette, concurrencia=args.concurrencia,
+    ))
+
+    print(formatear_tabla(resultados))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"[✅ Resultados]: {args.salida}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import time
+from agentscope.message import Msg
+from app.agentComponents.utils.utilsForAgents import filter_agents
+from app.agentComponents.veredictos import INSTRUCCION_VEREDICTO, Veredicto, parsear_veredicto
+from app.simulacion.benchmark import _resumen_latencias
+from app.simulacion.modelos_simulados import FactoriaMedida, MetricasLLM
+
+PROMPT_CLASIFICADOR = (
+    "Eres el Validador de una discusión grupal sobre un caso ético. Lee los mensajes y "
+    "responde en una línea si los argumentos están bien sustentados. Si no lo están, "
+    "menciona a @Orientador para que intervenga."
+)
+
+MENSAJES = [
+    "Creo que Sebastián debería informar el error en la evaluación.",
+    "Pero si lo informa, sus compañeros pueden perder puntos.",
+    "La honestidad es más importante que la nota.",
+    "No estoy segura, depende de si el profesor lo va a notar igual.",
+    "Igual es injusto aprovecharse de un error.",
+]
+
+
+async def medir_tipo(simple: bool, rondas: int, mensajes_por_ronda: int, latencia: float,
+                     veredicto: bool = False) -> dict:
+    """
+    Simula el patrón de un clasificador: observa una ventana de mensajes y
+    luego responde una vez. Mide tiempo por respuesta, peticiones al modelo y,
+    con `veredicto`, tokens de respuesta y fallos de validación del Veredicto.
+    """
+    metricas = MetricasLLM()
+    factoria = FactoriaMedida(metricas, llm="mock", prob_intervencion=0.3, latencia=latencia)
+    prompt = PROMPT_CLASIFICADOR + INSTRUCCION_VEREDICTO if veredicto else PROMPT_CLASIFICADOR
+    agente = factoria.create_agent("Validador", prompt, simple=simple)
+    agente.set_console_output_enabled(False)
+
+    tiempos = []
+    intervenciones = fallos = 0
+    for ronda in range(rondas):
+        for i in range(mensajes_por_ronda):
+            texto = MENSAJES[(ronda + i) % len(MENSAJES)]
+            await agente.observe(Msg(name=f"estudiante_{i % 4}", role="user", content=texto))
+        inicio = time.perf_counter()
+        pedido = Msg(name="Host", role="system", content="Evalúa la ventana.")
+        if veredicto:
+            res = await agente(pedido, structured_model=Veredicto)
+            v = parsear_veredicto(res, "Validador")
+            fallos += v is None
+            intervenciones += bool(v and v.intervenir)
+        else:
+            res = await agente(pedido)
+            intervenciones += bool(filter_agents(str(res.get_text_content()), [agente]))
+        tiempos.append(time.perf_counter() - inicio)
+
+    llamadas = metricas.llamadas["Validador"]
+    # sobrecosto del agente: tiempo de respuesta menos el tiempo dentro del modelo
+    dentro_modelo = sum(metricas.latencias["Validador"])
+    return {
+        "tipo": "simple" if simple else "react",
+        "salida": "veredicto" if veredicto else "texto",
+        "respuestas": rondas,
+        "intervenciones": intervenciones,
+        "fallos_parseo": fallos,
+        "peticiones_modelo": llamadas,
+        "peticiones_por_respuesta": round(llamadas / rondas, 3) if rondas else 0.0,
+        "tokens_prompt_por_respuesta": round(metricas.tokens_prompt["Validador"] / rondas, 1) if rondas else 0.0,
+        "tokens_respuesta_por_respuesta": round(metricas.tokens_respuesta["Validador"] / rondas, 1) if rondas else 0.0,
+        "latencia_respuesta_s": _resumen_latencias(tiempos),
+        "sobrecosto_agente_ms": round((sum(tiempos) - dentro_modelo) / rondas * 1000, 3) if rondas else 0.0,
+    }
+
+
+async def comparar(rondas: int = 50, mensajes_por_ronda: int = 5, latencia: float = 0.0,
+                   veredicto: bool = False) -> list[dict]:
+    return [await medir_tipo(simple, rondas, mensajes_por_ronda, latencia, veredicto) for simple in (False, True)]
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara ReActAgent y AgenteSimple en el rol de clasificador.")
+    parser.add_argument("--rondas", type=int, default=50, help="Respuestas por tipo de agente")
+    parser.add_argument("--mensajes", type=int, default=5, help="Mensajes observados antes de cada respuesta")
+    parser.add_argument("--latencia-llm", type=float, default=0.0, help="Segundos por llamada del modelo simulado")
+    parser.add_argument("--veredicto", action="store_true", help="Pide el Veredicto estructurado en vez de texto libre")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    resultados = asyncio.run(comparar(args.rondas, args.mensajes, args.latencia_llm, args.veredicto))
+    for r in resultados:
+        lat = r["latencia_respuesta_s"]
+        print(f"{r['tipo']:<7} {r['salida']:<9} peticiones/resp={r['peticiones_por_respuesta']:<5} "
+              f"tok/resp={r['tokens_prompt_por_respuesta']:<8} tok_resp={r['tokens_respuesta_por_respuesta']:<6} "
+              f"fallos={r['fallos_parseo']} p50={lat['p50']:.4f}s p95={lat['p95']:.4f}s "
+              f"sobrecosto={r['sobrecosto_agente_ms']} ms")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"[✅ Resultados]: {args.salida}")
+
+
+if __name__ == "__main__":
+    _main()
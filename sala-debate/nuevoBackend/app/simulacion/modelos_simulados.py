@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from agentscope.model import ChatModelBase, ChatResponse
+from agentscope.message import TextBlock, ToolUseBlock
+from app.agentComponents.cassette import ChatUsage, clave_prompt, normalizar_contenido
+from app.agentComponents.factory_agents import ReActAgentFactory
+from app.agentComponents.utils.utilsForAgents import contar_tokens
+
+# Agentes que deciden si escalar al Orientador (con un Veredicto estructurado o mencionando @Orientador)
+AGENTES_EVALUADORES = ("validador", "curador")
+
+
+def tokens_prompt(messages: list[dict]) -> int:
+    """Tokens de entrada de una llamada (texto de cada mensaje + ~4 por mensaje de formato)."""
+    return sum(contar_tokens(normalizar_contenido(m.get("content"))) + 4 for m in messages)
+
+
+def datos_simulados(esquema: dict, positivo: bool) -> dict:
+    """
+    Datos válidos para un esquema JSON de salida estructurada: booleanos = `positivo`,
+    enums = primer valor (o el segundo si `positivo`), enteros 0/1, textos fijos.
+    """
+    definiciones = esquema.get("$defs", {})
+    datos = {}
+    for nombre, prop in esquema.get("properties", {}).items():
+        if "$ref" in prop:
+            prop = definiciones.get(prop["$ref"].split("/")[-1], {})
+        if "enum" in prop:
+            datos[nombre] = prop["enum"][1 if positivo and len(prop["enum"]) > 1 else 0]
+        elif prop.get("type") == "boolean":
+            datos[nombre] = positivo
+        elif prop.get("type") == "integer":
+            datos[nombre] = int(positivo)
+        else:
+            datos[nombre] = "Simulado."
+    return datos
+
+
+class ModeloSimulado(ChatModelBase):
+    """
+    LLM falso y determinista: la respuesta depende solo del hash del prompt.
+    Los evaluadores (Validador/Curador) escalan al Orientador con probabilidad
+    `prob_intervencion`; el resto de agentes responde un texto fijo.
+    """
+
+    def __init__(self, nombre_agente: str, prob_intervencion: float = 0.3,
+                 latencia: float = 0.0, semilla: str = ""):
+        super().__init__(model_name="simulado", stream=False)
+        self.nombre_agente = nombre_agente
+        self.prob_intervencion = prob_intervencion
+        self.latencia = latencia
+        self.semilla = semilla
+
+    async def __call__(self, messages: list[dict], tools=None, tool_choice=None,
+                       structured_model=None, **kwargs) -> ChatResponse:
+        inicio = time.perf_counter()
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        clave = clave_prompt(self.model_name, messages) + self.semilla
+        azar = int(hashlib.sha256(clave.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+        metadata = None
+        # ReActAgent pide la salida estructurada como llamada a la herramienta generate_response
+        # (y después un texto con tool_choice="none")
+        herramienta = next((t["function"] for t in tools or []
+                            if t.get("function", {}).get("name") == "generate_response"), None)
+        estructurada = structured_model is not None or (herramienta is not None and tool_choice != "none")
+        if self.nombre_agente.lower() in AGENTES_EVALUADORES and estructurada:
+            # salida estructurada: datos válidos para el esquema pedido (como los devuelve la API)
+            esquema = structured_model.model_json_schema() if structured_model else herramienta["parameters"]
+            metadata = datos_simulados(esquema, azar < self.prob_intervencion)
+            texto = json.dumps(metadata, ensure_ascii=False)
+            if structured_model is None:
+                return ChatResponse(
+                    content=[ToolUseBlock(type="tool_use", id=clave[:12], name="generate_response", input=metadata)],
+                    usage=ChatUsage(input_tokens=tokens_prompt(messages), output_tokens=contar_tokens(texto),
+                                    time=time.perf_counter() - inicio),
+                )
+        elif self.nombre_agente.lower() in AGENTES_EVALUADORES:
+            texto = ("Hay argumentos sin sustento. @Orientador" if azar < self.prob_intervencion
+                     else "La discusión avanza bien, no se requiere intervención.")
+        else:
+            texto = f"[{self.nombre_agente}] Mensaje simulado."
+
+        return ChatResponse(
+            content=[TextBlock(type="text", text=texto)],
+            usage=ChatUsage(
+                input_tokens=tokens_prompt(messages),
+                output_tokens=contar_tokens(texto),
+                time=time.perf_counter() - inicio,
+            ),
+            metadata=metadata,
+        )
+
+
+class MetricasLLM:
+    """Acumula llamadas, tokens y latencias por agente."""
+
+    def __init__(self):
+        self.llamadas = defaultdict(int)
+        self.tokens_prompt = defaultdict(int)
+        self.tokens_respuesta = defaultdict(int)
+        self.latencias = defaultdict(list)
+
+    def registrar(self, agente: str, tokens_in: int, tokens_out: int, latencia: float):
+        self.llamadas[agente] += 1
+        self.tokens_prompt[agente] += tokens_in
+        self.tokens_respuesta[agente] += tokens_out
+        self.latencias[agente].append(latencia)
+
+
+class ModeloMedido(ChatModelBase):
+    """Envuelve el modelo de un agente y registra cada llamada en un MetricasLLM."""
+
+    def __init__(self, modelo: ChatModelBase, agente: str, metricas: MetricasLLM):
+        super().__init__(model_name=modelo.model_name, stream=False)
+        self.modelo = modelo
+        self.agente = agente
+        self.metricas = metricas
+
+    async def __call__(self, messages: list[dict], tools=None, tool_choice=None,
+                       structured_model=None, **kwargs) -> ChatResponse:
+        inicio = time.perf_counter()
+        respuesta = await self.modelo(messages, tools=tools, tool_choice=tool_choice,
+                                      structured_model=structured_model, **kwargs)
+        texto = " ".join(b.get("text", "") for b in respuesta.content if isinstance(b, dict))
+        self.metricas.registrar(
+            self.agente, tokens_prompt(messages), contar_tokens(texto), time.perf_counter() - inicio
+        )
+        return respuesta
+
+
+class FactoriaMedida(ReActAgentFactory):
+    """
+    Fábrica de agentes para simulaciones: modelo simulado (llm="mock") o
+    cassette grabado (llm="cassette"), medido con ModeloMedido.
+    """
+
+    def __init__(self, metricas: MetricasLLM, llm: str = "mock", prob_intervencion: float = 0.3,
+                 latencia: float = 0.0, cassette_path: str | None = None, semilla: str = ""):
+        super().__init__(
+            cassette_mode="replay" if llm == "cassette" else "",
+            cassette_path=cassette_path,
+            cassette_latencia=1.0 if llm == "cassette" and latencia else 0.0,
+        )
+        self.metricas = metricas
+        self.llm = llm
+        self.prob_intervencion = prob_intervencion
+        self.latencia = latencia
+        self.semilla = semilla
+
+    def _modelo_para(self, nombre: str) -> ChatModelBase:
+        if self.llm == "mock":
+            modelo = ModeloSimulado(nombre, self.prob_intervencion, self.latencia, self.semilla)
+        else:
+            modelo = self.crear_modelo()
+        return ModeloMedido(modelo, nombre, self.metricas)
+
+    def create_agent(self, name: str, sys_prompt: str, model=None, simple: bool = False):
+        return super().create_agent(name, sys_prompt, model or self._modelo_para(name), simple)
@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from types import SimpleNamespace
+from app.agentComponents.registry import INTERMEDIARIO_MAP
+from app.simulacion.sesiones_grabadas import SesionGrabada, cargar_corpus_csv
+
+logger = logging.getLogger("replay")
+
+
+class SioColector:
+    """Sustituto de socketio.AsyncServer: acumula lo que el intermediario emite a la sala."""
+
+    def __init__(self):
+        self.evaluaciones: list[dict] = []
+
+    async def emit(self, evento, data=None, room=None, **kwargs):
+        if evento == "evaluacion" and data:
+            self.evaluaciones.extend(data if isinstance(data, list) else [data])
+
+    def extraer(self) -> list[dict]:
+        nuevas, self.evaluaciones = self.evaluaciones, []
+        return nuevas
+
+
+def _es_intervencion(r: dict) -> bool:
+    """Intervención visible para los estudiantes (no los mensajes de debug del Validador/Curador)."""
+    return not r.get("debug", True)
+
+
+async def reproducir_sesion(
+    sesion: SesionGrabada,
+    pipeline_type: str,
+    prompts: dict,
+    tema: str,
+    config_multiagente=None,
+    idioma: str = "español",
+    factory=None,
+) -> dict:
+    """
+    Reproduce una conversación grabada en el intermediario del pipeline indicado,
+    mensaje a mensaje, esperando que la cola del intermediario se vacíe antes del siguiente.
+    No escribe en la base de datos (room_session_id=None) ni genera bitácora, pero
+    cuenta las inserciones de agentes que habría hecho el intermediario (las de los
+    mensajes de usuario las hace el controlador de sockets y no pasan por aquí). El timer no se inicia: solo se reproduce
+    el flujo disparado por mensajes. `factory` permite inyectar agentes simulados.
+    """
+    sio = SioColector()
+    intermediario = INTERMEDIARIO_MAP[pipeline_type](
+        prompts={k: v.replace("{tema}", tema) for k, v in prompts.items()},
+        sio=sio,
+        sala=f"replay-{sesion.id}",
+        room_session_id=None,
+        config_multiagente=config_multiagente,
+        factory=factory,
+    )
+    intermediario.pipeLine.registrar_journal = False
+
+    escrituras_db = 0
+    insertar_original = intermediario._insert_in_db
+
+    def _contar_insercion(*args, **kwargs):
+        nonlocal escrituras_db
+        escrituras_db += 1
+        return insertar_original(*args, **kwargs)
+
+    intermediario._insert_in_db = _contar_insercion
+
+    inicio = time.perf_counter()
+    resultado = {
+        "team_id": sesion.id,
+        "pipeline": pipeline_type,
+        "n_mensajes": len(sesion.mensajes),
+        "bienvenida": [],
+        "mensajes": [],
+        "primera_intervencion": None,
+    }
+    try:
+        t0 = time.perf_counter()
+        await intermediario.start_session(tema, sesion.usuarios, idioma)
+        resultado["bienvenida"] = sio.extraer()
+        resultado["latencia_bienvenida"] = round(time.perf_counter() - t0, 4)
+
+        for i, m in enumerate(sesion.mensajes):
+            t0 = time.perf_counter()
+            await intermediario.enqueue(m.autor, m.contenido, i)
+            await intermediario.message_queue.join()
+            latencia = time.perf_counter() - t0
+            # lo lanzado fuera de la cola (cascada de ventana) se atribuye a este mensaje
+            await intermediario.esperar_tareas()
+            respuestas = sio.extraer()
+            resultado["mensajes"].append({
+                "indice": i,
+                "autor": m.autor,
+                "mensaje": m.contenido,
+                "timestamp": m.timestamp,
+                "latencia": round(latencia, 4),
+                "respuestas": respuestas,
+            })
+            if resultado["primera_intervencion"] is None:
+                intervencion = next((r for r in respuestas if _es_intervencion(r)), None)
+                if intervencion:
+                    resultado["primera_intervencion"] = {
+                        "mensaje_indice": i,
+                        "mensajes_antes_intervencion": i,
+                        "agente": intervencion.get("agente"),
+                        "respuesta": intervencion.get("respuesta"),
+                        "tiempo_mensaje": m.timestamp,
+                    }
+    finally:
+        await intermediario.stop_session()
+        intermediario.processing_task.cancel()
+
+    resultado["escrituras_db"] = escrituras_db
+    resultado["duracion_segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def _escribir_json_atomico(ruta: str, datos: dict) -> None:
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def escribir_resumen(dir_salida: str) -> str:
+    """Resume en CSV la primera intervención de cada equipo ya reproducido."""
+    ruta = os.path.join(dir_salida, "resumen.csv")
+    columnas = ["team_id", "pipeline", "n_mensajes", "mensaje_indice", "mensajes_antes_intervencion",
+                "agente", "respuesta", "tiempo_mensaje", "duracion_segundos"]
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columnas, extrasaction="ignore")
+        writer.writeheader()
+        for nombre in sorted(os.listdir(dir_salida)):
+            if not nombre.startswith("team_") or not nombre.endswith(".json"):
+                continue
+            with open(os.path.join(dir_salida, nombre), "r", encoding="utf-8") as fr:
+                r = json.load(fr)
+            writer.writerow({**r, **(r.get("primera_intervencion") or {})})
+    return ruta
+
+
+async def reproducir_corpus(
+    sesiones: list[SesionGrabada],
+    pipeline_type: str,
+    prompts: dict,
+    tema: str,
+    dir_salida: str,
+    concurrencia: int = 4,
+    config_multiagente=None,
+    idioma: str = "español",
+) -> dict:
+    """
+    Reproduce varias sesiones en paralelo (como máximo `concurrencia` a la vez).
+    Cada equipo terminado se guarda en <dir_salida>/team_<id>.json, que sirve también
+    de checkpoint: al relanzar, los equipos con resultado se omiten.
+    """
+    os.makedirs(dir_salida, exist_ok=True)
+    pendientes = [
+        s for s in sesiones
+        if not os.path.exists(os.path.join(dir_salida, f"team_{s.id}.json"))
+    ]
+    estado = {"total": len(sesiones), "omitidos": len(sesiones) - len(pendientes), "completados": 0, "fallidos": []}
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def _una(sesion: SesionGrabada):
+        async with semaforo:
+            try:
+                resultado = await reproducir_sesion(sesion, pipeline_type, prompts, tema, config_multiagente, idioma)
+                ruta = os.path.join(dir_salida, f"team_{sesion.id}.json")
+                await asyncio.to_thread(_escribir_json_atomico, ruta, resultado)
+                estado["completados"] += 1
+                print(f"[✅ Replay {pipeline_type}] equipo {sesion.id} "
+                      f"({estado['completados']}/{len(pendientes)}) en {resultado['duracion_segundos']}s")
+            except Exception as e:
+                logger.exception(f"[Replay] Error en equipo {sesion.id}: {e}")
+                estado["fallidos"].append(sesion.id)
+
+    await asyncio.gather(*(_una(s) for s in pendientes))
+    estado["resumen"] = await asyncio.to_thread(escribir_resumen, dir_salida)
+    return estado
+
+
+def _cargar_prompts_y_config(pipeline_type: str, ruta_prompts: str | None, ventana: int | None):
+    """Prompts desde un JSON {agente: prompt} o, si no se indica, los vigentes en la BD."""
+    if ruta_prompts:
+        with open(ruta_prompts, "r", encoding="utf-8") as f:
+            prompts = json.load(f)
+        config = None
+    else:
+        from app.models.models import get_prompts_by_system, get_multiagent_config
+        prompts = get_prompts_by_system(pipeline_type)
+        config = get_multiagent_config()
+    if ventana is not None:
+        config = SimpleNamespace(ventana_mensajes=ventana)
+    return prompts, config
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce un corpus de chats grabados en un pipeline de nuevoBackend.")
+    parser.add_argument("--corpus", required=True, help="CSV tipo chat_complete.csv (sep ';')")
+    parser.add_argument("--pipeline", required=True, choices=list(INTERMEDIARIO_MAP.keys()))
+    parser.add_argument("--tema", help="Texto del caso discutido")
+    parser.add_argument("--tema-archivo", help="Archivo con el texto del caso")
+    parser.add_argument("--prompts", help="JSON {agente: prompt}; por defecto los de la BD")
+    parser.add_argument("--ventana", type=int, help="Sobrescribe ventana_mensajes")
+    parser.add_argument("--equipos", nargs="*", help="Solo estos team_id")
+    parser.add_argument("--limite", type=int, help="Solo los primeros N equipos")
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--idioma", default="español")
+    parser.add_argument("--salida", default="./replays", help="Directorio de resultados")
+    args = parser.parse_args(argv)
+
+    if args.tema_archivo:
+        with open(args.tema_archivo, "r", encoding="utf-8") as f:
+            tema = f.read().strip()
+    elif args.tema:
+        tema = args.tema
+    else:
+        parser.error("Se requiere --tema o --tema-archivo")
+
+    sesiones = cargar_corpus_csv(args.corpus, equipos=args.equipos)
+    if args.limite:
+        sesiones = sesiones[:args.limite]
+    prompts, config = _cargar_prompts_y_config(args.pipeline, args.prompts, args.ventana)
+
+    estado = asyncio.run(reproducir_corpus(
+        sesiones, args.pipeline, prompts, tema,
+        dir_salida=os.path.join(args.salida, args.pipeline),
+        concurrencia=args.concurrencia,
+        config_multiagente=config,
+        idioma=args.idioma,
+    ))
+    print(json.dumps(estado, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _main()
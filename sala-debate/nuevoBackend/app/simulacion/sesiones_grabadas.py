@@ -0,0 +1,83 @@
+import csv
+from dataclasses import dataclass, field
+
+
+@dataclass
+class MensajeGrabado:
+    autor: str
+    contenido: str
+    timestamp: str | None = None
+
+
+@dataclass
+class SesionGrabada:
+    """Conversación grabada de un equipo/sala, lista para reproducirse en un pipeline."""
+    id: str
+    mensajes: list[MensajeGrabado] = field(default_factory=list)
+    tema: str | None = None
+
+    @property
+    def usuarios(self) -> list[str]:
+        return list(dict.fromkeys(m.autor for m in self.mensajes))
+
+
+def cargar_corpus_csv(ruta: str, sep: str = ";", equipos: list[str] | None = None) -> list[SesionGrabada]:
+    """
+    Carga un corpus tipo experimentacion/chat_complete.csv
+    (columnas team_id, user_id, message, time) agrupado por equipo y ordenado por tiempo.
+    Los mensajes vacíos se descartan.
+    """
+    sesiones: dict[str, SesionGrabada] = {}
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        for fila in csv.DictReader(f, delimiter=sep):
+            team_id = str(fila["team_id"])
+            if equipos and team_id not in equipos:
+                continue
+            mensaje = (fila.get("message") or "").strip()
+            if not mensaje:
+                continue
+            sesiones.setdefault(team_id, SesionGrabada(id=team_id)).mensajes.append(
+                MensajeGrabado(autor=f"user_{fila['user_id']}", contenido=mensaje, timestamp=fila.get("time"))
+            )
+
+    for s in sesiones.values():
+        # timestamps ISO: el orden lexicográfico coincide con el cronológico
+        s.mensajes.sort(key=lambda m: m.timestamp or "")
+    return sorted(sesiones.values(), key=lambda s: int(s.id) if s.id.isdigit() else s.id)
+
+
+def cargar_sesiones_db(session_ids: list[str] | None = None, dia: str | None = None,
+                       limite: int | None = None) -> list[SesionGrabada]:
+    """Sesiones grabadas en la tabla messages (solo los mensajes de usuario)."""
+    from app.models.models import get_recorded_user_messages_from_db
+
+    return [
+        SesionGrabada(
+            id=s["id"],
+            tema=s["topic"],
+            mensajes=[
+                MensajeGrabado(autor=m["user_id"] or "user", contenido=m["content"], timestamp=m["created_at"])
+                for m in s["mensajes"]
+            ],
+        )
+        for s in get_recorded_user_messages_from_db(session_ids, dia, limite)
+    ]
+
+
+def cargar_sesiones_catalogo(directorio_logs: str = "./logs", **filtros) -> list[SesionGrabada]:
+    """
+    Sesiones desde el catálogo de logs (ver app.utils.log_catalog).
+    filtros: los de LogCatalog.buscar (sala, pipeline, tema, desde, hasta, min_mensajes, limite).
+    """
+    from app.utils.log_catalog import LogCatalog
+
+    sesiones = []
+    for entrada, registro in LogCatalog(directorio_logs).iterar(**filtros):
+        mensajes = [
+            MensajeGrabado(autor=m.get("autor") or "user", contenido=m["contenido"], timestamp=m.get("timestamp"))
+            for m in registro.get("mensajes", [])
+            if m.get("agent") is False and m.get("contenido")
+        ]
+        if mensajes:
+            sesiones.append(SesionGrabada(id=entrada.origen, tema=registro.get("caso"), mensajes=mensajes))
+    return sesiones
@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.agentComponents.registry import INTERMEDIARIO_MAP
+from app.agentComponents.timer import Timer
+from app.simulacion.benchmark import _cargar_prompts
+from app.simulacion.modelos_simulados import FactoriaMedida, MetricasLLM
+from app.simulacion.replay import SioColector, _es_intervencion
+from app.simulacion.sesiones_grabadas import (
+    SesionGrabada, cargar_sesiones_db, cargar_sesiones_catalogo, cargar_corpus_csv
+)
+
+logger = logging.getLogger("sweep")
+
+# El modelo simulado ignora el prompt: basta un texto por agente (se puede pasar --prompts
+# para que los tokens de prompt reportados correspondan a los reales)
+PROMPTS_SIMULADOS = {"Validador": "Eres el Validador.", "Curador": "Eres el Curador.", "Orientador": "Eres el Orientador."}
+
+
+@dataclass(frozen=True)
+class ConfigSimulacion:
+    """Un punto de la grilla. Los valores por defecto son los de producción."""
+    pipeline: str
+    ventana_mensajes: int = 5
+    update_interval: int = 60
+    min_cooldown: int = 60
+    max_cooldown: int = 600
+    inactividad_umbral: int | None = None       # INACTIVITY_THRESHOLD_SECONDS (None = el del pipeline)
+    inactividad_cooldown: int | None = None     # INACTIVITY_MENTION_COOLDOWN_SECONDS
+    participacion_minima: float | None = None   # INACTIVITY_MIN_RELATIVE_PARTICIPATION
+    fase_segundos: int | None = None            # duración de la sesión (None = duración grabada)
+
+
+# --- Reloj virtual ---
+# Las sesiones se simulan a tiempo virtual: time.time() en los intermediarios y
+# datetime.now() en los pipelines leen este reloj, que avanza con los timestamps
+# grabados. Se instala por proceso (cada worker simula sus sesiones en serie).
+class RelojVirtual:
+    def __init__(self):
+        self.ahora = datetime(2000, 1, 1)
+
+    def time(self) -> float:
+        return self.ahora.timestamp()
+
+
+_reloj = RelojVirtual()
+
+
+class _DatetimeVirtual(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return _reloj.ahora
+
+
+def _instalar_reloj_virtual():
+    from app.agentComponents.intermediarios import intermediarioStandard, intermediarioToulmin, intermediarioAbogado
+    from app.agentComponents.pipelines import base_pipeline, standardPipeline, abogadoPipeline
+
+    for modulo in (intermediarioStandard, intermediarioToulmin, intermediarioAbogado):
+        modulo.time = SimpleNamespace(time=_reloj.time)
+    for modulo in (base_pipeline, standardPipeline, abogadoPipeline):
+        modulo.datetime = _DatetimeVirtual
+
+
+def _parse_ts(ts: str | None) -> datetime | None:
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _eventos_sesion(sesion: SesionGrabada, config: ConfigSimulacion) -> tuple[datetime, int, list]:
+    """Línea de tiempo (inicio, duración, [(offset_s, tipo, dato)]) con mensajes y ticks del timer."""
+    tiempos = [_parse_ts(m.timestamp) for m in sesion.mensajes]
+    inicio = next((t for t in tiempos if t), datetime(2000, 1, 1))
+    offsets, previo = [], 0.0
+    for t in tiempos:
+        # mensajes sin timestamp: justo después del anterior
+        previo = max(previo, (t - inicio).total_seconds()) if t else previo + 1
+        offsets.append(previo)
+
+    duracion = config.fase_segundos or int(offsets[-1] if offsets else 0) + config.update_interval
+    eventos = [(off, 1, m) for off, m in zip(offsets, sesion.mensajes)]
+    eventos += [(float(k), 0, None) for k in range(0, duracion + 1, config.update_interval)]
+    eventos.sort(key=lambda e: (e[0], e[1]))
+    return inicio, duracion, eventos
+
+
+async def _simular_sesion(sesion: SesionGrabada, config: ConfigSimulacion, prompts: dict,
+                          metricas: MetricasLLM, prob_intervencion: float) -> dict:
+    _reloj.ahora, duracion, eventos = _eventos_sesion(sesion, config)
+    inicio = _reloj.ahora
+
+    sio = SioColector()
+    intermediario = INTERMEDIARIO_MAP[config.pipeline](
+        prompts=prompts,
+        sio=sio,
+        sala=f"sweep-{sesion.id}",
+        room_session_id=None,
+        config_multiagente=SimpleNamespace(ventana_mensajes=config.ventana_mensajes),
+        factory=FactoriaMedida(metricas, "mock", prob_intervencion),
+    )
+    pipeline = intermediario.pipeLine
+    pipeline.registrar_journal = False
+    if hasattr(intermediario, "min_cooldown"):
+        intermediario.min_cooldown = intermediario.cooldown_actual = config.min_cooldown
+        intermediario.max_cooldown = config.max_cooldown
+    for atributo, valor in (
+        ("INACTIVITY_THRESHOLD_SECONDS", config.inactividad_umbral),
+        ("INACTIVITY_MENTION_COOLDOWN_SECONDS", config.inactividad_cooldown),
+        ("INACTIVITY_MIN_RELATIVE_PARTICIPATION", config.participacion_minima),
+    ):
+        if valor is not None and hasattr(pipeline, atributo):
+            setattr(pipeline, atributo, valor)
+
+    contadores = {"alertas_inactividad": 0, "menciones_inactivos": 0}
+    evento_timer_original = pipeline.evento_timer
+
+    async def _evento_timer():
+        respuesta = await evento_timer_original()
+        if respuesta:
+            contadores["alertas_inactividad"] += 1
+        return respuesta
+
+    pipeline.evento_timer = _evento_timer
+    if hasattr(pipeline, "_inactive_followup_text"):
+        followup_original = pipeline._inactive_followup_text
+
+        def _followup():
+            texto = followup_original()
+            if texto:
+                contadores["menciones_inactivos"] += 1
+            return texto
+
+        pipeline._inactive_followup_text = _followup
+
+    # mismo cálculo de hitos que el Timer real
+    timer = Timer()
+    timer.duration_seconds = duracion
+
+    try:
+        await intermediario.start_session(sesion.tema or "", sesion.usuarios, "español")
+        sio.extraer()  # la bienvenida no depende de los parámetros
+        for offset, tipo, mensaje in eventos:
+            _reloj.ahora = inicio + timedelta(seconds=offset)
+            if tipo == 1:
+                await intermediario.enqueue(mensaje.autor, mensaje.contenido, 0)
+                await intermediario.message_queue.join()
+                await intermediario.esperar_tareas()
+            else:
+                timer.elapsed_seconds = int(offset)
+                hito = timer._check_hitos()
+                await intermediario.callback(int(offset), max(0, duracion - int(offset)), hito)
+    finally:
+        await intermediario.stop_session()
+        intermediario.processing_task.cancel()
+
+    emitidas = sio.extraer()
+    return {
+        "intervenciones": sum(1 for r in emitidas if _es_intervencion(r)),
+        **contadores,
+    }
+
+
+def simular_config(config: ConfigSimulacion, sesiones: list[SesionGrabada], prompts: dict | None = None,
+                   prob_intervencion: float = 0.3) -> dict:
+    """Worker del pool: simula todas las sesiones con una configuración y agrega los conteos."""
+    _instalar_reloj_virtual()
+    prompts = {**PROMPTS_SIMULADOS, **(prompts or {})}
+    logging.disable(logging.WARNING)
+    metricas = MetricasLLM()
+
+    async def _todas():
+        return [await _simular_sesion(s, config, prompts, metricas, prob_intervencion) for s in sesiones]
+
+    with contextlib.redirect_stdout(io.StringIO()):  # los pipelines imprimen cada respuesta
+        por_sesion = asyncio.run(_todas())
+
+    msgs = sum(len(s.mensajes) for s in sesiones)
+    llamadas = sum(metricas.llamadas.values())
+    return {
+        **asdict(config),
+        "sesiones": len(sesiones),
+        "mensajes_usuario": msgs,
+        "llamadas_llm": llamadas,
+        "llamadas_llm_por_mensaje": round(llamadas / msgs, 3) if msgs else 0.0,
+        "tokens_prompt": sum(metricas.tokens_prompt.values()),
+        "intervenciones": sum(r["intervenciones"] for r in por_sesion),
+        "alertas_inactividad": sum(r["alertas_inactividad"] for r in por_sesion),
+        "menciones_inactivos": sum(r["menciones_inactivos"] for r in por_sesion),
+        "llamadas_por_agente": dict(metricas.llamadas),
+    }
+
+
+def grilla(pipelines: list[str], **valores: list) -> list[ConfigSimulacion]:
+    """Producto cartesiano de los valores dados (los parámetros sin valores quedan por defecto)."""
+    claves = [k for k, v in valores.items() if v]
+    return [
+        ConfigSimulacion(pipeline=p, **dict(zip(claves, combinacion)))
+        for p in pipelines
+        for combinacion in itertools.product(*(valores[k] for k in claves))
+    ]
+
+
+def ejecutar_sweep(configs: list[ConfigSimulacion], sesiones: list[SesionGrabada],
+                   prompts_por_pipeline: dict | None = None, prob_intervencion: float = 0.3,
+                   procesos: int | None = None) -> list[dict]:
+    """Simula cada configuración en un proceso del pool."""
+    prompts_por_pipeline = prompts_por_pipeline or {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [
+            pool.submit(simular_config, c, sesiones, prompts_por_pipeline.get(c.pipeline), prob_intervencion)
+            for c in configs
+        ]
+        return [f.result() for f in futuros]
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simula sesiones grabadas bajo una grilla de parámetros (LLM simulado, tiempo virtual)."
+    )
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--db", action="store_true", help="Sesiones cerradas de la tabla messages")
+    origen.add_argument("--logs", help="Directorio de logs catalogados")
+    origen.add_argument("--corpus", help="CSV tipo chat_complete.csv")
+    parser.add_argument("--limite", type=int, default=20, help="Máximo de sesiones")
+    parser.add_argument("--pipelines", nargs="*", default=["standard", "toulmin", "abogado-del-diablo"],
+                        choices=list(INTERMEDIARIO_MAP.keys()))
+    parser.add_argument("--ventana", nargs="*", type=int, help="ventana_mensajes")
+    parser.add_argument("--update-interval", nargs="*", type=int, help="segundos entre ticks del timer")
+    parser.add_argument("--min-cooldown", nargs="*", type=int)
+    parser.add_argument("--max-cooldown", nargs="*", type=int)
+    parser.add_argument("--inactividad-umbral", nargs="*", type=int, help="INACTIVITY_THRESHOLD_SECONDS")
+    parser.add_argument("--inactividad-cooldown", nargs="*", type=int, help="INACTIVITY_MENTION_COOLDOWN_SECONDS")
+    parser.add_argument("--participacion-minima", nargs="*", type=float, help="INACTIVITY_MIN_RELATIVE_PARTICIPATION")
+    parser.add_argument("--fase-segundos", nargs="*", type=int, help="Duración de sesión (por defecto la grabada)")
+    parser.add_argument("--prob-intervencion", type=float, default=0.3)
+    parser.add_argument("--prompts", help="JSON de prompts (como en benchmark); por defecto textos de relleno")
+    parser.add_argument("--procesos", type=int, help="Workers del pool (por defecto, núcleos)")
+    parser.add_argument("--salida", help="Archivo .json o .csv con los resultados")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        sesiones = cargar_sesiones_db(limite=args.limite)
+    elif args.logs:
+        sesiones = cargar_sesiones_catalogo(args.logs, limite=args.limite)
+    else:
+        sesiones = cargar_corpus_csv(args.corpus)[:args.limite]
+    if not sesiones:
+        parser.error("No se encontraron sesiones grabadas")
+
+    configs = grilla(
+        args.pipelines,
+        ventana_mensajes=args.ventana,
+        update_interval=args.update_interval,
+        min_cooldown=args.min_cooldown,
+        max_cooldown=args.max_cooldown,
+        inactividad_umbral=args.inactividad_umbral,
+        inactividad_cooldown=args.inactividad_cooldown,
+        participacion_minima=args.participacion_minima,
+        fase_segundos=args.fase_segundos,
+    )
+    print(f"Simulando {len(configs)} configuraciones x {len(sesiones)} sesiones...")
+    prompts = _cargar_prompts(args.pipelines, args.prompts) if args.prompts else None
+    resultados = ejecutar_sweep(configs, sesiones, prompts, args.prob_intervencion, args.procesos)
+    resultados.sort(key=lambda r: (r["pipeline"], r["llamadas_llm"]))
+
+    columnas = ["pipeline", "ventana_mensajes", "update_interval", "min_cooldown", "max_cooldown",
+                "inactividad_umbral", "inactividad_cooldown", "participacion_minima",
+                "llamadas_llm", "llamadas_llm_por_mensaje", "intervenciones",
+                "alertas_inactividad", "menciones_inactivos"]
+    for r in resultados:
+        print("  ".join(f"{c}={r[c]}" for c in columnas if r[c] is not None))
+
+    if args.salida:
+        if args.salida.endswith(".csv"):
+            with open(args.salida, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columnas + ["tokens_prompt", "sesiones", "mensajes_usuario"],
+                                        extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(resultados)
+        else:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"[✅ Resultados]: {os.path.abspath(args.salida)}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,320 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Iterator
+from app.agentComponents.journal import reconstruir_conversacion
+
+# Los logs terminados se comprimen (un miembro gzip por sesión) y se concatenan en
+# archivos mensuales logs/catalogo/conversaciones_YYYYMM.gz. El índice SQLite guarda
+# los metadatos y el offset/longitud en bytes de cada sesión, así una consulta solo
+# descomprime las sesiones que coinciden, sin recorrer ni parsear todo el directorio.
+DIRECTORIO_LOGS = "./logs"
+_PATRON_FECHA = re.compile(r"_(\d{8}_\d{6})\.jsonl?$")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origen TEXT NOT NULL UNIQUE,
+    sala TEXT,
+    pipeline TEXT,
+    caso TEXT,
+    fecha TEXT,
+    n_mensajes INTEGER NOT NULL,
+    n_mensajes_usuario INTEGER NOT NULL,
+    n_mensajes_agente INTEGER NOT NULL,
+    participantes TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    longitud INTEGER NOT NULL,
+    bytes_original INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sesiones_sala ON sesiones (sala);
+CREATE INDEX IF NOT EXISTS idx_sesiones_pipeline ON sesiones (pipeline);
+CREATE INDEX IF NOT EXISTS idx_sesiones_fecha ON sesiones (fecha);
+"""
+
+
+@dataclass
+class EntradaCatalogo:
+    id: int
+    origen: str
+    sala: str
+    pipeline: str
+    caso: str
+    fecha: str
+    n_mensajes: int
+    n_mensajes_usuario: int
+    n_mensajes_agente: int
+    participantes: list[str]
+    archivo: str
+    offset: int
+    longitud: int
+    bytes_original: int
+    sha256: str
+
+
+def _es_mensaje_de_agente(m: dict) -> bool:
+    if "agent" in m:
+        return bool(m["agent"])
+    # logs antiguos: campo "rol"
+    return str(m.get("rol", "")).lower() != "user"
+
+
+def _journal_finalizado(ruta: str) -> bool:
+    """Un journal está terminado cuando su última línea es la de cierre."""
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        ultimas = f.read().decode("utf-8", errors="ignore").strip().splitlines()
+    if not ultimas:
+        return False
+    try:
+        ultima = json.loads(ultimas[-1])
+    except json.JSONDecodeError:
+        return False  # línea a medio escribir: la sesión sigue activa
+    return isinstance(ultima, dict) and ultima.get("tipo") == "cierre"
+
+
+class LogCatalog:
+    def __init__(self, directorio: str = DIRECTORIO_LOGS):
+        self.directorio = directorio
+        self.dir_catalogo = os.path.join(directorio, "catalogo")
+        self.ruta_indice = os.path.join(self.dir_catalogo, "indice.sqlite")
+
+    def _conectar(self) -> sqlite3.Connection:
+        os.makedirs(self.dir_catalogo, exist_ok=True)
+        conn = sqlite3.connect(self.ruta_indice)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_ESQUEMA)
+        return conn
+
+    # --- Ingesta ---
+    def _pendientes(self, conn) -> list[str]:
+        ya_indexados = {r[0] for r in conn.execute("SELECT origen FROM sesiones")}
+        pendientes = []
+        for nombre in sorted(os.listdir(self.directorio)):
+            ruta = os.path.join(self.directorio, nombre)
+            if nombre in ya_indexados or not nombre.startswith("conversacion_"):
+                continue
+            if nombre.endswith(".json"):
+                # si existe el journal del que se exportó, se cataloga el journal
+                if os.path.exists(ruta[:-len(".json")] + ".jsonl"):
+                    continue
+                pendientes.append(ruta)
+            elif nombre.endswith(".jsonl") and _journal_finalizado(ruta):
+                pendientes.append(ruta)
+        return pendientes
+
+    def _cargar(self, ruta: str) -> dict:
+        if ruta.endswith(".jsonl"):
+            return reconstruir_conversacion(ruta)
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _fecha(self, ruta: str, registro: dict) -> str:
+        match = _PATRON_FECHA.search(os.path.basename(ruta))
+        if match:
+            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat()
+        return registro.get("timestamp_exportacion") or datetime.fromtimestamp(os.path.getmtime(ruta)).isoformat()
+
+    def ingerir(self, eliminar_originales: bool = False) -> list[str]:
+        """
+        Comprime y cataloga los logs terminados que aún no están en el índice.
+        Los journals de sesiones activas (sin línea de cierre) se omiten.
+        Retorna los nombres de archivo ingeridos.
+        """
+        conn = self._conectar()
+        ingeridos = []
+        try:
+            for ruta in self._pendientes(conn):
+                with open(ruta, "rb") as f:
+                    crudo = f.read()
+                registro = self._cargar(ruta)
+                mensajes = registro.get("mensajes", [])
+                fecha = self._fecha(ruta, registro)
+
+                comprimido = gzip.compress(
+                    json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                )
+                archivo = f"conversaciones_{fecha[:7].replace('-', '')}.gz"
+                ruta_archivo = os.path.join(self.dir_catalogo, archivo)
+                participantes = sorted({
+                    str(m.get("autor")) for m in mensajes
+                    if not _es_mensaje_de_agente(m) and m.get("autor")
+                })
+                n_agente = sum(1 for m in mensajes if _es_mensaje_de_agente(m))
+
+                offset = os.path.getsize(ruta_archivo) if os.path.exists(ruta_archivo) else 0
+                self._agregar(conn, ruta_archivo, offset, comprimido, (
+                    os.path.basename(ruta),
+                    registro.get("sala", ""),
+                    registro.get("pipeline", ""),
+                    registro.get("caso") or registro.get("tema", ""),
+                    fecha,
+                    len(mensajes),
+                    len(mensajes) - n_agente,
+                    n_agente,
+                    json.dumps(participantes, ensure_ascii=False),
+                    archivo,
+                    offset,
+                    len(comprimido),
+                    len(crudo),
+                    hashlib.sha256(crudo).hexdigest(),
+                ))
+                ingeridos.append(os.path.basename(ruta))
+                if eliminar_originales:
+                    os.remove(ruta)
+        finally:
+            conn.close()
+        return ingeridos
+
+    @staticmethod
+    def _agregar(conn, ruta_archivo: str, offset: int, comprimido: bytes, fila: tuple) -> None:
+        """
+        Inserta la fila (sin confirmar), agrega el miembro gzip y recién entonces
+        confirma. Si algo falla se revierte la fila y el archivo vuelve a `offset`,
+        para no dejar bytes huérfanos.
+        """
+        try:
+            conn.execute(
+                """INSERT INTO sesiones (origen, sala, pipeline, caso, fecha, n_mensajes,
+                       n_mensajes_usuario, n_mensajes_agente, participantes, archivo,
+                       offset, longitud, bytes_original, sha256)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                fila,
+            )
+            with open(ruta_archivo, "ab") as f:
+                f.write(comprimido)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if os.path.exists(ruta_archivo) and os.path.getsize(ruta_archivo) > offset:
+                with open(ruta_archivo, "r+b") as f:
+                    f.truncate(offset)
+            raise
+
+    # --- Consultas ---
+    def buscar(
+        self,
+        sala: str | None = None,
+        pipeline: str | None = None,
+        tema: str | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+        min_mensajes: int | None = None,
+        limite: int | None = None,
+    ) -> list[EntradaCatalogo]:
+        """
+        Filtra el índice sin tocar los archivos comprimidos.
+        desde/hasta: fechas ISO ('YYYY-MM-DD' o con hora), hasta es exclusivo.
+        tema: búsqueda por substring en el caso/tema.
+        """
+        condiciones, params = [], []
+        if sala:
+            condiciones.append("sala = ?")
+            params.append(sala)
+        if pipeline:
+            condiciones.append("pipeline = ?")
+            params.append(pipeline)
+        if tema:
+            condiciones.append("caso LIKE ?")
+            params.append(f"%{tema}%")
+        if desde:
+            condiciones.append("fecha >= ?")
+            params.append(desde)
+        if hasta:
+            condiciones.append("fecha < ?")
+            params.append(hasta)
+        if min_mensajes is not None:
+            condiciones.append("n_mensajes >= ?")
+            params.append(min_mensajes)
+
+        sql = "SELECT * FROM sesiones"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY fecha"
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
+
+        conn = self._conectar()
+        try:
+            filas = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return [
+            EntradaCatalogo(**{**dict(f), "participantes": json.loads(f["participantes"])})
+            for f in filas
+        ]
+
+    def leer(self, entrada: EntradaCatalogo) -> dict:
+        """Lee y descomprime solo la sesión indicada (seek al offset guardado)."""
+        with open(os.path.join(self.dir_catalogo, entrada.archivo), "rb") as f:
+            f.seek(entrada.offset)
+            return json.loads(gzip.decompress(f.read(entrada.longitud)))
+
+    def iterar(self, **filtros) -> Iterator[tuple[EntradaCatalogo, dict]]:
+        """Itera (entrada, conversación) de las sesiones que coinciden con los filtros."""
+        entradas = self.buscar(**filtros)
+        # leer en orden de archivo/offset para recorrer cada archivo secuencialmente
+        for entrada in sorted(entradas, key=lambda e: (e.archivo, e.offset)):
+            yield entrada, self.leer(entrada)
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo comprimido e indexado de logs de sesiones.")
+    parser.add_argument("--logs", default=DIRECTORIO_LOGS, help="Directorio de logs (default ./logs)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_ing = sub.add_parser("ingerir", help="Comprime e indexa los logs terminados")
+    p_ing.add_argument("--eliminar-originales", action="store_true")
+
+    for nombre, ayuda in (("listar", "Lista las sesiones que coinciden"), ("exportar", "Escribe las sesiones como JSONL")):
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument("--sala")
+        p.add_argument("--pipeline")
+        p.add_argument("--tema")
+        p.add_argument("--desde")
+        p.add_argument("--hasta")
+        p.add_argument("--min-mensajes", type=int)
+        p.add_argument("--limite", type=int)
+        if nombre == "exportar":
+            p.add_argument("--salida", help="Archivo destino (default: stdout)")
+
+    args = parser.parse_args(argv)
+    catalogo = LogCatalog(args.logs)
+
+    if args.comando == "ingerir":
+        for nombre in catalogo.ingerir(eliminar_originales=args.eliminar_originales):
+            print(f"[✅ Catalogado]: {nombre}")
+        return
+
+    filtros = {
+        "sala": args.sala, "pipeline": args.pipeline, "tema": args.tema,
+        "desde": args.desde, "hasta": args.hasta,
+        "min_mensajes": args.min_mensajes, "limite": args.limite,
+    }
+    if args.comando == "listar":
+        for e in catalogo.buscar(**filtros):
+            print(json.dumps({k: v for k, v in asdict(e).items() if k not in ("offset", "longitud", "sha256")}, ensure_ascii=False))
+        return
+
+    salida = open(args.salida, "w", encoding="utf-8") if args.salida else sys.stdout
+    try:
+        for entrada, registro in catalogo.iterar(**filtros):
+            salida.write(json.dumps({"origen": entrada.origen, **registro}, ensure_ascii=False) + "\n")
+    finally:
+        if args.salida:
+            salida.close()
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,118 @@
+import io
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from app.models.models import get_day_timeline_from_db, get_day_fingerprint_from_db
+
+# Se usa la API orientada a objetos (Figure) en vez de pyplot:
+# pyplot mantiene estado global y no es seguro entre hilos/requests concurrentes.
+_plot_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="plot_dia")
+
+# Caché por día: day -> (huella, png). La huella cambia cuando cambia alguna sesión del día.
+MAX_DIAS_EN_CACHE = 32
+_cache_plots: "OrderedDict[str, tuple[tuple, bytes]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Estilo por categoría de emisor
+CATEGORIAS_PLOT = {
+    "usuario": {"color": "blue", "marker": "o", "edgecolor": "none", "label": "Usuarios"},
+    "orientador": {"color": "orange", "marker": "o", "edgecolor": "none", "label": "Orientador"},
+    "otros": {"color": "green", "marker": "s", "edgecolor": "black", "label": "Otros agentes"},
+}
+
+
+def _categoria_mensaje(agent_name: str | None) -> str:
+    if not agent_name:
+        return "usuario"
+    if agent_name.lower() == "orientador":
+        return "orientador"
+    return "otros"
+
+
+def _render_day_plot(day: str, filas: list[dict]) -> bytes:
+    """Dibuja el timeline del día con un scatter por categoría (no uno por mensaje)."""
+    session_labels = []
+    session_index = {}
+    xs = {c: [] for c in CATEGORIAS_PLOT}
+    ys = {c: [] for c in CATEGORIAS_PLOT}
+
+    for f in filas:
+        idx = session_index.get(f["session_id"])
+        if idx is None:
+            idx = len(session_labels)
+            session_index[f["session_id"]] = idx
+            session_labels.append(f"{f['room_name']} ({f['session_created_at'].strftime('%H:%M')})")
+        if f["created_at"] is None:
+            continue  # sesión sin mensajes
+        categoria = _categoria_mensaje(f["agent_name"])
+        xs[categoria].append(f["created_at"])
+        ys[categoria].append(idx)
+
+    fig = Figure(figsize=(13, max(len(session_labels) * 1.5, 4)))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(f"Timeline de sesiones del día {day}")
+    ax.set_xlabel("Timestamp")
+    ax.set_ylabel("Sesiones")
+
+    for categoria, estilo in CATEGORIAS_PLOT.items():
+        if not xs[categoria]:
+            continue
+        ax.scatter(
+            mdates.date2num(xs[categoria]),
+            np.asarray(ys[categoria]),
+            color=estilo["color"],
+            marker=estilo["marker"],
+            edgecolor=estilo["edgecolor"],
+            s=80,
+            label=estilo["label"],
+        )
+
+    tz = filas[0]["session_created_at"].tzinfo if filas else None
+    ax.xaxis_date(tz)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M", tz=tz))
+    ax.set_yticks(range(len(session_labels)), session_labels)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.legend(loc="best")
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def get_day_plot_png(day: str) -> bytes:
+    """
+    Devuelve el PNG del timeline del día, usando la caché si los datos no cambiaron.
+    Función síncrona: se ejecuta en el pool de workers (ver generate_day_plot).
+    """
+    huella = get_day_fingerprint_from_db(day)
+    if huella is None:
+        raise ValueError("No hay sesiones para este día")
+
+    with _cache_lock:
+        cacheado = _cache_plots.get(day)
+        if cacheado and cacheado[0] == huella:
+            _cache_plots.move_to_end(day)
+            return cacheado[1]
+
+    png = _render_day_plot(day, get_day_timeline_from_db(day))
+
+    with _cache_lock:
+        _cache_plots[day] = (huella, png)
+        _cache_plots.move_to_end(day)
+        while len(_cache_plots) > MAX_DIAS_EN_CACHE:
+            _cache_plots.popitem(last=False)
+    return png
+
+
+async def generate_day_plot(day: str) -> io.BytesIO:
+    """Genera (o recupera de caché) el gráfico del día sin bloquear el event loop."""
+    loop = asyncio.get_running_loop()
+    png = await loop.run_in_executor(_plot_executor, get_day_plot_png, day)
+    return io.BytesIO(png)
@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# los módulos se importan como `app.…`, igual que con uvicorn desde nuevoBackend
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# app.models crea el engine al importarse (sin conectar); las pruebas no usan la BD
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from app.analitica.metricas import a_registros, calcular_metricas
+
+
+def _mensajes(filas):
+    """filas: (sesion, autor o None para agente, contenido, segundo)."""
+    return pd.DataFrame([
+        {
+            "id": i,
+            "room_session_id": sesion,
+            "user_id": autor,
+            "agent_name": None if autor else "Orientador",
+            "sender_type": "user" if autor else "agent",
+            "content": contenido,
+            "created_at": pd.Timestamp("2025-11-17 10:00:00", tz="UTC") + pd.Timedelta(seconds=seg),
+        }
+        for i, (sesion, autor, contenido, seg) in enumerate(filas, start=1)
+    ])
+
+
+def test_sesion_solo_con_agentes():
+    metricas = calcular_metricas(_mensajes([("s1", None, "Bienvenidos a la sesión", 0)]))
+    fila = metricas.loc["s1"]
+    assert fila["mensajes_usuario"] == 0
+    assert fila["mensajes_agente"] == 1
+    assert fila["participantes"] == 0
+    assert fila["turnos"] == 0
+    assert np.isnan(fila["gap_mediana_s"])
+    assert a_registros(metricas)[0]["gini_participacion"] is None
+
+
+def test_varias_sesiones_mezcladas():
+    df = _mensajes([
+        ("s1", None, "Bienvenidos", 0),
+        ("s1", "ana", "creo que sí", 10),
+        ("s1", "ana", "porque hay datos", 20),
+        ("s1", "bo", "no estoy de acuerdo", 40),
+        ("s1", None, "¿Qué evidencia tienen?", 45),
+        ("s2", None, "Bienvenidos", 0),
+        ("s3", "ana", "hola", 5),
+        ("s3", "bo", "hola a todos", 8),
+    ])
+    # el orden de entrada no debe importar
+    metricas = calcular_metricas(df.sample(frac=1, random_state=0))
+
+    s1 = metricas.loc["s1"]
+    assert (s1["mensajes_usuario"], s1["mensajes_agente"], s1["participantes"]) == (3, 2, 2)
+    assert s1["turnos"] == 2  # ana, ana | bo
+    assert s1["gap_mediana_s"] == 15.0  # gaps 10 y 20
+    assert s1["rafagas"] == 1
+    assert s1["rafagas_con_intervencion"] == 1
+    assert s1["latencia_intervencion_mediana_s"] == 5.0
+    assert s1["gini_participacion"] > 0
+
+    s2 = metricas.loc["s2"]
+    assert (s2["mensajes_usuario"], s2["mensajes_agente"]) == (0, 1)
+
+    s3 = metricas.loc["s3"]
+    assert (s3["mensajes_usuario"], s3["mensajes_agente"], s3["turnos"]) == (2, 0, 2)
+    assert s3["gini_participacion"] == 0.0
+    assert s3["entropia_turnos"] == 1.0
+    assert s3["rafagas_con_intervencion"] == 0
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.agentComponents.intermediarios.intermediarioStandard import IntermediarioStandard
+from app.agentComponents.tema_condensado import CondensadorTema, preparar_prompts
+
+TEMA = "Caso completo: una empresa oculta un defecto de fábrica y un ingeniero debe decidir si lo denuncia."
+RESUMEN = "Ingeniero decide si denunciar un defecto oculto."
+PROMPTS = {
+    "Orientador": "Orienta la discusión sobre: {tema}",
+    "Validador": "Evalúa los argumentos sobre: {tema}",
+    "Curador": "Sin tema en el prompt.",
+}
+
+
+def test_agentes_tema_completo_reciben_el_caso_completo():
+    completos = IntermediarioStandard.AGENTES_TEMA_COMPLETO
+    preparados = preparar_prompts(PROMPTS, TEMA, RESUMEN, completos)
+    for agente in completos:
+        assert preparados[agente] == PROMPTS[agente].replace("{tema}", TEMA)
+    assert preparados["Validador"] == f"Evalúa los argumentos sobre: {RESUMEN}"
+    assert preparados["Curador"] == PROMPTS["Curador"]
+
+
+def test_sin_condensado_todos_reciben_el_caso_completo():
+    preparados = preparar_prompts(PROMPTS, TEMA, None)
+    assert preparados["Validador"] == f"Evalúa los argumentos sobre: {TEMA}"
+    assert preparados["Orientador"] == f"Orienta la discusión sobre: {TEMA}"
+
+
+def test_disponible_no_espera_al_llm():
+    class CondensadorLento(CondensadorTema):
+        async def _obtener(self, clave, tema):
+            await asyncio.sleep(0.05)
+            return RESUMEN
+
+    async def escenario():
+        condensador = CondensadorLento(umbral_tokens=0, activo=True)
+        primera = condensador.disponible(TEMA)  # se lanza en segundo plano
+        await asyncio.gather(*condensador._tareas)
+        return primera, condensador.disponible(TEMA)
+
+    assert asyncio.run(escenario()) == (None, RESUMEN)
+
+
+def test_desactivado_por_defecto():
+    assert CondensadorTema(umbral_tokens=0).disponible(TEMA) is None
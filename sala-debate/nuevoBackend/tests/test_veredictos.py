@@ -0,0 +1,46 @@
+from agentscope.message import Msg
+
+from app.agentComponents.veredictos import MotivoVeredicto, metricas_veredictos, parsear_veredicto
+
+
+def _msg(contenido, metadata=None):
+    return Msg(name="Curador", role="assistant", content=contenido, metadata=metadata)
+
+
+def _fallos(agente):
+    return metricas_veredictos["fallos"][agente]
+
+
+def test_metadata_estructurada():
+    v = parsear_veredicto(_msg("", {"intervenir": True, "motivo": "sin_evidencia", "nota": "Falta evidencia."}), "t")
+    assert v.intervenir is True
+    assert v.motivo is MotivoVeredicto.SIN_EVIDENCIA
+
+
+def test_json_con_texto_alrededor_cuenta_como_fallo():
+    # solo vale la salida del structured_model: no se extrae JSON del texto libre
+    texto = 'Mi veredicto es: {"intervenir": true, "motivo": "falacia", "nota": "x"} @Orientador'
+    antes = _fallos("texto_alrededor")
+    assert parsear_veredicto(_msg(texto), "texto_alrededor") is None
+    assert _fallos("texto_alrededor") == antes + 1
+
+
+def test_json_mal_formado_cuenta_como_fallo():
+    antes = _fallos("mal_formado")
+    assert parsear_veredicto(_msg('{"intervenir": true, "motivo": "falacia", "nota": }'), "mal_formado") is None
+    assert _fallos("mal_formado") == antes + 1
+
+
+def test_sin_motivo_no_valida():
+    antes = _fallos("sin_motivo")
+    assert parsear_veredicto(_msg("", {"intervenir": True, "nota": "Falta el motivo."}), "sin_motivo") is None
+    assert _fallos("sin_motivo") == antes + 1
+
+
+def test_motivo_desconocido_no_valida():
+    assert parsear_veredicto(_msg("", {"intervenir": True, "motivo": "aburrido", "nota": "x"}), "t") is None
+
+
+def test_respuesta_vacia_o_nula():
+    assert parsear_veredicto(_msg("Sí, @Orientador debería intervenir."), "t") is None
+    assert parsear_veredicto(None, "t") is None